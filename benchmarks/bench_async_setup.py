@@ -0,0 +1,112 @@
+"""Benchmark of fixture setup for users: one by one versus concurrently (AsyncDBClient)
+
+Both paths send the same SQL text with the same params, an INSERT and a lookup
+by email per user, one on a plain cursor of the sync connection and the other on
+AsyncDBClient, so the difference is only the concurrency of the round trips.
+
+Run from the root directory:
+    python -m benchmarks.bench_async_setup --targets local ssh --users 50
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.bench_bulk_insert import connect
+from data.data_for_auth import DB_NAME, HOST_DB, DB_USER, DB_PASS, PORT_DB
+from framework.clients.async_db_client import AsyncDBClient
+from framework.queries.connections import connect_to_postgres_async
+from framework.queries.postgres_async_db import AsyncPostgresDB
+from framework.queries.postgres_remote_db import INSERT_USER, PostgresDB
+from framework.tools.generators import generate_users, to_db_user
+
+
+def connect_async(target: str, size: int) -> AsyncPostgresDB:
+    """Pool of asynchronous connections directly (local) or through SSH tunnel (ssh)"""
+    if target == "local":
+        db = AsyncDBClient(
+            host=HOST_DB,
+            port=PORT_DB,
+            dbname=DB_NAME,
+            user=DB_USER,
+            password=DB_PASS,
+            size=size,
+        )
+        return AsyncPostgresDB(db)
+    return connect_to_postgres_async(size)
+
+
+# Lookup of the fixtures, as PostgresDB.get_data_by_filter
+LOOKUP = "SELECT * FROM user_details WHERE email = %s"
+
+
+def bench_sequential(postgres, users: list) -> float:
+    # Plain statements, without the prepared statements and server-side cursors of DBClient
+    start = time.perf_counter()
+    with postgres.db.conn.cursor() as cursor:
+        for user in users:
+            cursor.execute(INSERT_USER, PostgresDB._user_row(user))
+        for user in users:
+            cursor.execute(LOOKUP, (user["email"],))
+            cursor.fetchall()
+    return time.perf_counter() - start
+
+
+async def bench_concurrent(postgres: AsyncPostgresDB, users: list) -> float:
+    # Connections are opened before timing, as the connection of the sequential path
+    await asyncio.gather(
+        *(postgres.db.fetch_all("SELECT 1") for _ in range(postgres.db.size))
+    )
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            postgres.db.execute(INSERT_USER, PostgresDB._user_row(user))
+            for user in users
+        )
+    )
+    await asyncio.gather(
+        *(postgres.db.fetch_all(LOOKUP, (user["email"],)) for user in users)
+    )
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--targets", nargs="+", default=["local", "ssh"])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--pool-size", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'target':<8}{'users':>8}{'mode':>14}{'seconds':>12}{'speedup':>10}")
+    for target in args.targets:
+        postgres = connect(target)
+        async_postgres = connect_async(target, args.pool_size)
+        loop = asyncio.new_event_loop()
+        try:
+            for _ in range(args.repeat):
+                users = [to_db_user(user) for user in generate_users(args.users)]
+                sequential = bench_sequential(postgres, users)
+                postgres.delete_users([user["id"] for user in users])
+
+                users = [to_db_user(user) for user in generate_users(args.users)]
+                concurrent = loop.run_until_complete(
+                    bench_concurrent(async_postgres, users)
+                )
+                postgres.delete_users([user["id"] for user in users])
+
+                for mode, elapsed in (
+                    ("sequential", sequential),
+                    ("concurrent", concurrent),
+                ):
+                    print(
+                        f"{target:<8}{args.users:>8}{mode:>14}{elapsed:>12.3f}"
+                        f"{sequential / elapsed:>10.1f}"
+                    )
+        finally:
+            loop.run_until_complete(async_postgres.close())
+            loop.close()
+            postgres.close()
+
+
+if __name__ == "__main__":
+    main()
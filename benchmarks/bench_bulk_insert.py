@@ -0,0 +1,83 @@
+"""Benchmark of inserting users into user_details: bulk INSERT versus row by row
+
+Run from the root directory:
+    python -m benchmarks.bench_bulk_insert --targets local ssh --sizes 1000 10000 100000
+"""
+import argparse
+import time
+
+from data.data_for_auth import (
+    DB_NAME,
+    HOST_DB,
+    DB_USER,
+    DB_PASS,
+    PORT_DB,
+)
+from framework.queries import postgres_db
+from framework.queries.connections import connect_to_postgres
+from framework.tools.generators import generate_users, to_db_user
+
+
+def connect(target: str):
+    """Connecting to the database directly (local) or through SSH tunnel (ssh)"""
+    if target == "local":
+        postgres_db.PostgresDB.dbname = DB_NAME
+        postgres_db.PostgresDB.host = HOST_DB
+        postgres_db.PostgresDB.port = PORT_DB
+        postgres_db.PostgresDB.user = DB_USER
+        postgres_db.PostgresDB.password = DB_PASS
+        return postgres_db.PostgresDB()
+
+    return connect_to_postgres()
+
+
+def bench_bulk(postgres, size: int, page_size: int) -> float:
+    users = map(to_db_user, generate_users(size))
+    start = time.perf_counter()
+    user_ids = postgres.create_users(users, page_size=page_size)
+    elapsed = time.perf_counter() - start
+    postgres.delete_users(user_ids)
+    return elapsed
+
+
+def bench_row_by_row(postgres, size: int) -> float:
+    users = [to_db_user(user) for user in generate_users(size)]
+    start = time.perf_counter()
+    for user in users:
+        postgres.create_user(user)
+    elapsed = time.perf_counter() - start
+    postgres.delete_users([user["id"] for user in users])
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--targets", nargs="+", default=["local", "ssh"])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000, 100000])
+    parser.add_argument("--page-size", type=int, default=10_000)
+    parser.add_argument(
+        "--baseline-limit",
+        type=int,
+        default=10_000,
+        help="largest size measured row by row as well",
+    )
+    args = parser.parse_args()
+
+    print(f"{'target':<8}{'rows':>10}{'mode':>14}{'seconds':>12}{'rows/s':>12}")
+    for target in args.targets:
+        postgres = connect(target)
+        try:
+            for size in args.sizes:
+                results = [("bulk", bench_bulk(postgres, size, args.page_size))]
+                if size <= args.baseline_limit:
+                    results.append(("row by row", bench_row_by_row(postgres, size)))
+                for mode, elapsed in results:
+                    print(
+                        f"{target:<8}{size:>10}{mode:>14}{elapsed:>12.3f}{size / elapsed:>12.0f}"
+                    )
+        finally:
+            postgres.close()
+
+
+if __name__ == "__main__":
+    main()
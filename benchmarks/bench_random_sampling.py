@@ -0,0 +1,88 @@
+"""Benchmark of picking random rows: ORDER BY RANDOM() versus index lookups of random ids
+
+Run from the root directory:
+    python -m benchmarks.bench_random_sampling --targets local --sizes 10000 1000000 10000000
+"""
+import argparse
+import time
+from operator import itemgetter
+from typing import Callable
+
+from benchmarks.bench_bulk_insert import connect
+from framework.queries.random_sampling import (
+    order_by_random_query,
+    random_rows_query,
+    sample_rows,
+)
+
+# Scratch table shaped as user_details: uuid primary key and a few text columns
+TABLE = "bench_random_sampling"
+
+
+def create_table(db, size: int) -> None:
+    db.execute(f"DROP TABLE IF EXISTS {TABLE}")
+    db.execute(
+        f"CREATE UNLOGGED TABLE {TABLE} AS "
+        f"SELECT gen_random_uuid() AS id, md5(n::text) AS first_name, "
+        f"md5(n::text) || '@example.com' AS email "
+        f"FROM generate_series(1, %s) AS n",
+        (size,),
+    )
+    db.execute(f"ALTER TABLE {TABLE} ADD PRIMARY KEY (id)")
+    db.execute(f"ANALYZE {TABLE}")
+
+
+def order_by_random(db, quantity: int) -> list:
+    return db.fetch_all(order_by_random_query(TABLE), (quantity,), row_type="tuple")
+
+
+def index_lookups(db, quantity: int) -> list:
+    return sample_rows(
+        lambda starts: db.fetch_all(
+            random_rows_query(TABLE), (starts,), row_type="tuple"
+        ),
+        lambda limit: order_by_random(db, limit),
+        quantity,
+        key=itemgetter(0),
+    )
+
+
+def bench(sample: Callable[[object, int], list], db, quantity: int, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        assert len(sample(db, quantity)) == quantity
+    return (time.perf_counter() - start) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--targets", nargs="+", default=["local"])
+    parser.add_argument(
+        "--sizes", nargs="+", type=int, default=[10_000, 1_000_000, 10_000_000]
+    )
+    parser.add_argument("--quantities", nargs="+", type=int, default=[1, 10, 100])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'target':<8}{'rows':>10}{'sample':>8}{'method':>16}{'ms':>12}")
+    for target in args.targets:
+        postgres = connect(target)
+        try:
+            for size in args.sizes:
+                create_table(postgres.db, size)
+                for quantity in args.quantities:
+                    for method, sample in (
+                        ("ORDER BY RANDOM", order_by_random),
+                        ("index lookups", index_lookups),
+                    ):
+                        elapsed = bench(sample, postgres.db, quantity, args.repeat)
+                        print(
+                            f"{target:<8}{size:>10}{quantity:>8}{method:>16}{elapsed * 1000:>12.2f}"
+                        )
+        finally:
+            postgres.db.execute(f"DROP TABLE IF EXISTS {TABLE}")
+            postgres.close()
+
+
+if __name__ == "__main__":
+    main()
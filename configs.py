@@ -9,6 +9,15 @@ from data.data_for_auth import (
 
 HOST = "https://iced-latte.uk/backend"
 
+# Backend under test: "remote" - HOST above, "fake" - in-process fake backend (framework/tools/fake_backend.py)
+# started by the run on FAKE_BACKEND_PORT of this machine, products and users are taken from DB, so the fixtures
+# creating users still need the Postgres database of data_for_auth in this mode
+BACKEND_MODE = "remote"
+FAKE_BACKEND_HOST = "localhost"
+FAKE_BACKEND_PORT = 8083
+if BACKEND_MODE == "fake":
+    HOST = f"http://{FAKE_BACKEND_HOST}:{FAKE_BACKEND_PORT}"
+
 # data for creating user#1
 email = "icedlate.test@gmail.com"
 password = password
@@ -40,3 +49,63 @@ email_iced_late = "youricedlatteshop@gmail.com"
 DEFAULT_PASSWORD = DEFAULT_PASSWORD
 
 JWT_SECRET = JWT_SECRET
+
+# HTTP transport shared by the endpoint classes; the async endpoint classes send up to HTTP_ASYNC_CONCURRENCY
+# requests at once through it, connections beyond HTTP_POOL_SIZE are closed after their request
+HTTP_POOL_SIZE = 20
+HTTP_CONNECT_TIMEOUT = 10
+HTTP_READ_TIMEOUT = 30
+HTTP_ASYNC_CONCURRENCY = 100
+
+# JSON summary of the run with endpoints ranked by latency and the given number of tests ranked by time in requests
+HTTP_TIMING_SUMMARY_PATH = "reports/http_timings.json"
+HTTP_TIMING_SUMMARY_TOP = 20
+
+# Allure attachments of requests: "always" - for every request, "failed" - written only for failed tests;
+# bodies longer than ALLURE_LOG_MAX_BODY characters are gzipped if ALLURE_LOG_GZIP or truncated otherwise
+ALLURE_LOG_MODE = "always"
+ALLURE_LOG_MAX_BODY = 200_000
+ALLURE_LOG_GZIP = True
+
+# Number of pre-authenticated users shared by the tests, 0 disables the pool
+USER_POOL_SIZE = 20
+
+# bcrypt cost factor for users created by the tests directly in DB and size of cache of hashes
+TEST_USER_BCRYPT_ROUNDS = 4
+BCRYPT_CACHE_SIZE = 256
+
+# Connections to Postgres opened behind the SSH tunnel of each process, a borrower waits for a returned one
+# at most DB_POOL_TIMEOUT seconds when all DB_POOL_MAX_CONNECTIONS are borrowed
+DB_POOL_MIN_CONNECTIONS = 1
+DB_POOL_MAX_CONNECTIONS = 10
+DB_POOL_TIMEOUT = 60
+# Asynchronous connections of AsyncDBClient, i.e. queries run at the same time
+DB_ASYNC_POOL_SIZE = 10
+
+# Rows fetched per round trip by the server-side cursors of DBClient.stream
+DB_STREAM_ITERSIZE = 2000
+
+# Queries to Postgres are timed per test: slower ones than DB_SLOW_QUERY_THRESHOLD seconds are logged and attached
+# to Allure report, with EXPLAIN (ANALYZE, BUFFERS) of SELECT queries if DB_EXPLAIN_SLOW_QUERIES (runs them again);
+# JSON summary of the run with the given number of query shapes and tests ranked by time
+DB_SLOW_QUERY_THRESHOLD = 0.2
+DB_EXPLAIN_SLOW_QUERIES = False
+DB_QUERY_SUMMARY_PATH = "reports/db_queries.json"
+DB_QUERY_SUMMARY_TOP = 20
+
+# Watcher of the test mailboxes: re-issue of IMAP IDLE and maximum waiting for a code, seconds
+MAIL_IDLE_TIMEOUT = 10
+MAIL_WAIT_TIMEOUT = 60
+
+# Mail of registration and password reset: "gmail" - the mailboxes above, "local" - in-process mail sink
+# started by the run, the backend must send mail to MAIL_SINK_SMTP_PORT of this machine.
+# The sink accepts any credentials, so it listens on the loopback interface only; set MAIL_SINK_HOST
+# to "0.0.0.0" (or the address of the Docker bridge) only if the backend runs in a container
+MAIL_MODE = "gmail"
+MAIL_SINK_HOST = "localhost"
+MAIL_SINK_SMTP_PORT = 2525
+MAIL_SINK_IMAP_PORT = 1143
+
+# Record and replay of HTTP interactions: "off", "record" (appended to the file) or "replay" (without network)
+HTTP_CASSETTE_MODE = "off"
+HTTP_CASSETTE_PATH = "cassettes/api.jsonl"
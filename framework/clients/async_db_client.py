@@ -0,0 +1,159 @@
+import asyncio
+import logging
+from typing import Any, List, Optional
+
+from psycopg2 import connect
+from psycopg2.extensions import POLL_OK, POLL_READ, POLL_WRITE, connection
+
+from configs import DB_ASYNC_POOL_SIZE
+from framework.clients.db_client_ssh import get_tunnel_pool
+from framework.clients.db_stream import convert_rows
+from framework.clients.query_recorder import query_recorder
+
+
+async def _wait(conn: connection) -> None:
+    """Waiting for the asynchronous connection without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    while True:
+        state = conn.poll()
+        if state == POLL_OK:
+            return
+        if state == POLL_READ:
+            add, remove = loop.add_reader, loop.remove_reader
+        elif state == POLL_WRITE:
+            add, remove = loop.add_writer, loop.remove_writer
+        else:
+            raise ValueError(f"Unexpected state of connection: {state}")
+        ready = loop.create_future()
+        add(conn.fileno(), lambda: ready.done() or ready.set_result(None))
+        try:
+            await ready
+        finally:
+            remove(conn.fileno())
+
+
+class AsyncDBClient:
+    def __init__(
+        self,
+        host: str,
+        port: str,
+        dbname: str,
+        user: str,
+        password: str,
+        size: int = DB_ASYNC_POOL_SIZE,
+    ):
+        """Initializing the pool of asynchronous connections
+
+        Up to size queries run at the same time, every one on its own connection.
+        The connections are opened on demand and are in autocommit mode.
+        They are kept between event loops, so one client serves consecutive
+        asyncio.run() calls, e.g. of the fixtures, but not two loops at once.
+
+        Args:
+            host:     host of the Postgres database;
+            port:     port of the Postgres database;
+            dbname:   name Postgres database;
+            user:     username for connecting to the Postgres database;
+            password: password for connecting to the Postgres database;
+            size:     maximum number of connections.
+        """
+        self.connection_params = dict(
+            host=host, port=port, dbname=dbname, user=user, password=password
+        )
+        self.size = size
+        self._idle: List[connection] = []
+        self._opened: List[connection] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @classmethod
+    def through_tunnel(
+        cls, size: int = DB_ASYNC_POOL_SIZE, **connection_params
+    ) -> "AsyncDBClient":
+        """Client connecting through the SSH tunnel shared with DBClient of the process
+
+        Args:
+            size:              maximum number of connections;
+            connection_params: arguments of db_client_ssh.DBClient.
+        """
+        tunnel = get_tunnel_pool(**connection_params)
+        return cls(
+            host="localhost",
+            port=tunnel.server.local_bind_port,
+            dbname=tunnel.database_name,
+            user=tunnel.db_username,
+            password=tunnel.db_password,
+            size=size,
+        )
+
+    async def _acquire(self) -> connection:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Queries of the finished loop released their connections
+            self._slots, self._loop = asyncio.Semaphore(self.size), loop
+        await self._slots.acquire()
+        if self._idle:
+            return self._idle.pop()
+        try:
+            conn = connect(**self.connection_params, async_=True)
+            await _wait(conn)
+        except BaseException:
+            self._slots.release()
+            raise
+        self._opened.append(conn)
+        logging.info(f"Async database connection {len(self._opened)} opened")
+        return conn
+
+    def _release(self, conn: connection) -> None:
+        if conn.closed or conn.isexecuting():
+            # Interrupted query (e.g. cancelled task), the connection is not reused
+            conn.close()
+            self._opened.remove(conn)
+        else:
+            self._idle.append(conn)
+        self._slots.release()
+
+    async def _run(self, query: str, params: tuple, row_type: Optional[str]) -> Any:
+        logging.debug(query)
+        conn = await self._acquire()
+        try:
+            with conn.cursor() as cursor:
+                with query_recorder.timed(query):
+                    cursor.execute(query, params)
+                    await _wait(conn)
+                if row_type is None:
+                    return cursor.rowcount
+                return list(convert_rows(cursor, row_type))
+        finally:
+            self._release(conn)
+
+    async def fetch_all(
+        self, query: str, params: tuple = (), row_type: str = "tuple"
+    ) -> List[Any]:
+        """Executing a query and returning all rows
+
+        Args:
+            query:    query to the Postgres database;
+            params:   values for %s placeholders of the query;
+            row_type: type of rows, one of db_stream.ROW_TYPES.
+        """
+        return await self._run(query, params, row_type)
+
+    async def execute(self, query: str, params: tuple = ()) -> int:
+        """Executing a query without returning data, the number of affected rows is returned"""
+        return await self._run(query, params, None)
+
+    async def close(self) -> None:
+        """Closing all connections"""
+        for conn in self._opened:
+            conn.close()
+        logging.info(f"{len(self._opened)} async database connections closed")
+        self._opened.clear()
+        self._idle.clear()
+        self._slots, self._loop = None, None
+
+    async def __aenter__(self) -> "AsyncDBClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
@@ -0,0 +1,109 @@
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Optional, TypeVar
+
+from requests import Response
+
+from configs import HTTP_ASYNC_CONCURRENCY
+from framework.clients.http_client import HttpClient, get_http_client
+
+T = TypeVar("T")
+
+
+class AsyncHttpClient:
+    def __init__(
+        self, client: HttpClient = None, concurrency: int = HTTP_ASYNC_CONCURRENCY
+    ):
+        """Initializing the asyncio facade over the pooled keep-alive session
+
+        Requests are sent by the worker threads through the HTTP client of the
+        process, so responses are the same requests.Response objects as in the
+        sync endpoint classes and share their connections, cassette and statistics.
+
+        Args:
+            client:      HTTP client sending the requests, get_http_client() if not passed;
+            concurrency: maximum number of requests in flight.
+        """
+        self.client = client or get_http_client()
+        self.executor = ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="async-http"
+        )
+        logging.info(f"Async HTTP client with concurrency {concurrency} created")
+
+    def close(self) -> None:
+        """Stopping the worker threads, the HTTP client is left open for the sync endpoint classes"""
+        self.executor.shutdown(wait=True)
+
+    async def run(self, function: Callable[..., T], *args, **kwargs) -> T:
+        """Calling a blocking function in a worker thread without blocking the event loop
+
+        Args:
+            function: function sending requests, e.g. HttpClient.request. It should not
+                      write to Allure report: the worker threads keep the Allure
+                      context of the test which started them;
+            args:     positional arguments of the function;
+            kwargs:   keyword arguments of the function.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, partial(function, *args, **kwargs)
+        )
+
+    async def request(self, method: str, url: str, **kwargs) -> Response:
+        """Sending a request without blocking the event loop
+
+        Args:
+            method: HTTP method;
+            url:    URL of request;
+            kwargs: other arguments of requests.request.
+        """
+        return await self.run(self.client.request, method, url, **kwargs)
+
+    async def get(self, url: str, **kwargs) -> Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def put(self, url: str, **kwargs) -> Response:
+        return await self.request("PUT", url, **kwargs)
+
+    async def patch(self, url: str, **kwargs) -> Response:
+        return await self.request("PATCH", url, **kwargs)
+
+    async def delete(self, url: str, **kwargs) -> Response:
+        return await self.request("DELETE", url, **kwargs)
+
+
+_client: Optional[AsyncHttpClient] = None
+_client_pid: Optional[int] = None
+_client_lock = threading.Lock()
+
+
+def get_async_http_client() -> AsyncHttpClient:
+    """Getting the async HTTP client of the current process
+
+    The client is recreated after fork together with the HTTP client it uses.
+    """
+    global _client, _client_pid
+
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            _client = AsyncHttpClient()
+            _client_pid = os.getpid()
+
+        return _client
+
+
+def close_async_http_client() -> None:
+    """Stopping the worker threads of the async HTTP client of the current process, if it was created"""
+    global _client, _client_pid
+
+    with _client_lock:
+        if _client is not None and _client_pid == os.getpid():
+            _client.close()
+        _client, _client_pid = None, None
@@ -0,0 +1,239 @@
+import base64
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from filelock import FileLock
+from requests import PreparedRequest, Response
+from requests.adapters import BaseAdapter
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# Values which differ between runs of the same test and are masked in the key of interaction
+_JWT = re.compile(r"eyJ[\w-]+\.[\w-]+\.[\w-]+")
+_TIMESTAMP = re.compile(
+    r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?"
+)
+_BOUNDARY = re.compile(r"boundary=([^;\s]+)")
+# Emails and ids generated by the tests of every run, numbered in the order of appearance in the request
+_UUID = re.compile(
+    r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b", re.IGNORECASE
+)
+_EMAIL = re.compile(r"[\w.+%-]+(?:@|%40)[\w-]+(?:\.[\w-]+)+")
+
+
+class CassetteMissError(RequestsConnectionError):
+    """The request was not recorded in the cassette"""
+
+
+class GeneratedIds:
+    def __init__(self):
+        """UUIDs generated by the tests of the process, e.g. ids of the users of generate_user
+
+        Only these ids differ between runs and are masked in the key of interaction,
+        ids of products and other data of the backend stay in the key. The ids are
+        collected after a cassette is opened, so the runs without it keep no ids.
+        """
+        self._lock = threading.Lock()
+        self._ids: Set[str] = set()
+        self.enabled = False
+
+    def add(self, *ids: str) -> None:
+        if self.enabled:
+            with self._lock:
+                self._ids.update(str(_id).lower() for _id in ids)
+
+    def __contains__(self, _id: str) -> bool:
+        return _id.lower() in self._ids
+
+
+generated_ids = GeneratedIds()
+
+
+def _numbered(
+    kind: str, numbers: Dict[str, str], only: Optional[GeneratedIds] = None
+) -> Callable[[re.Match], str]:
+    """Replacing every distinct value (of only, if given) by its number of first appearance, e.g. <email1>"""
+
+    def replace(match: re.Match) -> str:
+        value = match.group(0).lower()
+        if only is not None and value not in only:
+            return match.group(0)
+        if value not in numbers:
+            numbers[value] = f"<{kind}{len(numbers) + 1}>"
+        return numbers[value]
+
+    return replace
+
+
+def _mask(text: str, emails: Dict[str, str], uuids: Dict[str, str]) -> str:
+    text = _TIMESTAMP.sub("<timestamp>", _JWT.sub("<token>", text))
+    text = _EMAIL.sub(_numbered("email", emails), text)
+    return _UUID.sub(_numbered("uuid", uuids, only=generated_ids), text)
+
+
+def interaction_key(request: PreparedRequest) -> str:
+    """Key of request in the cassette: method, path with sorted query and normalized body
+
+    Tokens and timestamps are masked. Emails and the UUIDs of generated_ids, e.g. of
+    the users generated by generate_user, are replaced by their number of appearance
+    in the request, so the requests of two runs match while different ids in one
+    request stay different. Other UUIDs, e.g. of products, are kept as they are,
+    so the requests for different products never share their responses.
+    JSON body is compared regardless of the order of keys and formatting,
+    multipart boundary is ignored.
+
+    Args:
+        request: request to be sent
+    """
+    url = urlsplit(request.url)
+    query = urlencode(sorted(parse_qsl(url.query, keep_blank_values=True)))
+    body = request.body or b""
+    if isinstance(body, str):
+        body = body.encode()
+    try:
+        normalized = json.dumps(json.loads(body), sort_keys=True, separators=(",", ":"))
+    except ValueError:
+        normalized = body.decode("latin-1")
+        if boundary := _BOUNDARY.search(request.headers.get("Content-Type", "")):
+            normalized = normalized.replace(boundary.group(1), "<boundary>")
+    emails, uuids = {}, {}
+    path, query = _mask(url.path, emails, uuids), _mask(query, emails, uuids)
+    digest = hashlib.sha1(_mask(normalized, emails, uuids).encode()).hexdigest()
+    return f"{request.method} {path}?{query} {digest}"
+
+
+class Cassette:
+    def __init__(self, path: Path):
+        """Recorded interactions (request key -> responses) stored in JSON Lines file
+
+        Every line is one interaction, so recording only appends to the file
+        and the file can be written by several pytest-xdist workers.
+        Identical requests are answered by their responses in the recorded order,
+        the last one is repeated when they are exhausted.
+
+        Args:
+            path: path to the cassette file
+        """
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._file_lock = FileLock(f"{self.path}.lock")
+        self._interactions: Dict[str, List[dict]] = defaultdict(list)
+        self._played: Dict[str, int] = defaultdict(int)
+
+    def load(self) -> "Cassette":
+        start = time.perf_counter()
+        with self.path.open(encoding="utf-8") as file:
+            for line in file:
+                if line.strip():
+                    interaction = json.loads(line)
+                    self._interactions[interaction["key"]].append(interaction)
+        logging.info(
+            f"Cassette {self.path} with {len(self)} interactions loaded "
+            f"in {time.perf_counter() - start:.3f}s"
+        )
+        return self
+
+    def __len__(self) -> int:
+        return sum(map(len, self._interactions.values()))
+
+    def record(self, request: PreparedRequest, response: Response) -> None:
+        content = response.content
+        try:
+            body, encoding = content.decode("utf-8"), None
+        except UnicodeDecodeError:
+            body, encoding = base64.b64encode(content).decode(), "base64"
+        line = json.dumps(
+            {
+                "key": interaction_key(request),
+                "status": response.status_code,
+                "reason": response.reason,
+                "headers": dict(response.headers),
+                "body": body,
+                "encoding": encoding,
+                "elapsed": response.elapsed.total_seconds(),
+            },
+            separators=(",", ":"),
+        )
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._file_lock, self.path.open("a", encoding="utf-8") as file:
+            file.write(line + "\n")
+
+    def play(self, request: PreparedRequest) -> Optional[dict]:
+        """Finding the recorded response to the request, O(1)"""
+        key = interaction_key(request)
+        with self._lock:
+            recorded = self._interactions.get(key)
+            if not recorded:
+                return None
+            index = min(self._played[key], len(recorded) - 1)
+            self._played[key] += 1
+            return recorded[index]
+
+
+class CassetteAdapter(BaseAdapter):
+    def __init__(self, mode: str, path: Path, adapter: BaseAdapter):
+        """Transport adapter recording responses to the cassette or replaying them from it
+
+        Args:
+            mode:    "record" - requests are sent by adapter and recorded,
+                     "replay" - requests are answered from the cassette without network;
+            path:    path to the cassette file;
+            adapter: adapter sending requests in "record" mode.
+        """
+        super().__init__()
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode {mode}")
+        self.mode = mode
+        self.adapter = adapter
+        generated_ids.enabled = True
+        self.cassette = Cassette(path)
+        if mode == "replay":
+            self.cassette.load()
+
+    def send(self, request: PreparedRequest, **kwargs) -> Response:
+        if self.mode == "record":
+            response = self.adapter.send(request, **kwargs)
+            self.cassette.record(request, response)
+            return response
+
+        interaction = self.cassette.play(request)
+        if interaction is None:
+            raise CassetteMissError(
+                f"{request.method} {request.url} is not recorded in {self.cassette.path}",
+                request=request,
+            )
+        return self._build_response(request, interaction)
+
+    def _build_response(self, request: PreparedRequest, interaction: dict) -> Response:
+        response = Response()
+        response.status_code = interaction["status"]
+        response.reason = interaction["reason"]
+        response.headers = CaseInsensitiveDict(interaction["headers"])
+        # The body is already decoded, so the encoding headers are not applied again
+        response.headers.pop("Content-Encoding", None)
+        response.headers.pop("Transfer-Encoding", None)
+        body = interaction["body"]
+        response._content = (
+            base64.b64decode(body)
+            if interaction["encoding"] == "base64"
+            else body.encode("utf-8")
+        )
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.elapsed = timedelta(seconds=interaction["elapsed"])
+        response.encoding = get_encoding_from_headers(response.headers)
+        return response
+
+    def close(self) -> None:
+        self.adapter.close()
@@ -1,9 +1,59 @@
 import logging
-
-from typing import Optional, List
+import re
+import time
+from typing import Any, Dict, Iterable, Iterator, Optional, List
 
 from psycopg2 import connect
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
+
+from configs import DB_STREAM_ITERSIZE
+from framework.clients.db_stream import convert_rows, stream_rows
+from framework.clients.query_recorder import explain_analyze, query_recorder
+
+_IDENTIFIER = re.compile(r"[a-z_][a-z0-9_]*")
+
+
+def check_identifier(name: str) -> str:
+    """Checking a name of table, column or statement put into a query as is
+
+    Args:
+        name: lowercase SQL identifier
+
+    Returns:
+        the name
+    """
+    if not isinstance(name, str) or not _IDENTIFIER.fullmatch(name):
+        raise ValueError(f"Invalid SQL identifier: {name!r}")
+    return name
+
+
+class StatementStats:
+    def __init__(self):
+        """Executions of a prepared statement"""
+        self.prepares = 0
+        self.hits = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    @property
+    def calls(self) -> int:
+        return self.prepares + self.hits
+
+    def add(self, seconds: float) -> None:
+        self.total_time += seconds
+        self.max_time = max(self.max_time, seconds)
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "prepares": self.prepares,
+            "hits": self.hits,
+            "total_ms": round(self.total_time * 1000, 3),
+            "mean_ms": round(self.total_time / self.calls * 1000, 3)
+            if self.calls
+            else 0.0,
+            "max_ms": round(self.max_time * 1000, 3),
+        }
 
 
 class DBClient:
@@ -22,6 +72,9 @@ class DBClient:
         )
         self.conn.autocommit = True
         self.cur = self.conn.cursor(cursor_factory=RealDictCursor)
+        # Statements prepared on the connection: name -> query
+        self.prepared: Dict[str, str] = {}
+        self.statement_stats: Dict[str, StatementStats] = {}
         logging.info(self.conn)
 
     def close(self) -> None:
@@ -34,28 +87,145 @@ class DBClient:
         logging.info("Connection the closed")
         self.conn.close()
 
-    def execute(self, query: str) -> None:
+    def execute(self, query: str, params: Optional[tuple] = None) -> None:
         """Executing a query to the Postgres database without returning data
 
         Args:
-            query: query to the Postgres database
+            query:  query to the Postgres database;
+            params: values for %s placeholders of the query.
         """
         logging.debug(query)
-        self.cur.execute(str(query), None)
+        query = str(query)
+        with query_recorder.timed(
+            query, lambda: explain_analyze(self.conn, query, params)
+        ):
+            self.cur.execute(query, params)
 
-    def fetch_all(self, query: str) -> Optional[List[dict]]:
+    def fetch_all(
+        self, query: str, params: Optional[tuple] = None, row_type: str = "dict"
+    ) -> List[Any]:
         """Executing a query to the Postgres database with returning data in the form of list
 
+        The rows are read by stream, so only the returned list holds the whole result.
+
         Args:
-            query: query to the Postgres database
+            query:    query to the Postgres database;
+            params:   values for %s placeholders of the query;
+            row_type: type of rows, one of db_stream.ROW_TYPES.
 
         Returns:
             [{row1}, {row2}, ...]
         """
-        self.execute(query)
-        records = self.cur.fetchall()
-        if records:
-            rows = [dict(rec) for rec in records]
-            return rows
+        query = str(query)
+        with query_recorder.timed(
+            query, lambda: explain_analyze(self.conn, query, params)
+        ):
+            return list(self.stream(query, params, row_type=row_type))
+
+    def stream(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        itersize: int = DB_STREAM_ITERSIZE,
+        row_type: str = "dict",
+    ) -> Iterator[Any]:
+        """Reading rows of a SELECT query lazily from a server-side cursor
+
+        Only itersize rows are held in memory at once, e.g. for full-table reads.
+        No other query can run on the connection until the iteration is finished
+        or closed, see db_stream.stream_rows.
+
+        Args:
+            query:    SELECT query to the Postgres database;
+            params:   values for %s placeholders of the query;
+            itersize: number of rows fetched per round trip;
+            row_type: type of rows, one of db_stream.ROW_TYPES.
+        """
+        return stream_rows(self.conn, str(query), params, itersize, row_type)
+
+    def insert_many(
+        self,
+        query: str,
+        rows: Iterable[tuple],
+        template: Optional[str] = None,
+        page_size: int = 10_000,
+    ) -> List[dict]:
+        """Inserting many rows with multi-row VALUES and returning data
+
+        Args:
+            query:     query with a single %s placeholder for VALUES, e.g. with RETURNING;
+            rows:      values of rows, may be a generator;
+            template:  template of one row, e.g. "(%s, %s, true)";
+            page_size: number of rows in one statement (one round trip).
+
+        Returns:
+            [{row1}, {row2}, ...] returned by the query
+        """
+        logging.debug(query)
+        with query_recorder.timed(query):
+            records = execute_values(
+                self.cur,
+                query,
+                rows,
+                template=template,
+                page_size=page_size,
+                fetch=True,
+            )
+        return [dict(rec) for rec in records]
+
+    def _run_prepared(
+        self, name: str, query: str, params: tuple, row_type: Optional[str]
+    ) -> Optional[List[Any]]:
+        check_identifier(name)
+        stats = self.statement_stats.setdefault(name, StatementStats())
+        start = time.perf_counter()
+        with self.conn.cursor() as cursor:
+            if name not in self.prepared:
+                logging.debug(f"PREPARE {name}: {query}")
+                cursor.execute(f"PREPARE {name} AS {query}")
+                self.prepared[name] = query
+                stats.prepares += 1
+            elif self.prepared[name] != query:
+                raise ValueError(f"Statement {name} is prepared for other query")
+            else:
+                stats.hits += 1
+            placeholders = ", ".join(["%s"] * len(params))
+            statement = (
+                f"EXECUTE {name} ({placeholders})" if params else f"EXECUTE {name}"
+            )
+            with query_recorder.timed(
+                query, lambda: explain_analyze(self.conn, statement, params)
+            ):
+                cursor.execute(statement, params)
+            rows = list(convert_rows(cursor, row_type)) if row_type else None
+        stats.add(time.perf_counter() - start)
+        return rows
+
+    def fetch_prepared(
+        self, name: str, query: str, params: tuple = (), row_type: str = "dict"
+    ) -> List[Any]:
+        """Executing a prepared statement with returning data in the form of list
+
+        The statement is prepared by the first call on the connection, so the next
+        calls skip parsing and planning of the query.
+
+        Args:
+            name:     name of statement, SQL identifier;
+            query:    query with $1, $2, ... placeholders;
+            params:   values of the placeholders;
+            row_type: type of rows, one of db_stream.ROW_TYPES.
+        """
+        return self._run_prepared(name, query, tuple(params), row_type)
+
+    def execute_prepared(self, name: str, query: str, params: tuple = ()) -> None:
+        """Executing a prepared statement without returning data, see fetch_prepared"""
+        self._run_prepared(name, query, tuple(params), None)
 
-        return []
+    def statement_summary(self) -> Dict[str, dict]:
+        """Executions and time of the prepared statements, the slowest in total first"""
+        return {
+            name: stats.as_dict()
+            for name, stats in sorted(
+                self.statement_stats.items(), key=lambda s: -s[1].total_time
+            )
+        }
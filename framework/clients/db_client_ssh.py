@@ -1,12 +1,25 @@
 import logging
-from typing import List
+import os
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 
-from psycopg2 import connect
-from psycopg2.extras import RealDictCursor
+from psycopg2 import InterfaceError, OperationalError
+from psycopg2.extensions import connection
+from psycopg2.extras import RealDictCursor, execute_values
+from psycopg2.pool import PoolError, ThreadedConnectionPool
 from sshtunnel import SSHTunnelForwarder
 
+from configs import (
+    DB_POOL_MIN_CONNECTIONS,
+    DB_POOL_MAX_CONNECTIONS,
+    DB_POOL_TIMEOUT,
+    DB_STREAM_ITERSIZE,
+)
+from framework.clients.db_stream import stream_rows
+from framework.clients.query_recorder import explain_analyze, query_recorder
 
-class DBClient:
+
+class TunnelPool:
     def __init__(
         self,
         ssh_username: str,
@@ -17,12 +30,15 @@ class DBClient:
         database_name: str,
         remote_server_ip: str,
         port_ssh: int,
+        min_connections: int = DB_POOL_MIN_CONNECTIONS,
+        max_connections: int = DB_POOL_MAX_CONNECTIONS,
     ):
         """
-        Initializes a database connection tunnel via SSH.
+        Initializes an SSH tunnel with a bounded pool of database connections behind it.
 
-        Creates an SSH tunnel to a remote server, binds to the remote PostgresSQL port,
-        and starts the SSH server, then connects to a PostgresSQL database through the tunnel.
+        The tunnel and the connections are opened once and shared by all DBClient
+        instances of the process, so a test only borrows an open connection.
+        When max_connections are borrowed, the next borrower waits for one to be returned.
 
         Args:
             ssh_username: SSH server username.
@@ -33,7 +49,20 @@ class DBClient:
             database_name: Name of database to connect.
             remote_server_ip: IP address of remote SSH server.
             port_ssh: SSH server port.
+            min_connections: Number of connections opened in advance.
+            max_connections: Maximum number of connections borrowed at the same time.
         """
+        self.db_username = db_username
+        self.db_password = db_password
+        self.database_name = database_name
+        self.min_connections = min_connections
+        self.max_connections = max_connections
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_connections)
+        # Pool of every borrowed connection by id, a pool replaced by reconnect stays open until
+        # all its connections are returned
+        self._owners: Dict[int, ThreadedConnectionPool] = {}
+
         # Start SSH tunnel
         self.server = SSHTunnelForwarder(
             (remote_server_ip, port_ssh),
@@ -46,30 +75,239 @@ class DBClient:
         logging.info(
             f"SSH tunnel established. Local port: {self.server.local_bind_port}"
         )
+        self.pool = self._create_pool()
 
-        # Connect to PostgresSQL through the tunnel
-        self.conn = connect(
+    def _create_pool(self) -> ThreadedConnectionPool:
+        """Connect to PostgresSQL through the tunnel"""
+        pool = ThreadedConnectionPool(
+            self.min_connections,
+            self.max_connections,
             host="localhost",
             port=self.server.local_bind_port,
-            dbname=database_name,
-            user=db_username,
-            password=db_password,
+            dbname=self.database_name,
+            user=self.db_username,
+            password=self.db_password,
         )
+        logging.info(
+            f"Database connection pool established. Size: {self.max_connections}"
+        )
+        return pool
+
+    def _reconnect(self) -> None:
+        """Restart the SSH tunnel and open a new pool, the local port may change
+
+        Called under the lock. The old pool is closed once its borrowed connections are returned.
+        """
+        logging.warning("SSH tunnel is down, reconnecting")
+        retired = self.pool
+        self.server.restart()
+        self.pool = self._create_pool()
+        self._close_if_retired(retired)
+
+    def _close_if_retired(self, pool: ThreadedConnectionPool) -> None:
+        if pool is not self.pool and pool not in self._owners.values():
+            pool.closeall()
+            logging.info("Database connection pool of the previous tunnel closed")
+
+    @staticmethod
+    def _is_alive(conn: connection) -> bool:
+        if conn.closed:
+            return False
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except (OperationalError, InterfaceError):
+            return False
+
+    def _borrow(self) -> connection:
+        with self._lock:
+            if not self.server.is_active:
+                self._reconnect()
+            conn = self.pool.getconn()
+            self._owners[id(conn)] = self.pool
+        return conn
+
+    def _give_back(self, conn: connection, close: bool = False) -> bool:
+        """Return the connection to the pool it was borrowed from, False if it was not borrowed"""
+        with self._lock:
+            pool = self._owners.pop(id(conn), None)
+            if pool is None:
+                conn.close()
+                return False
+            pool.putconn(conn, close=close or bool(conn.closed))
+            self._close_if_retired(pool)
+        return True
+
+    def getconn(self) -> connection:
+        """Borrow a healthy connection, reconnecting the tunnel if it is down
+
+        Raises:
+            PoolError: no connection was returned by other borrowers within DB_POOL_TIMEOUT seconds.
+        """
+        if not self._slots.acquire(timeout=DB_POOL_TIMEOUT):
+            raise PoolError(
+                f"All {self.max_connections} database connections are borrowed "
+                f"for more than {DB_POOL_TIMEOUT}s"
+            )
+        try:
+            conn = self._borrow()
+            if not self._is_alive(conn):
+                # The connection was broken (e.g. by the server), it is replaced by a new one
+                self._give_back(conn, close=True)
+                conn = self._borrow()
+        except BaseException:
+            self._slots.release()
+            raise
+        return conn
+
+    def putconn(self, conn: connection) -> None:
+        """Return the connection to the pool, an open transaction is rolled back by the pool"""
+        if self._give_back(conn):
+            self._slots.release()
+
+    def close(self) -> None:
+        """Close all connections and the SSH tunnel"""
+        with self._lock:
+            pools = {id(pool): pool for pool in self._owners.values()}
+            pools[id(self.pool)] = self.pool
+            self._owners.clear()
+        for pool in pools.values():
+            pool.closeall()
+        logging.info("Database connection pool closed")
+        self.server.stop()
+        logging.info("SSH tunnel closed")
+
+
+_pools: Dict[tuple, TunnelPool] = {}
+_pools_pid: Optional[int] = None
+_pools_lock = threading.Lock()
+
+
+def get_tunnel_pool(**connection_params) -> TunnelPool:
+    """Getting the tunnel with the connection pool of the current process
+
+    One tunnel is opened per set of connection parameters and per process,
+    so every pytest-xdist worker has its own.
+
+    Args:
+        connection_params: arguments of TunnelPool.
+    """
+    global _pools_pid
+
+    key = tuple(sorted(connection_params.items()))
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            # Sockets of the parent process can not be used after fork
+            _pools.clear()
+            _pools_pid = os.getpid()
+        if key not in _pools:
+            _pools[key] = TunnelPool(**connection_params)
+
+        return _pools[key]
+
+
+def close_tunnel_pools() -> None:
+    """Closing all tunnels and connection pools of the current process"""
+    with _pools_lock:
+        while _pools:
+            _, pool = _pools.popitem()
+            pool.close()
+
+
+class DBClient:
+    def __init__(
+        self,
+        ssh_username: str,
+        ssh_password: str,
+        local_server_ip: str,
+        db_username: str,
+        db_password: str,
+        database_name: str,
+        remote_server_ip: str,
+        port_ssh: int,
+    ):
+        """
+        Borrows a database connection from the pool behind the SSH tunnel.
+
+        The tunnel and the pool are created by the first client of the process
+        and reused by the next ones, see get_tunnel_pool.
+
+        Args:
+            ssh_username: SSH server username.
+            ssh_password: SSH server password.
+            local_server_ip: IP address of local Postgres server.
+            db_username: Database username.
+            db_password: Database password.
+            database_name: Name of database to connect.
+            remote_server_ip: IP address of remote SSH server.
+            port_ssh: SSH server port.
+        """
+        self.pool = get_tunnel_pool(
+            ssh_username=ssh_username,
+            ssh_password=ssh_password,
+            local_server_ip=local_server_ip,
+            db_username=db_username,
+            db_password=db_password,
+            database_name=database_name,
+            remote_server_ip=remote_server_ip,
+            port_ssh=port_ssh,
+        )
+        self.conn = self.pool.getconn()
         self.conn.autocommit = True
         self.cur = self.conn.cursor(cursor_factory=RealDictCursor)
-        logging.info("Database connection established")
+        self.isolation_depth = 0
+        logging.info("Database connection borrowed from the pool")
+
+    @property
+    def isolated(self) -> bool:
+        """Changes are made inside a transaction that will be rolled back"""
+        return self.isolation_depth > 0
+
+    def begin(self) -> None:
+        """
+        Start a transaction, or a SAVEPOINT inside the already started one.
+
+        Queries are not committed until the matching rollback, so nothing
+        is left in the database even if the test crashes.
+        """
+        if self.isolated:
+            with self.conn.cursor() as cursor:
+                cursor.execute(f"SAVEPOINT isolation_{self.isolation_depth}")
+        else:
+            self.conn.autocommit = False
+        self.isolation_depth += 1
+        logging.info(f"Database isolation level {self.isolation_depth} started")
+
+    def rollback(self) -> None:
+        """Roll back changes made since the matching begin"""
+        if not self.isolated:
+            return
+        self.isolation_depth -= 1
+        if self.isolated:
+            with self.conn.cursor() as cursor:
+                cursor.execute(
+                    f"ROLLBACK TO SAVEPOINT isolation_{self.isolation_depth}"
+                )
+        else:
+            self.conn.rollback()
+            self.conn.autocommit = True
+        logging.info(f"Database isolation level {self.isolation_depth + 1} rolled back")
 
     def close(self) -> None:
-        """Close the cursor, database connection, and SSH tunnel"""
+        """Close the cursor and return the database connection to the pool
+
+        Not rolled back changes of isolation are discarded by the pool.
+        """
         if self.cur:
             self.cur.close()
+            self.cur = None
             logging.info("Cursor closed")
         if self.conn:
-            self.conn.close()
-            logging.info("Database connection closed")
-        if self.server:
-            self.server.stop()
-            logging.info("SSH tunnel closed")
+            self.pool.putconn(self.conn)
+            self.conn = None
+            logging.info("Database connection returned to the pool")
 
     # def execute(self, query: str) -> None:
     #     """Execute a query to the Postgres database without returning data"""
@@ -81,12 +319,80 @@ class DBClient:
     #     self.execute(query)
     #     records = self.cur.fetchall()
     #     return [dict(rec) for rec in records] if records else []
-    def fetch_all(self, query: str, params: tuple = ()) -> List[tuple]:
+    def fetch_all(
+        self, query: str, params: tuple = (), row_type: str = "tuple"
+    ) -> List[Any]:
+        """Execute a query and return all rows
+
+        The rows are read by stream, so only the returned list holds the whole result.
+
+        Args:
+            query:    SELECT query to the Postgres database;
+            params:   values for %s placeholders of the query;
+            row_type: type of rows, one of db_stream.ROW_TYPES.
+        """
+        with query_recorder.timed(
+            query, lambda: explain_analyze(self.conn, query, params)
+        ):
+            return list(self.stream(query, params, row_type=row_type))
+
+    def stream(
+        self,
+        query: str,
+        params: tuple = (),
+        itersize: int = DB_STREAM_ITERSIZE,
+        row_type: str = "tuple",
+    ) -> Iterator[Any]:
+        """Yield rows of a SELECT query lazily from a server-side cursor
+
+        Only itersize rows are held in memory at once. No other query can run on
+        the connection and it must not be returned to the pool until the iteration
+        is finished or closed, see db_stream.stream_rows.
+
+        Args:
+            query:    SELECT query to the Postgres database;
+            params:   values for %s placeholders of the query;
+            itersize: number of rows fetched per round trip;
+            row_type: type of rows, one of db_stream.ROW_TYPES.
+        """
+        return stream_rows(self.conn, query, params, itersize, row_type)
+
+    def execute(self, query: str, params: tuple = ()) -> int:
+        """Execute a query without returning data, the number of affected rows is returned"""
         with self.conn.cursor() as cursor:
-            cursor.execute(query, params)
-            return cursor.fetchall()
+            with query_recorder.timed(
+                query, lambda: explain_analyze(self.conn, query, params)
+            ):
+                cursor.execute(query, params)
+            if not self.isolated:
+                self.conn.commit()
+            return cursor.rowcount
+
+    def insert_many(
+        self,
+        query: str,
+        rows: Iterable[tuple],
+        template: Optional[str] = None,
+        page_size: int = 10_000,
+    ) -> List[tuple]:
+        """Inserting many rows with multi-row VALUES and returning data
 
-    def execute(self, query: str, params: tuple = ()) -> None:
+        Args:
+            query:     query with a single %s placeholder for VALUES, e.g. with RETURNING;
+            rows:      values of rows, may be a generator;
+            template:  template of one row, e.g. "(%s, %s, true)";
+            page_size: number of rows in one statement (one round trip).
+        """
         with self.conn.cursor() as cursor:
-            cursor.execute(query, params)
-            self.conn.commit()
+            with query_recorder.timed(query):
+                records = execute_values(
+                    cursor,
+                    query,
+                    rows,
+                    template=template,
+                    page_size=page_size,
+                    fetch=True,
+                )
+            if not self.isolated:
+                self.conn.commit()
+            return records
@@ -0,0 +1,125 @@
+import itertools
+import logging
+from functools import lru_cache
+from typing import Any, Callable, Iterable, Iterator, Optional, Sequence, Tuple
+
+from psycopg2.extensions import connection, cursor
+
+# Row types of query results: "tuple" - plain tuples (the most compact), "dict" - column -> value,
+# "slots" - objects with __slots__ of columns, read as row.id or row["id"]
+ROW_TYPES = ("tuple", "dict", "slots")
+
+_cursor_names = itertools.count()
+
+
+class SlotsRow:
+    """Base of the row types generated by slots_row_type()"""
+
+    __slots__ = ()
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    def __getitem__(self, column: str) -> Any:
+        return getattr(self, column)
+
+    def __eq__(self, other) -> bool:
+        return type(self) is type(other) and tuple(self) == tuple(other)
+
+    def __iter__(self) -> Iterator[Any]:
+        return (getattr(self, name) for name in self.__slots__)
+
+    def as_dict(self) -> dict:
+        return dict(zip(self.__slots__, self))
+
+    def __repr__(self) -> str:
+        values = ", ".join(
+            f"{name}={value!r}" for name, value in self.as_dict().items()
+        )
+        return f"Row({values})"
+
+
+@lru_cache(maxsize=256)
+def slots_row_type(columns: Tuple[str, ...]) -> type:
+    """Class of rows with the given columns, created once per set of columns
+
+    Args:
+        columns: names of columns, must be distinct identifiers (use aliases otherwise)
+    """
+    if len(set(columns)) != len(columns) or not all(c.isidentifier() for c in columns):
+        raise ValueError(f"Columns {columns} can not be attributes of row")
+    return type("Row", (SlotsRow,), {"__slots__": columns})
+
+
+def row_converter(row_type: str, columns: Sequence[str]) -> Callable[[tuple], Any]:
+    """Function converting a tuple of the cursor to a row of the given type
+
+    Args:
+        row_type: one of ROW_TYPES;
+        columns:  names of columns of the result.
+    """
+    if row_type == "tuple":
+        return tuple
+    if row_type == "dict":
+        columns = tuple(columns)
+        return lambda values: dict(zip(columns, values))
+    if row_type == "slots":
+        row_class = slots_row_type(tuple(columns))
+        return lambda values: row_class(*values)
+    raise ValueError(f"Unknown row type {row_type}, expected one of {ROW_TYPES}")
+
+
+def convert_rows(cur: cursor, row_type: str) -> Iterator[Any]:
+    """Rows of the executed cursor, converted one by one while iterating"""
+    if cur.description is None:
+        return iter(())
+    convert = row_converter(row_type, [column.name for column in cur.description])
+    return map(convert, cur)
+
+
+def stream_rows(
+    conn: connection,
+    query: str,
+    params: Optional[Iterable] = (),
+    itersize: int = 2000,
+    row_type: str = "tuple",
+) -> Iterator[Any]:
+    """Rows of a query read lazily through a named server-side cursor
+
+    Only itersize rows are kept in memory at once, on the server too: the cursor
+    is not declared WITH HOLD, which would make the server build the whole result
+    at commit. Under autocommit the query runs in its own transaction, ended when
+    the iteration is finished or closed, so the connection must not run other
+    queries until then.
+
+    Args:
+        conn:     connection to Postgres;
+        query:    SELECT query;
+        params:   values for %s placeholders of the query, None to keep % of the query as is;
+        itersize: number of rows fetched per round trip;
+        row_type: one of ROW_TYPES.
+    """
+    own_transaction = conn.autocommit
+    if own_transaction:
+        conn.autocommit = False
+    cur = conn.cursor(name=f"stream_{next(_cursor_names)}")
+    try:
+        logging.debug(query)
+        cur.execute(query, None if params is None else tuple(params))
+        convert = None
+        while rows := cur.fetchmany(itersize):
+            # The description of named cursor is known after the first fetch
+            if convert is None:
+                columns = [column.name for column in cur.description]
+                convert = row_converter(row_type, columns)
+            yield from map(convert, rows)
+            # The last page is shorter, one more FETCH would only confirm the end
+            if len(rows) < itersize:
+                break
+    finally:
+        cur.close()
+        if own_transaction:
+            # Nothing to commit, the query only reads
+            conn.rollback()
+            conn.autocommit = True
@@ -0,0 +1,364 @@
+import logging
+import os
+import re
+import socket
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+from pathlib import Path
+from typing import Callable, Mapping, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests import Response
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import NewConnectionError
+
+from configs import (
+    HTTP_POOL_SIZE,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_READ_TIMEOUT,
+    HTTP_CASSETTE_MODE,
+    HTTP_CASSETTE_PATH,
+)
+from framework.clients.cassette import CassetteAdapter
+from framework.clients.latency_histogram import latency_recorder, take_start_lag
+
+
+class TransportStats:
+    def __init__(self):
+        """Counters of the HTTP transport of the current process"""
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.connections = 0
+            self.handshake_time = 0.0
+            self.requests = 0
+            self.request_time = 0.0
+
+    def record_handshake(self, seconds: float) -> None:
+        """Registering a new connection (TCP + TLS handshake)
+
+        Args:
+            seconds: time spent on establishing the connection
+        """
+        with self._lock:
+            self.connections += 1
+            self.handshake_time += seconds
+
+    def record_request(self, seconds: float) -> None:
+        """Registering a finished request
+
+        Args:
+            seconds: wall time of the request including a possible handshake
+        """
+        with self._lock:
+            self.requests += 1
+            self.request_time += seconds
+
+    def merge(self, other: dict) -> None:
+        """Adding counters of other process (e.g. pytest-xdist worker)
+
+        Args:
+            other: counters in the form of TransportStats.as_dict()
+        """
+        with self._lock:
+            self.connections += other["connections"]
+            self.handshake_time += other["handshake_time"]
+            self.requests += other["requests"]
+            self.request_time += other["request_time"]
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "connections": self.connections,
+                "handshake_time": self.handshake_time,
+                "requests": self.requests,
+                "request_time": self.request_time,
+            }
+
+    def summary(self) -> str:
+        """Human-readable report of handshake versus request time"""
+        stats = self.as_dict()
+        reused = max(stats["requests"] - stats["connections"], 0)
+        return (
+            f"{stats['requests']} requests over {stats['connections']} connections "
+            f"({reused} reused); handshake {stats['handshake_time']:.3f}s, "
+            f"request {stats['request_time']:.3f}s "
+            f"(without handshake {stats['request_time'] - stats['handshake_time']:.3f}s)"
+        )
+
+
+transport_stats = TransportStats()
+
+# Called after every request with method, URL, status code (None if no response) and latency in seconds,
+# which includes the delay of start of the request planned within latency_histogram.expected_interval()
+ResponseListener = Callable[[str, str, Optional[int], float], None]
+
+_UUID = re.compile(
+    r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}", re.IGNORECASE
+)
+
+
+def endpoint_name(method: str, url: str) -> str:
+    """Name of the endpoint of request for statistics, e.g. "GET /api/v1/products/{id}"
+
+    The host, prefix of the backend and query are dropped, ids in the path are replaced with {id}.
+
+    Args:
+        method: HTTP method;
+        url:    URL of request.
+    """
+    path = urlsplit(url).path
+    api = path.find("/api/")
+    return f"{method} {_UUID.sub('{id}', path[api:] if api >= 0 else path)}"
+
+
+def auth_headers(headers: Mapping[str, str], token: str) -> dict:
+    """Composing headers of a single request with the bearer token
+
+    The base headers are shared by all calls of an endpoint instance, so they
+    are copied instead of being modified.
+
+    Args:
+        headers: base headers of the endpoint class;
+        token:   JWT token for authorization of request.
+    """
+    return {**headers, "Authorization": f"Bearer {token}"}
+
+
+class RequestTimings:
+    __slots__ = (
+        "dns",
+        "connect",
+        "tls",
+        "ttfb",
+        "total",
+        "request_size",
+        "response_size",
+    )
+
+    def __init__(self):
+        """Timings (seconds) and sizes of body (bytes) of one request
+
+        dns, connect and tls are 0 if the request reused a kept-alive connection,
+        ttfb is the time from sending the request to receiving the headers of response.
+        """
+        self.dns = 0.0
+        self.connect = 0.0
+        self.tls = 0.0
+        self.ttfb = 0.0
+        self.total = 0.0
+        self.request_size = 0
+        self.response_size = 0
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+# Timings of the request in progress in the current thread
+_timings = threading.local()
+
+
+def _current_timings() -> RequestTimings:
+    timings = getattr(_timings, "current", None)
+    # Connections may be used directly by urllib3, e.g. for retries
+    return timings if timings is not None else RequestTimings()
+
+
+class _TimedConnectionMixin:
+    def _new_conn(self):
+        """Resolving the host separately to measure DNS and TCP connect"""
+        timings = _current_timings()
+        start = time.perf_counter()
+        try:
+            address = socket.getaddrinfo(
+                self._dns_host, self.port, 0, socket.SOCK_STREAM
+            )
+        except OSError:
+            # urllib3 reports the error of resolution
+            return super()._new_conn()
+        resolved = time.perf_counter()
+        timings.dns += resolved - start
+
+        dns_host, self._dns_host = self._dns_host, address[0][4][0]
+        try:
+            sock = super()._new_conn()
+        except NewConnectionError:
+            # Other addresses of the host are tried by urllib3, e.g. IPv4 after refused IPv6
+            self._dns_host = dns_host
+            sock = super()._new_conn()
+        finally:
+            self._dns_host = dns_host
+        timings.connect += time.perf_counter() - resolved
+        return sock
+
+    def connect(self) -> None:
+        timings = _current_timings()
+        start = time.perf_counter()
+        before = timings.dns + timings.connect
+        super().connect()
+        elapsed = time.perf_counter() - start
+        transport_stats.record_handshake(elapsed)
+        # The rest of connect after the TCP connection is TLS handshake (or proxy tunnel)
+        timings.tls += max(elapsed - (timings.dns + timings.connect - before), 0.0)
+
+    def request(self, *args, **kwargs) -> None:
+        self._request_start = time.perf_counter()
+        super().request(*args, **kwargs)
+
+    def getresponse(self, *args, **kwargs):
+        response = super().getresponse(*args, **kwargs)
+        _current_timings().ttfb = time.perf_counter() - self._request_start
+        return response
+
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _TimedHTTPAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+class HttpClient:
+    def __init__(
+        self,
+        pool_size: int = HTTP_POOL_SIZE,
+        connect_timeout: float = HTTP_CONNECT_TIMEOUT,
+        read_timeout: float = HTTP_READ_TIMEOUT,
+        cassette_mode: str = HTTP_CASSETTE_MODE,
+        cassette_path: str = HTTP_CASSETTE_PATH,
+    ):
+        """Initializing the keep-alive session with the connection pool
+
+        Args:
+            pool_size:       maximum number of kept-alive connections per host;
+            connect_timeout: default timeout for establishing a connection, seconds;
+            read_timeout:    default timeout for reading a response, seconds;
+            cassette_mode:   "off", "record" or "replay" of responses, see CassetteAdapter;
+            cassette_path:   path to the cassette file.
+        """
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        # The session is shared by all users of the tests, so cookies must not leak between them
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = _TimedHTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        if cassette_mode != "off":
+            adapter = CassetteAdapter(cassette_mode, Path(cassette_path), adapter)
+            logging.info(f"HTTP cassette {cassette_path} in {cassette_mode} mode")
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # Replaced instead of being modified, so the requests in progress iterate over a stable tuple
+        self.listeners: Tuple[ResponseListener, ...] = ()
+        logging.info(f"HTTP session with pool size {pool_size} created")
+
+    def add_listener(self, listener: ResponseListener) -> None:
+        """Subscribing to the finished requests, e.g. for statistics of load
+
+        Listeners are called in the thread of request, so they must be thread-safe.
+
+        Args:
+            listener: function of method, URL, status code (None if no response) and seconds
+        """
+        self.listeners = (*self.listeners, listener)
+
+    def remove_listener(self, listener: ResponseListener) -> None:
+        self.listeners = tuple(l for l in self.listeners if l is not listener)
+
+    def close(self) -> None:
+        self.session.close()
+        logging.info("HTTP session closed")
+
+    def request(self, method: str, url: str, **kwargs) -> Response:
+        """Sending a request through the pooled session
+
+        Timings and sizes of the request are available as response.timings, see RequestTimings.
+
+        Args:
+            method: HTTP method;
+            url:    URL of request;
+            kwargs: other arguments of requests.request, the default timeout is used if not passed.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        status = None
+        timings = _timings.current = RequestTimings()
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method=method, url=url, **kwargs)
+            status = response.status_code
+            timings.total = time.perf_counter() - start
+            body = response.request.body
+            if isinstance(body, str):
+                body = body.encode()
+            timings.request_size = len(body) if isinstance(body, bytes) else 0
+            if not kwargs.get("stream"):
+                timings.response_size = len(response.content)
+            response.timings = timings
+            return response
+        finally:
+            _timings.current = None
+            elapsed = time.perf_counter() - start
+            transport_stats.record_request(elapsed)
+            # The waiting of a request planned at a fixed rate is a part of its latency
+            latency = elapsed + take_start_lag()
+            latency_recorder.record(endpoint_name(method, url), status, latency)
+            for listener in self.listeners:
+                listener(method, url, status, latency)
+
+    def get(self, url: str, **kwargs) -> Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> Response:
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url: str, **kwargs) -> Response:
+        return self.request("PUT", url, **kwargs)
+
+    def patch(self, url: str, **kwargs) -> Response:
+        return self.request("PATCH", url, **kwargs)
+
+    def delete(self, url: str, **kwargs) -> Response:
+        return self.request("DELETE", url, **kwargs)
+
+
+_client: Optional[HttpClient] = None
+_client_pid: Optional[int] = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """Getting the HTTP client of the current process
+
+    The client is created on the first call and recreated after fork,
+    because pooled sockets can not be shared between processes.
+    """
+    global _client, _client_pid
+
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            _client = HttpClient()
+            _client_pid = os.getpid()
+
+        return _client
@@ -0,0 +1,280 @@
+import math
+import threading
+import weakref
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Values below 2**SUB_BUCKET_BITS (256 µs) are kept exactly, every higher power of two is split into
+# 2**(SUB_BUCKET_BITS - 1) = 128 sub-buckets, so values are kept with relative error below 1/128 (0.8%)
+SUB_BUCKET_BITS = 8
+# Values are kept in microseconds up to an hour, larger ones are counted as an hour
+MAX_VALUE = 3_600_000_000
+
+_context = threading.local()
+
+
+@contextmanager
+def expected_interval(seconds: float, start_lag: float = 0.0) -> Iterator[None]:
+    """Correcting the latencies recorded by the current thread for coordinated omission
+
+    When requests are meant to be sent at a fixed rate, a slow response delays
+    the requests planned during it, and their waiting is not measured. Within the
+    context such requests are added to the histograms as if they were sent in time,
+    see LatencyHistogram.record, and the first request includes the delay of its
+    start after the planned time, see take_start_lag.
+
+    Args:
+        seconds:   planned interval between requests of the thread;
+        start_lag: delay of the start after the planned time, seconds.
+    """
+    previous = getattr(_context, "interval", 0.0)
+    _context.interval = seconds
+    _context.start_lag = start_lag
+    try:
+        yield
+    finally:
+        _context.interval = previous
+        _context.start_lag = 0.0
+
+
+def take_start_lag() -> float:
+    """Delay of the start of the current thread's planned work, returned once per expected_interval()"""
+    start_lag = getattr(_context, "start_lag", 0.0)
+    _context.start_lag = 0.0
+    return start_lag
+
+
+def _index(value: int) -> int:
+    bucket = max(value.bit_length() - SUB_BUCKET_BITS, 0)
+    return (bucket << (SUB_BUCKET_BITS - 1)) + (value >> bucket)
+
+
+def _highest_value(index: int) -> int:
+    """Largest value counted in the sub-bucket"""
+    bucket = max((index >> (SUB_BUCKET_BITS - 1)) - 1, 0)
+    sub_bucket = index - (bucket << (SUB_BUCKET_BITS - 1))
+    return ((sub_bucket + 1) << bucket) - 1
+
+
+class LatencyHistogram:
+    def __init__(self):
+        """Histogram of latencies with log-linear buckets (HdrHistogram layout)
+
+        Memory is fixed (about 3.3k counters) regardless of the number of values,
+        histograms of threads and processes are combined with merge().
+        """
+        self.counts = [0] * (_index(MAX_VALUE) + 1)
+        # Values in the counts, including the ones added by correction for coordinated omission
+        self.count = 0
+        # Measured values only
+        self.measured = 0
+        self.total = 0
+        self.min = MAX_VALUE
+        self.max = 0
+
+    def record_value(self, microseconds: int, count: int = 1) -> None:
+        value = min(max(microseconds, 0), MAX_VALUE)
+        self.counts[_index(value)] += count
+        self.count += count
+        self.total += value * count
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def record(self, seconds: float, interval: float = 0.0) -> None:
+        """Recording a latency, corrected for coordinated omission if interval is given
+
+        Requests which should have been sent every interval during a slow response
+        are added with latencies (seconds - interval), (seconds - 2 * interval), ...
+
+        Args:
+            seconds:  measured latency;
+            interval: planned interval between requests, seconds, 0 for no correction.
+        """
+        value = round(seconds * 1_000_000)
+        self.record_value(value)
+        self.measured += 1
+        step = round(interval * 1_000_000)
+        if step <= 0:
+            return
+        missed = value - step
+        while missed >= step:
+            self.record_value(missed)
+            missed -= step
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.count += other.count
+        self.measured += other.measured
+        self.total += other.total
+        if other.count:
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+
+    def percentile(self, q: float) -> float:
+        """Latency not exceeded by q percent of values, seconds
+
+        Args:
+            q: percentile, 0..100
+        """
+        if not self.count:
+            return 0.0
+        rank = max(math.ceil(q * self.count / 100), 1)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(_highest_value(index), self.max) / 1_000_000
+        return self.max / 1_000_000
+
+    def mean(self) -> float:
+        return self.total / self.count / 1_000_000 if self.count else 0.0
+
+    def as_dict(self) -> dict:
+        """Sparse form for passing between processes"""
+        return {
+            "counts": {i: n for i, n in enumerate(self.counts) if n},
+            "count": self.count,
+            "measured": self.measured,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LatencyHistogram":
+        histogram = cls()
+        for index, count in data["counts"].items():
+            histogram.counts[int(index)] = count
+        histogram.count = data["count"]
+        histogram.measured = data["measured"]
+        histogram.total = data["total"]
+        histogram.min = data["min"]
+        histogram.max = data["max"]
+        return histogram
+
+
+Key = Tuple[str, Optional[int]]
+
+
+class _ThreadHistograms:
+    __slots__ = ("histograms", "__weakref__")
+
+    def __init__(self):
+        """Histograms of one thread, kept in threading.local and dropped when the thread ends"""
+        self.histograms: Dict[Key, LatencyHistogram] = {}
+
+
+class LatencyRecorder:
+    def __init__(self):
+        """Latency histograms per endpoint and status code
+
+        Every thread records into its own histograms without locking,
+        they are merged when the statistics are read. The histograms of
+        a finished thread are merged right away, so memory depends on the
+        number of running threads, not on all threads ever started.
+        """
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            # Dropped after the lock is released, it finalizes the histograms of the threads
+            previous = getattr(self, "_local", None)
+            self._local = threading.local()
+            self._threads: Dict[int, Dict[Key, LatencyHistogram]] = {}
+            self._merged: Dict[Key, LatencyHistogram] = {}
+        del previous
+
+    def _histograms(self) -> Dict[Key, LatencyHistogram]:
+        thread_histograms = getattr(self._local, "histograms", None)
+        if thread_histograms is None:
+            thread_histograms = self._local.histograms = _ThreadHistograms()
+            histograms = thread_histograms.histograms
+            with self._lock:
+                self._threads[id(histograms)] = histograms
+            finalizer = weakref.finalize(thread_histograms, self._retire, histograms)
+            finalizer.atexit = False
+        return thread_histograms.histograms
+
+    def _retire(self, histograms: Dict[Key, LatencyHistogram]) -> None:
+        """Merging the histograms of a finished thread, ignored if they were reset"""
+        with self._lock:
+            if self._threads.pop(id(histograms), None) is not histograms:
+                return
+            for key, histogram in histograms.items():
+                self._merged.setdefault(key, LatencyHistogram()).merge(histogram)
+
+    def record(self, endpoint: str, status: Optional[int], seconds: float) -> None:
+        """Recording a request, corrected within expected_interval() of the thread
+
+        Args:
+            endpoint: name of endpoint, see http_client.endpoint_name;
+            status:   status code, None if there was no response;
+            seconds:  latency of request.
+        """
+        histograms = self._histograms()
+        key = (endpoint, status)
+        histogram = histograms.get(key)
+        if histogram is None:
+            # The dictionary is copied by histograms() of other threads under the lock
+            histogram = LatencyHistogram()
+            with self._lock:
+                histograms[key] = histogram
+        histogram.record(seconds, getattr(_context, "interval", 0.0))
+
+    def histograms(self) -> Dict[Key, LatencyHistogram]:
+        """Merged histograms of all threads and processes"""
+        merged = {}
+        with self._lock:
+            sources = [dict(h) for h in self._threads.values()] + [dict(self._merged)]
+        for source in sources:
+            for key, histogram in source.items():
+                merged.setdefault(key, LatencyHistogram()).merge(histogram)
+        return merged
+
+    def by_endpoint(self) -> Dict[str, LatencyHistogram]:
+        """Merged histograms of all status codes of every endpoint"""
+        endpoints = {}
+        for (endpoint, _), histogram in self.histograms().items():
+            endpoints.setdefault(endpoint, LatencyHistogram()).merge(histogram)
+        return endpoints
+
+    def merge(self, other: List[dict]) -> None:
+        """Adding histograms of other process (e.g. pytest-xdist worker)
+
+        Args:
+            other: histograms in the form of LatencyRecorder.as_dict()
+        """
+        with self._lock:
+            for item in other:
+                key = (item["endpoint"], item["status"])
+                histogram = LatencyHistogram.from_dict(item["histogram"])
+                self._merged.setdefault(key, LatencyHistogram()).merge(histogram)
+
+    def as_dict(self) -> List[dict]:
+        return [
+            {"endpoint": endpoint, "status": status, "histogram": histogram.as_dict()}
+            for (endpoint, status), histogram in self.histograms().items()
+        ]
+
+    def summary(self) -> str:
+        """Human-readable latency percentiles per endpoint and status code"""
+        lines = [
+            f"{'endpoint':<48}{'status':>7}{'count':>8}{'p50':>8}{'p90':>8}"
+            f"{'p99':>8}{'p99.9':>8}{'max':>8}  (ms)"
+        ]
+        histograms = self.histograms()
+        for endpoint, status in sorted(histograms, key=lambda k: (k[0], k[1] or 0)):
+            histogram = histograms[(endpoint, status)]
+            values = [histogram.percentile(q) for q in (50, 90, 99, 99.9)]
+            values.append(histogram.max / 1_000_000)
+            lines.append(
+                f"{endpoint:<48}{status or 'error':>7}{histogram.measured:>8}"
+                + "".join(f"{value * 1000:>8.1f}" for value in values)
+            )
+        return "\n".join(lines)
+
+
+latency_recorder = LatencyRecorder()
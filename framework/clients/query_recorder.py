@@ -0,0 +1,225 @@
+import json
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional
+
+from psycopg2 import Error
+from psycopg2.extensions import connection
+
+from configs import DB_EXPLAIN_SLOW_QUERIES, DB_SLOW_QUERY_THRESHOLD
+
+# Called with the query, its duration in seconds and its plan (None if not explained)
+SlowQueryListener = Callable[[str, float, Optional[str]], None]
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?\b")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_REPEATED = re.compile(r"(\([^()]*\))(?:\s*,\s*\1)+")
+_SPACES = re.compile(r"\s+")
+_DATA_MODIFYING = re.compile(r"\b(insert|update|delete|merge)\b", re.IGNORECASE)
+
+
+def normalize_query(query: str) -> str:
+    """Shape of query: literals replaced by ?, lists of values and repeated rows collapsed
+
+    Args:
+        query: query as sent to Postgres, e.g. with interpolated parameters
+    """
+    shape = _STRING.sub("?", query)
+    shape = _NUMBER.sub("?", shape)
+    shape = _LIST.sub("(?, ...)", shape)
+    shape = _REPEATED.sub(r"\1, ...", shape)
+    return _SPACES.sub(" ", shape).strip().rstrip(";")
+
+
+def is_select(query: str) -> bool:
+    """The query only reads data, so EXPLAIN ANALYZE can run it once more"""
+    words = query.lstrip(" \n\t(").split(None, 1)
+    if not words:
+        return False
+    first = words[0].lower()
+    return first == "select" or (first == "with" and not _DATA_MODIFYING.search(query))
+
+
+def explain_analyze(conn: connection, query: str, params=None) -> str:
+    """Plan of the query with actual times and buffers, the error if it could not be explained
+
+    Inside a transaction the query is explained under a savepoint, so an error
+    does not abort the transaction of the test.
+
+    Args:
+        conn:   connection the query was executed on;
+        query:  the query;
+        params: values for %s placeholders of the query.
+    """
+    in_transaction = not conn.autocommit
+    with conn.cursor() as cursor:
+        if in_transaction:
+            cursor.execute("SAVEPOINT explain_slow_query")
+        try:
+            cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {query}", params)
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+        except Error as error:
+            if in_transaction:
+                cursor.execute("ROLLBACK TO SAVEPOINT explain_slow_query")
+            return f"EXPLAIN failed: {error}"
+        if in_transaction:
+            cursor.execute("RELEASE SAVEPOINT explain_slow_query")
+        return plan
+
+
+class QueryRecorder:
+    def __init__(self):
+        """Time of queries to Postgres per test and per query shape"""
+        self._lock = threading.Lock()
+        self._listeners = ()
+        self.tests: Dict[str, dict] = {}
+        self.shapes: Dict[str, dict] = {}
+        self.current: Optional[str] = None
+
+    def add_listener(self, listener: SlowQueryListener) -> None:
+        """Calling the listener for every query of a test slower than DB_SLOW_QUERY_THRESHOLD"""
+        self._listeners = self._listeners + (listener,)
+
+    @contextmanager
+    def timed(
+        self, query: str, explain: Optional[Callable[[], str]] = None
+    ) -> Iterator[None]:
+        """Recording the time of the query executed within the context
+
+        Args:
+            query:   query or prepared statement;
+            explain: function returning the plan of the query, called for slow
+                     SELECT queries if DB_EXPLAIN_SLOW_QUERIES.
+        """
+        start = time.perf_counter()
+        yield
+        seconds = time.perf_counter() - start
+        self.record(query, seconds)
+        if seconds < DB_SLOW_QUERY_THRESHOLD:
+            return
+        logging.warning(f"Slow query {seconds * 1000:.1f} ms: {query}")
+        if self.current is None:
+            return
+        plan = None
+        if DB_EXPLAIN_SLOW_QUERIES and explain and is_select(query):
+            plan = explain()
+        for listener in self._listeners:
+            listener(query, seconds, plan)
+
+    def record(self, query: str, seconds: float) -> None:
+        shape = normalize_query(query)
+        slow = seconds >= DB_SLOW_QUERY_THRESHOLD
+        with self._lock:
+            stats = self.shapes.setdefault(
+                shape, {"calls": 0, "slow": 0, "time": 0.0, "max_time": 0.0}
+            )
+            stats["calls"] += 1
+            stats["slow"] += slow
+            stats["time"] += seconds
+            stats["max_time"] = max(stats["max_time"], seconds)
+            if self.current is None:
+                return
+            test = self.tests.setdefault(
+                self.current,
+                {
+                    "queries": 0,
+                    "db_time": 0.0,
+                    "slow_queries": 0,
+                    "slowest_query": None,
+                    "slowest_query_time": 0.0,
+                },
+            )
+            test["queries"] += 1
+            test["db_time"] += seconds
+            test["slow_queries"] += slow
+            if seconds > test["slowest_query_time"]:
+                test["slowest_query"] = shape
+                test["slowest_query_time"] = seconds
+
+    def merge(self, other: dict) -> None:
+        """Adding queries of other process (e.g. pytest-xdist worker)
+
+        Args:
+            other: queries in the form of QueryRecorder.as_dict()
+        """
+        with self._lock:
+            for shape, stats in other["shapes"].items():
+                own = self.shapes.setdefault(
+                    shape, {"calls": 0, "slow": 0, "time": 0.0, "max_time": 0.0}
+                )
+                own["calls"] += stats["calls"]
+                own["slow"] += stats["slow"]
+                own["time"] += stats["time"]
+                own["max_time"] = max(own["max_time"], stats["max_time"])
+            # Every test is run by one process
+            self.tests.update(other["tests"])
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "shapes": {shape: dict(s) for shape, s in self.shapes.items()},
+                "tests": {nodeid: dict(t) for nodeid, t in self.tests.items()},
+            }
+
+    def summary(self, top: int = 20) -> dict:
+        """Query shapes ranked by total time and tests ranked by time in queries
+
+        Args:
+            top: number of shapes and tests in summary
+        """
+        data = self.as_dict()
+        shapes = [
+            {
+                "query": shape,
+                "calls": stats["calls"],
+                "slow": stats["slow"],
+                "total_ms": round(stats["time"] * 1000, 1),
+                "mean_ms": round(stats["time"] / stats["calls"] * 1000, 2),
+                "max_ms": round(stats["max_time"] * 1000, 1),
+            }
+            for shape, stats in data["shapes"].items()
+        ]
+        shapes.sort(key=lambda s: s["total_ms"], reverse=True)
+        tests = [
+            {
+                "test": nodeid,
+                "queries": test["queries"],
+                "db_time_s": round(test["db_time"], 3),
+                "slow_queries": test["slow_queries"],
+                "slowest_query": test["slowest_query"],
+                "slowest_query_ms": round(test["slowest_query_time"] * 1000, 1),
+            }
+            for nodeid, test in data["tests"].items()
+        ]
+        tests.sort(key=lambda t: t["db_time_s"], reverse=True)
+        return {
+            "slow_query_threshold_ms": DB_SLOW_QUERY_THRESHOLD * 1000,
+            "query_shapes": shapes[:top],
+            "slowest_tests": tests[:top],
+        }
+
+    def write_summary(self, path: str, top: int = 20) -> Path:
+        """Writing summary() to JSON file"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.summary(top), indent=2))
+        return path
+
+    def totals(self) -> str:
+        """One line of the number and time of queries of the run"""
+        with self._lock:
+            calls = sum(s["calls"] for s in self.shapes.values())
+            seconds = sum(s["time"] for s in self.shapes.values())
+            slow = sum(s["slow"] for s in self.shapes.values())
+        return (
+            f"{calls} queries in {seconds:.3f}s, {slow} slower than "
+            f"{DB_SLOW_QUERY_THRESHOLD * 1000:.0f} ms"
+        )
+
+
+query_recorder = QueryRecorder()
@@ -0,0 +1,454 @@
+import json
+import os
+from types import MappingProxyType
+
+import requests
+from requests import Response
+
+from configs import HOST
+from framework.asserts.common import assert_status_code
+from framework.clients.async_http_client import get_async_http_client
+from framework.clients.http_client import auth_headers
+from framework.tools.logging_allure import log_request
+
+# Only the requests are sent by the worker threads of the async HTTP client.
+# Status codes are checked and requests are logged on the event loop thread,
+# which runs the test, so the Allure steps land in the running test: worker
+# threads keep the Allure context of the test which started them.
+
+
+class AsyncAuthenticateAPI:
+    """Asyncio mirror of AuthenticateAPI, methods have the same arguments and checks"""
+
+    def __init__(self):
+        """Initializing parameters for request"""
+        self.url = HOST + "/api/v1/auth"
+        self.headers = MappingProxyType({"Content-Type": "application/json"})
+        self.client = get_async_http_client()
+
+    async def authentication(
+        self, email: str, password: str, expected_status_code: int = 200
+    ) -> Response:
+        """Endpoint for authentication of user"""
+        data = {
+            "email": email,
+            "password": password,
+        }
+        path = self.url + "/authenticate"
+        response = await self.client.post(
+            url=path, data=json.dumps(data), headers=self.headers
+        )
+        assert_status_code(response, expected_status_code=expected_status_code)
+        log_request(response)
+
+        return response
+
+    async def logout(self, token: str) -> Response:
+        """User logout"""
+        headers = auth_headers(self.headers, token)
+        path = self.url + "/logout"
+        response = await self.client.post(url=path, headers=headers)
+        log_request(response)
+
+        return response
+
+    async def registration(self, body: dict, expected_status_code=200) -> Response:
+        """Endpoint for registration of user"""
+        path = self.url + "/register"
+        response = await self.client.post(
+            url=path, data=json.dumps(body), headers=self.headers
+        )
+        assert_status_code(response, expected_status_code=expected_status_code)
+        log_request(response)
+
+        return response
+
+    async def confirmation_email(
+        self, code: str, expected_status_code: int = 201
+    ) -> Response:
+        """Endpoint for confirmation of email"""
+        data = {"token": code}
+        path = self.url + "/confirm"
+        response = await self.client.post(
+            url=path, data=json.dumps(data), headers=self.headers
+        )
+        assert_status_code(response, expected_status_code=expected_status_code)
+        log_request(response)
+
+        return response
+
+    async def refresh_token(
+        self, token: str, expected_status_code: int = 200
+    ) -> Response:
+        """Endpoint for refreshing of token"""
+        path = self.url + "/refresh"
+        headers = auth_headers(self.headers, token)
+        response = await self.client.post(url=path, headers=headers)
+        assert_status_code(response, expected_status_code=expected_status_code)
+        log_request(response)
+
+        return response
+
+    async def forgot_password(
+        self, email: str, expected_status_code: int = 200
+    ) -> Response:
+        """Endpoint for request of password reset"""
+        data = {"email": email}
+        path = self.url + "/password/forgot"
+        response = await self.client.post(
+            url=path, data=json.dumps(data), headers=self.headers
+        )
+        assert_status_code(response, expected_status_code=expected_status_code)
+        log_request(response)
+
+        return response
+
+    async def change_password_through_reset(
+        self,
+        email: str,
+        code_for_reset_password: str,
+        new_password: str,
+        expected_status_code: int = 200,
+    ) -> Response:
+        """Endpoint for change of password with code from email"""
+        data = {
+            "email": email,
+            "code": code_for_reset_password,
+            "password": new_password,
+        }
+        path = self.url + "/password/change"
+        response = await self.client.post(
+            url=path, data=json.dumps(data), headers=self.headers
+        )
+        assert_status_code(response, expected_status_code=expected_status_code)
+        log_request(response)
+
+        return response
+
+
+class AsyncCartAPI:
+    """Asyncio mirror of CartAPI, methods have the same arguments and checks"""
+
+    def __init__(self):
+        """Initializing parameters for request"""
+        self.url = HOST + "/api/v1/cart"
+        self.headers = MappingProxyType({"Content-Type": "application/json"})
+        self.client = get_async_http_client()
+
+    async def get_user_cart(
+        self, token: str, expected_status_code: int = 200
+    ) -> Response:
+        """Getting info about user's shopping cart"""
+        headers = auth_headers(self.headers, token)
+        response = await self.client.get(url=self.url, headers=headers)
+        assert_status_code(response, expected_status_code=expected_status_code)
+        log_request(response)
+
+        return response
+
+    async def update_quantity_product(
+        self,
+        token: str,
+        item_id: str,
+        item_quantity: int,
+        expected_status_code: int = 200,
+    ) -> Response:
+        """Updating product's quantity"""
+        body = {"shoppingCartItemId": item_id, "productQuantityChange": item_quantity}
+        headers = auth_headers(self.headers, token)
+        path = self.url + "/items"
+        response = await self.client.patch(
+            url=path, data=json.dumps(body), headers=headers
+        )
+        assert_status_code(response, expected_status_code=expected_status_code)
+        log_request(response)
+        return response
+
+    async def add_item_to_cart(
+        self, token: str, items: list[object], expected_status_code: int = 200
+    ) -> Response:
+        """Adding multiple products to cart"""
+        headers = auth_headers(self.headers, token)
+        path = self.url + "/items"
+        body = {"items": items}
+        response = await self.client.post(
+            url=path, data=json.dumps(body), headers=headers
+        )
+        assert_status_code(response, expected_status_code=expected_status_code)
+        log_request(response)
+        return response
+
+    async def delete_item_from_cart(
+        self, token: str, cart_item_id: list, expected_status_code: int = 200
+    ) -> Response:
+        """Deleting item from shopping cart"""
+        body = {"shoppingCartItemIds": cart_item_id}
+        headers = auth_headers(self.headers, token)
+        path = self.url + "/items"
+        response = await self.client.delete(
+            url=path, headers=headers, data=json.dumps(body)
+        )
+        assert_status_code(response, expected_status_code=expected_status_code)
+        log_request(response)
+
+        return response
+
+
+class AsyncFavoriteAPI:
+    """Asyncio mirror of FavoriteAPI, methods have the same arguments and checks"""
+
+    def __init__(self):
+        """Initializing parameters for request"""
+        self.url = HOST + "/api/v1/favorites"
+        self.headers = MappingProxyType({"Content-Type": "application/json"})
+        self.client = get_async_http_client()
+
+    async def add_favorites(
+        self, token: str, favorite_product: list[str], expected_status_code: int = 200
+    ) -> Response:
+        """Add product to favorites"""
+        data = {"productIds": favorite_product}
+        headers = auth_headers(self.headers, token)
+        response = await self.client.post(
+            url=self.url, data=json.dumps(data), headers=headers
+        )
+        assert_status_code(response, expected_status_code=expected_status_code)
+        log_request(response)
+
+        return response
+
+    async def get_favorites(
+        self, token: str, expected_status_code: int = 200
+    ) -> Response:
+        """Getting user's favorite products"""
+        headers = auth_headers(self.headers, token)
+        response = await self.client.get(url=self.url, headers=headers)
+        assert_status_code(response, expected_status_code=expected_status_code)
+        log_request(response)
+
+        return response
+
+    async def delete_favorites(
+        self, token: str, id_product: str, expected_status_code: int = 200
+    ) -> Response:
+        """Delete product from favorites"""
+        headers = auth_headers(self.headers, token)
+        path = f"{self.url}/{id_product}"
+        response = await self.client.delete(url=path, headers=headers)
+        assert_status_code(response, expected_status_code=expected_status_code)
+        log_request(response)
+
+        return response
+
+
+class AsyncProductAPI:
+    """Asyncio mirror of ProductAPI"""
+
+    def __init__(self):
+        self.url = HOST + "/api/v1/products"
+        self.headers = MappingProxyType({"Content-Type": "application/json"})
+        self.client = get_async_http_client()
+
+    async def get_by_id(self, _id: str, token: str = None) -> Response:
+        """Getting product info by id"""
+        headers = auth_headers(self.headers, token) if token else self.headers
+        url = self.url + f"/{_id}"
+        return await self.client.get(headers=headers, url=url)
+
+    async def get_all(self, token: str = None, params: dict = None) -> Response:
+        """Getting info about all products"""
+        headers = auth_headers(self.headers, token) if token else self.headers
+        return await self.client.get(headers=headers, url=self.url, params=params)
+
+
+class AsyncReviewAPI:
+    """Asyncio mirror of ReviewAPI, methods have the same arguments and checks"""
+
+    def __init__(self):
+        self.url = f"{HOST}/api/v1/products"
+        self.headers = MappingProxyType({"Content-Type": "application/json"})
+        self.client = get_async_http_client()
+
+    async def get_all_product_reviews(
+        self, product_id: str, expected_status_code: int = 200, timeout=10, **filters
+    ) -> Response:
+        """Getting all reviews of product"""
+        url = f"{self.url}/{product_id}/reviews"
+        try:
+            response = await self.client.get(
+                url, headers=self.headers, params=filters, timeout=timeout
+            )
+            assert_status_code(response, expected_status_code=expected_status_code)
+            log_request(response)
+        except requests.exceptions.Timeout:
+            print("The request timed out")
+            raise
+        except requests.exceptions.RequestException as e:
+            print(f"An error occurred: {e}")
+            raise
+
+        return response
+
+    async def delete_product_review(
+        self,
+        token: str,
+        product_id: str,
+        review_id: str,
+        expected_status_code: int = 200,
+    ) -> Response:
+        """Deleting review of product"""
+        headers = auth_headers(self.headers, token)
+        url = f"{self.url}/{product_id}/reviews/{review_id}"
+        response = await self.client.delete(headers=headers, url=url)
+        assert_status_code(response, expected_status_code=expected_status_code)
+        log_request(response)
+        return response
+
+    async def add_product_review(
+        self,
+        token: str,
+        product_id: str,
+        text_review: str,
+        rating: int,
+        expected_status_code: int = 200,
+    ) -> Response:
+        """Adding review to product"""
+        data = {"text": text_review, "rating": rating}
+        headers = auth_headers(self.headers, token)
+        url = f"{self.url}/{product_id}/reviews"
+        response = await self.client.post(
+            headers=headers, url=url, data=json.dumps(data)
+        )
+        assert_status_code(response, expected_status_code=expected_status_code)
+        log_request(response)
+        return response
+
+    async def get_user_product_review(
+        self, product_id: str, token: str, expected_status_code: int = 200
+    ) -> Response:
+        """Getting review of user for product"""
+        headers = auth_headers(self.headers, token)
+        url = f"{self.url}/{product_id}/review"
+        response = await self.client.get(headers=headers, url=url)
+        assert_status_code(response, expected_status_code=expected_status_code)
+        log_request(response)
+
+        return response
+
+    async def like_dislike_product_review(
+        self,
+        product_id: str,
+        token: str,
+        product_review_id: str,
+        expected_status_code: int = 200,
+        is_like: bool = True,
+    ) -> Response:
+        """Like or dislike review of product"""
+        headers = auth_headers(self.headers, token)
+        data = {"isLike": is_like}
+        url = f"{self.url}/{product_id}/reviews/{product_review_id}/rate"
+        response = await self.client.post(
+            headers=headers, data=json.dumps(data), url=url
+        )
+        assert_status_code(response, expected_status_code=expected_status_code)
+        log_request(response)
+
+        return response
+
+    async def get_product_review_statistics(self, product_id: str) -> Response:
+        """Getting product review statistics"""
+        url = f"{self.url}/{product_id}/reviews/statistics"
+        response = await self.client.get(url=url)
+        log_request(response)
+
+        return response
+
+
+class AsyncUsersAPI:
+    """Asyncio mirror of UsersAPI, methods have the same arguments and checks"""
+
+    def __init__(self):
+        self.url = HOST + "/api/v1/users"
+        self.headers = MappingProxyType({"Content-Type": "application/json"})
+        self.client = get_async_http_client()
+
+    async def get_user(
+        self, token: str = "", expected_status_code: int = 200
+    ) -> Response:
+        """Getting info about user"""
+        headers = auth_headers(self.headers, token)
+        response = await self.client.get(headers=headers, url=self.url)
+        assert_status_code(response, expected_status_code=expected_status_code)
+        log_request(response)
+
+        return response
+
+    async def delete_user(
+        self, token: str, expected_status_code: int = 200
+    ) -> Response:
+        """Deleting user"""
+        headers = auth_headers(self.headers, token)
+        response = await self.client.delete(headers=headers, url=self.url)
+        assert_status_code(response, expected_status_code=expected_status_code)
+        log_request(response)
+        return response
+
+    async def update_user(self, token: str = "", user_data: dict = None) -> Response:
+        """Updating user info"""
+        headers = auth_headers(self.headers, token)
+        response = await self.client.put(headers=headers, url=self.url, json=user_data)
+        log_request(response)
+
+        return response
+
+    async def change_password(
+        self,
+        token: str,
+        new_password: str,
+        old_password: str,
+        expected_status_code: int = 200,
+    ) -> Response:
+        """Change user password"""
+        data = {"newPassword": new_password, "oldPassword": old_password}
+        headers = auth_headers(self.headers, token)
+        response = await self.client.patch(
+            headers=headers, url=self.url, data=json.dumps(data)
+        )
+        assert_status_code(response, expected_status_code=expected_status_code)
+        log_request(response)
+
+        return response
+
+    async def get_user_avatar(
+        self, token: str = "", expected_status_code: int = 200
+    ) -> Response:
+        """Getting info about user's avatar"""
+        headers = auth_headers(self.headers, token)
+        path = f"{self.url}/avatar"
+        response = await self.client.get(headers=headers, url=path)
+        assert_status_code(response, expected_status_code=expected_status_code)
+        log_request(response)
+
+        return response
+
+    async def post_user_avatar(
+        self, token: str, image_path: str, expected_status_code: int = 200
+    ) -> Response:
+        """Posts a user's avatar image"""
+        headers = auth_headers(self.headers, token)
+        path = f"{self.url}/avatar"
+
+        # The file is read here, the worker thread gets only bytes
+        with open(image_path, "rb") as image_file:
+            files = {
+                "file": (
+                    os.path.basename(image_path),
+                    image_file.read(),
+                    "multipart/form-data",
+                )
+            }
+        response = await self.client.post(url=path, headers=headers, files=files)
+        assert_status_code(response, expected_status_code=expected_status_code)
+        log_request(response)
+
+        return response
@@ -1,11 +1,12 @@
 import json
 from typing import Optional
+from types import MappingProxyType
 
-import requests
 from requests import Response
 
 from configs import HOST
 from framework.asserts.common import assert_status_code, assert_content_type
+from framework.clients.http_client import auth_headers, get_http_client
 from framework.tools.logging_allure import log_request
 
 
@@ -13,7 +14,8 @@ class AuthenticateAPI:
     def __init__(self):
         """Initializing parameters for request"""
         self.url = HOST + "/api/v1/auth"
-        self.headers = {"Content-Type": "application/json"}
+        self.headers = MappingProxyType({"Content-Type": "application/json"})
+        self.client = get_http_client()
 
     def authentication(
         self, email: str, password: str, expected_status_code: int = 200
@@ -30,7 +32,9 @@ class AuthenticateAPI:
             "password": password,
         }
         path = self.url + "/authenticate"
-        response = requests.post(url=path, data=json.dumps(data), headers=self.headers)
+        response = self.client.post(
+            url=path, data=json.dumps(data), headers=self.headers
+        )
         assert_status_code(response, expected_status_code=expected_status_code)
         log_request(response)
 
@@ -42,10 +46,9 @@ class AuthenticateAPI:
         Args:
             token: JWT token for authorization of request
         """
-        headers = self.headers
-        headers["Authorization"] = f"Bearer {token}"
+        headers = auth_headers(self.headers, token)
         path = self.url + "/logout"
-        response = requests.post(url=path, headers=headers)
+        response = self.client.post(url=path, headers=headers)
         log_request(response)
 
         return response
@@ -62,7 +65,9 @@ class AuthenticateAPI:
                         password:   password for electronic mail.
         """
         path = self.url + "/register"
-        response = requests.post(url=path, data=json.dumps(body), headers=self.headers)
+        response = self.client.post(
+            url=path, data=json.dumps(body), headers=self.headers
+        )
         assert_status_code(response, expected_status_code=expected_status_code)
         log_request(response)
 
@@ -79,7 +84,9 @@ class AuthenticateAPI:
         """
         data = {"token": code}
         path = self.url + "/confirm"
-        response = requests.post(url=path, data=json.dumps(data), headers=self.headers)
+        response = self.client.post(
+            url=path, data=json.dumps(data), headers=self.headers
+        )
         assert_status_code(response, expected_status_code=expected_status_code)
         log_request(response)
 
@@ -94,9 +101,8 @@ class AuthenticateAPI:
         """
 
         path = self.url + "/refresh"
-        headers = self.headers
-        headers["Authorization"] = f"Bearer {token}"
-        response = requests.post(url=path, headers=self.headers)
+        headers = auth_headers(self.headers, token)
+        response = self.client.post(url=path, headers=headers)
         assert_status_code(response, expected_status_code=expected_status_code)
         log_request(response)
 
@@ -111,7 +117,9 @@ class AuthenticateAPI:
         """
         data = {"email": email}
         path = self.url + "/password/forgot"
-        response = requests.post(url=path, data=json.dumps(data), headers=self.headers)
+        response = self.client.post(
+            url=path, data=json.dumps(data), headers=self.headers
+        )
         assert_status_code(response, expected_status_code=expected_status_code)
         log_request(response)
 
@@ -138,7 +146,9 @@ class AuthenticateAPI:
             "password": new_password,
         }
         path = self.url + "/password/change"
-        response = requests.post(url=path, data=json.dumps(data), headers=self.headers)
+        response = self.client.post(
+            url=path, data=json.dumps(data), headers=self.headers
+        )
         assert_status_code(response, expected_status_code=expected_status_code)
         log_request(response)
 
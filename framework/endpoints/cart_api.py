@@ -1,10 +1,12 @@
 import json
+from types import MappingProxyType
+
 from hamcrest import assert_that, is_
-import requests
 from requests import Response
 
 from configs import HOST
 from framework.asserts.common import assert_status_code
+from framework.clients.http_client import auth_headers, get_http_client
 
 from framework.tools.logging_allure import log_request
 
@@ -13,7 +15,8 @@ class CartAPI:
     def __init__(self):
         """Initializing parameters for request"""
         self.url = HOST + "/api/v1/cart"
-        self.headers = {"Content-Type": "application/json"}
+        self.headers = MappingProxyType({"Content-Type": "application/json"})
+        self.client = get_http_client()
 
     def get_user_cart(self, token: str, expected_status_code: int = 200) -> Response:
         """Getting info about user's shopping cart
@@ -22,10 +25,9 @@ class CartAPI:
             expected_status_code: expected http status code from response
             token: JWT token for authorization of request
         """
-        headers = self.headers
-        headers["Authorization"] = f"Bearer {token}"
+        headers = auth_headers(self.headers, token)
         path = self.url
-        response = requests.get(url=path, headers=headers)
+        response = self.client.get(url=path, headers=headers)
         assert_status_code(response, expected_status_code=expected_status_code)
         log_request(response)
 
@@ -47,10 +49,9 @@ class CartAPI:
             token: JWT token for authorization of request
         """
         body = {"shoppingCartItemId": item_id, "productQuantityChange": item_quantity}
-        headers = self.headers
-        headers["Authorization"] = f"Bearer {token}"
+        headers = auth_headers(self.headers, token)
         path = self.url + "/items"
-        response = requests.patch(url=path, data=json.dumps(body), headers=headers)
+        response = self.client.patch(url=path, data=json.dumps(body), headers=headers)
         assert_status_code(response, expected_status_code=expected_status_code)
         log_request(response)
         return response
@@ -71,11 +72,10 @@ class CartAPI:
                 {"productId": "6788gg-uh8-hajj6", "productQuantity": 3}
             ]
         """
-        headers = self.headers
-        headers["Authorization"] = f"Bearer {token}"
+        headers = auth_headers(self.headers, token)
         path = self.url + "/items"
         body = {"items": items}
-        response = requests.post(url=path, data=json.dumps(body), headers=headers)
+        response = self.client.post(url=path, data=json.dumps(body), headers=headers)
         assert_status_code(response, expected_status_code=expected_status_code)
         log_request(response)
         return response
@@ -92,10 +92,9 @@ class CartAPI:
         """
 
         body = {"shoppingCartItemIds": cart_item_id}
-        headers = self.headers
-        headers["Authorization"] = f"Bearer {token}"
+        headers = auth_headers(self.headers, token)
         path = self.url + "/items"
-        response = requests.delete(url=path, headers=headers, data=json.dumps(body))
+        response = self.client.delete(url=path, headers=headers, data=json.dumps(body))
         assert_status_code(response, expected_status_code=expected_status_code)
         log_request(response)
 
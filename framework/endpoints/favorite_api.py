@@ -1,11 +1,12 @@
 import json
 from typing import Optional, Union
+from types import MappingProxyType
 
-import requests
 from requests import Response
 
 from configs import HOST
 from framework.asserts.common import assert_status_code, assert_content_type
+from framework.clients.http_client import auth_headers, get_http_client
 from framework.tools.logging_allure import log_request
 
 
@@ -13,7 +14,8 @@ class FavoriteAPI:
     def __init__(self):
         """Initializing parameters for request"""
         self.url = HOST + "/api/v1/favorites"
-        self.headers = {"Content-Type": "application/json"}
+        self.headers = MappingProxyType({"Content-Type": "application/json"})
+        self.client = get_http_client()
 
     def add_favorites(
         self, token: str, favorite_product: list[str], expected_status_code: int = 200
@@ -27,10 +29,9 @@ class FavoriteAPI:
         """
         data = {"productIds": favorite_product}
 
-        headers = self.headers
-        headers["Authorization"] = f"Bearer {token}"
+        headers = auth_headers(self.headers, token)
         path = self.url
-        response = requests.post(url=path, data=json.dumps(data), headers=headers)
+        response = self.client.post(url=path, data=json.dumps(data), headers=headers)
         assert_status_code(response, expected_status_code=expected_status_code)
         log_request(response)
 
@@ -44,10 +45,9 @@ class FavoriteAPI:
             token: JWT token for authorization of request
         """
 
-        headers = self.headers
-        headers["Authorization"] = f"Bearer {token}"
+        headers = auth_headers(self.headers, token)
         path = self.url
-        response = requests.get(url=path, headers=headers)
+        response = self.client.get(url=path, headers=headers)
         assert_status_code(response, expected_status_code=expected_status_code)
         log_request(response)
 
@@ -64,10 +64,9 @@ class FavoriteAPI:
             token: JWT token for authorization of request
         """
 
-        headers = self.headers
-        headers["Authorization"] = f"Bearer {token}"
+        headers = auth_headers(self.headers, token)
         path = f"{self.url}/{id_product}"
-        response = requests.delete(url=path, headers=headers)
+        response = self.client.delete(url=path, headers=headers)
         assert_status_code(response, expected_status_code=expected_status_code)
         log_request(response)
 
@@ -1,13 +1,18 @@
-import requests
+from types import MappingProxyType
+from typing import Iterator
+
 from requests import Response
 
 from configs import HOST
+from framework.clients.http_client import auth_headers, get_http_client
+from framework.tools.pagination import iter_pages
 
 
 class ProductAPI:
     def __init__(self):
         self.url = HOST + "/api/v1/products"
-        self.headers = {"Content-Type": "application/json"}
+        self.headers = MappingProxyType({"Content-Type": "application/json"})
+        self.client = get_http_client()
 
     def get_by_id(self, _id: str, token: str = None) -> Response:
         """Getting product info by id
@@ -16,11 +21,9 @@ class ProductAPI:
             token:  JWT token for authorization of request;
             _id:    product ID.
         """
-        headers = self.headers
-        if token:
-            headers["Authorization"] = f"Bearer {token}"
+        headers = auth_headers(self.headers, token) if token else self.headers
         url = self.url + f"/{_id}"
-        response = requests.get(headers=headers, url=url)
+        response = self.client.get(headers=headers, url=url)
         return response
 
     def get_all(self, token: str = None, params: dict = None) -> Response:
@@ -30,8 +33,24 @@ class ProductAPI:
             token:  JWT token for authorization of request;
             params: URL-parameters request.
         """
-        headers = self.headers
-        if token:
-            headers["Authorization"] = f"Bearer {token}"
-        response = requests.get(headers=headers, url=self.url, params=params)
+        headers = auth_headers(self.headers, token) if token else self.headers
+        response = self.client.get(headers=headers, url=self.url, params=params)
         return response
+
+    def iter_all(
+        self, token: str = None, params: dict = None, page_size: int = 50
+    ) -> Iterator[dict]:
+        """Iterating over products of all pages, the next page is requested in advance
+
+        Args:
+            token:     JWT token for authorization of request;
+            params:    URL-parameters request except page and size, e.g. sorting;
+            page_size: number of products per request.
+        """
+        headers = auth_headers(self.headers, token) if token else self.headers
+
+        def fetch(page: int) -> Response:
+            page_params = {**(params or {}), "page": page, "size": page_size}
+            return self.client.get(headers=headers, url=self.url, params=page_params)
+
+        return iter_pages(fetch, items_key="products")
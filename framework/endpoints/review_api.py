@@ -1,17 +1,22 @@
 import json
+from types import MappingProxyType
+from typing import Iterator
 
 import requests
 from requests import Response
 
 from configs import HOST
 from framework.asserts.common import assert_status_code
+from framework.clients.http_client import auth_headers, get_http_client
 from framework.tools.logging_allure import log_request
+from framework.tools.pagination import iter_pages
 
 
 class ReviewAPI:
     def __init__(self):
         self.url = f"{HOST}/api/v1/products"
-        self.headers = {"Content-Type": "application/json"}
+        self.headers = MappingProxyType({"Content-Type": "application/json"})
+        self.client = get_http_client()
 
     def get_all_product_reviews(
         self, product_id: str, expected_status_code: int = 200, timeout=10, **filters
@@ -27,7 +32,7 @@ class ReviewAPI:
         headers = self.headers
         url = f"{self.url}/{product_id}/reviews"
         try:
-            response = requests.get(
+            response = self.client.get(
                 url, headers=headers, params=filters, timeout=timeout
             )
             assert_status_code(response, expected_status_code=expected_status_code)
@@ -41,6 +46,29 @@ class ReviewAPI:
 
         return response
 
+    def iter_all_product_reviews(
+        self, product_id: str, page_size: int = 50, **filters
+    ) -> Iterator[dict]:
+        """Iterating over reviews of product of all pages, the next page is requested in advance
+
+        Args:
+            product_id: id of product
+            page_size: number of reviews per request
+            filters: URL-parameters except page and size, e.g. sort_attribute, product_ratings
+
+        """
+        url = f"{self.url}/{product_id}/reviews"
+
+        def fetch(page: int) -> Response:
+            params = {**filters, "page": page, "size": page_size}
+            return self.client.get(url, headers=self.headers, params=params)
+
+        def check(response: Response) -> None:
+            assert_status_code(response, expected_status_code=200)
+            log_request(response)
+
+        return iter_pages(fetch, items_key="reviewsWithRatings", check=check)
+
     def delete_product_review(
         self,
         token: str,
@@ -57,10 +85,9 @@ class ReviewAPI:
             token: JWT token for authorization of request
 
         """
-        headers = self.headers
-        headers["Authorization"] = f"Bearer {token}"
+        headers = auth_headers(self.headers, token)
         url = f"{self.url}/{product_id}/reviews/{review_id}"
-        response = requests.delete(headers=headers, url=url)
+        response = self.client.delete(headers=headers, url=url)
         assert_status_code(response, expected_status_code=expected_status_code)
         log_request(response)
         return response
@@ -84,10 +111,9 @@ class ReviewAPI:
 
         """
         data = {"text": text_review, "rating": rating}
-        headers = self.headers
-        headers["Authorization"] = f"Bearer {token}"
+        headers = auth_headers(self.headers, token)
         url = f"{self.url}/{product_id}/reviews"
-        response = requests.post(headers=headers, url=url, data=json.dumps(data))
+        response = self.client.post(headers=headers, url=url, data=json.dumps(data))
         assert_status_code(response, expected_status_code=expected_status_code)
         log_request(response)
         return response
@@ -103,10 +129,9 @@ class ReviewAPI:
             expected_status_code: Expected HTTP code from Response
 
         """
-        headers = self.headers
-        headers["Authorization"] = f"Bearer {token}"
+        headers = auth_headers(self.headers, token)
         url = f"{self.url}/{product_id}/review"
-        response = requests.get(headers=headers, url=url)
+        response = self.client.get(headers=headers, url=url)
         assert_status_code(response, expected_status_code=expected_status_code)
         log_request(response)
 
@@ -130,11 +155,10 @@ class ReviewAPI:
             expected_status_code: Expected HTTP code from Response
 
         """
-        headers = self.headers
+        headers = auth_headers(self.headers, token)
         data = {"isLike": is_like}
-        headers["Authorization"] = f"Bearer {token}"
         url = f"{self.url}/{product_id}/reviews/{product_review_id}/rate"
-        response = requests.post(headers=headers, data=json.dumps(data), url=url)
+        response = self.client.post(headers=headers, data=json.dumps(data), url=url)
         assert_status_code(response, expected_status_code=expected_status_code)
         log_request(response)
 
@@ -147,7 +171,7 @@ class ReviewAPI:
             product_id: ID of product
         """
         url = f"{self.url}/{product_id}/reviews/statistics"
-        response = requests.get(url=url)
+        response = self.client.get(url=url)
         log_request(response)
 
         return response
@@ -1,19 +1,21 @@
 import json
 import os
 from pathlib import Path
+from types import MappingProxyType
 
-import requests
 from requests import Response
 
 from configs import HOST
 from framework.asserts.common import assert_status_code
+from framework.clients.http_client import auth_headers, get_http_client
 from framework.tools.logging_allure import log_request
 
 
 class UsersAPI:
     def __init__(self):
         self.url = HOST + "/api/v1/users"
-        self.headers = {"Content-Type": "application/json"}
+        self.headers = MappingProxyType({"Content-Type": "application/json"})
+        self.client = get_http_client()
 
     def get_user(self, token: str = "", expected_status_code: int = 200) -> Response:
         """Getting info about user via API
@@ -22,9 +24,8 @@ class UsersAPI:
             expected_status_code: Expected HTTP code from Response
             token:      JWT token for authorization of request
         """
-        headers = self.headers
-        headers["Authorization"] = f"Bearer {token}"
-        response = requests.get(headers=headers, url=self.url)
+        headers = auth_headers(self.headers, token)
+        response = self.client.get(headers=headers, url=self.url)
         assert_status_code(response, expected_status_code=expected_status_code)
         log_request(response)
 
@@ -38,9 +39,8 @@ class UsersAPI:
             token: JWT token for authorization of request
 
         """
-        headers = self.headers
-        headers["Authorization"] = f"Bearer {token}"
-        response = requests.delete(headers=headers, url=self.url)
+        headers = auth_headers(self.headers, token)
+        response = self.client.delete(headers=headers, url=self.url)
         assert_status_code(response, expected_status_code=expected_status_code)
         log_request(response)
         return response
@@ -52,9 +52,8 @@ class UsersAPI:
             token:      JWT token for authorization of request
             user_data:  data for updating user info
         """
-        headers = self.headers
-        headers["Authorization"] = f"Bearer {token}"
-        response = requests.put(headers=headers, url=self.url, json=user_data)
+        headers = auth_headers(self.headers, token)
+        response = self.client.put(headers=headers, url=self.url, json=user_data)
         log_request(response)
 
         return response
@@ -76,9 +75,10 @@ class UsersAPI:
 
         """
         data = {"newPassword": new_password, "oldPassword": old_password}
-        headers = self.headers
-        headers["Authorization"] = f"Bearer {token}"
-        response = requests.patch(headers=headers, url=self.url, data=json.dumps(data))
+        headers = auth_headers(self.headers, token)
+        response = self.client.patch(
+            headers=headers, url=self.url, data=json.dumps(data)
+        )
         assert_status_code(response, expected_status_code=expected_status_code)
         log_request(response)
 
@@ -93,10 +93,9 @@ class UsersAPI:
             expected_status_code: Expected HTTP code from Response
             token:      JWT token for authorization of request
         """
-        headers = self.headers
+        headers = auth_headers(self.headers, token)
         path = f"{self.url}/avatar"
-        headers["Authorization"] = f"Bearer {token}"
-        response = requests.get(headers=headers, url=path)
+        response = self.client.get(headers=headers, url=path)
         assert_status_code(response, expected_status_code=expected_status_code)
         log_request(response)
 
@@ -112,9 +111,8 @@ class UsersAPI:
            image_path: Path to the image file to be uploaded
            expected_status_code: Expected HTTP status code from the response
         """
-        headers = self.headers
+        headers = auth_headers(self.headers, token)
         path = f"{self.url}/avatar"
-        headers["Authorization"] = f"Bearer {token}"
 
         # Open the image file in binary mode
         with open(image_path, "rb") as image_file:
@@ -126,7 +124,7 @@ class UsersAPI:
                     "multipart/form-data",
                 )
             }
-            response = requests.post(url=path, headers=headers, files=files)
+            response = self.client.post(url=path, headers=headers, files=files)
 
         assert_status_code(response, expected_status_code=expected_status_code)
         log_request(
@@ -0,0 +1,49 @@
+from configs import DB_ASYNC_POOL_SIZE
+from data.data_for_auth import (
+    ssh_username,
+    ssh_password,
+    local_server_ip,
+    remote_server_ip,
+    db_username,
+    db_password,
+    database_name,
+    port_ssh,
+)
+from framework.clients.async_db_client import AsyncDBClient
+from framework.queries.postgres_async_db import AsyncPostgresDB
+from framework.queries.postgres_remote_db import PostgresDB
+
+
+def connect_to_postgres() -> PostgresDB:
+    """Connecting to Postgres DataBase of data_for_auth through ssh"""
+    return PostgresDB(
+        ssh_username=ssh_username,
+        ssh_password=ssh_password,
+        local_server_ip=local_server_ip,
+        remote_server_ip=remote_server_ip,
+        db_username=db_username,
+        db_password=db_password,
+        database_name=database_name,
+        port_ssh=port_ssh,
+    )
+
+
+def connect_to_postgres_async(size: int = DB_ASYNC_POOL_SIZE) -> AsyncPostgresDB:
+    """Pool of asynchronous connections through the ssh tunnel of connect_to_postgres
+
+    Args:
+        size: maximum number of connections.
+    """
+    return AsyncPostgresDB(
+        AsyncDBClient.through_tunnel(
+            size=size,
+            ssh_username=ssh_username,
+            ssh_password=ssh_password,
+            local_server_ip=local_server_ip,
+            remote_server_ip=remote_server_ip,
+            db_username=db_username,
+            db_password=db_password,
+            database_name=database_name,
+            port_ssh=port_ssh,
+        )
+    )
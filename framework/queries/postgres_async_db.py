@@ -0,0 +1,93 @@
+import asyncio
+from itertools import islice
+from typing import Iterable, List, Optional
+
+from framework.clients.async_db_client import AsyncDBClient
+from framework.queries.postgres_remote_db import (
+    INSERT_USER,
+    INSERT_USERS,
+    USER_ROW_TEMPLATE,
+    PostgresDB,
+)
+
+
+class AsyncPostgresDB:
+    def __init__(self, db: AsyncDBClient):
+        """Queries of PostgresDB run concurrently, e.g. by fixtures creating many users
+
+        Args:
+            db: pool of asynchronous connections, see AsyncDBClient.through_tunnel
+        """
+        self.db = db
+
+    async def close(self) -> None:
+        await self.db.close()
+
+    async def create_user(self, user: dict) -> None:
+        """Insert a user into the database
+
+        Args:
+            user: user data in the form of PostgresDB.create_user()
+        """
+        await self.db.execute(INSERT_USER, PostgresDB._user_row(user))
+
+    async def create_users(
+        self, users: Iterable[dict], page_size: int = 10_000
+    ) -> List[str]:
+        """Insert users with multi-row INSERT, the pages of users are inserted concurrently
+
+        Args:
+            users:     users data in the form of PostgresDB.create_user();
+            page_size: number of users inserted by one statement.
+
+        Returns:
+            ids of inserted users
+        """
+        rows = (PostgresDB._user_row(user) for user in users)
+        pages = iter(lambda: list(islice(rows, page_size)), [])
+
+        async def insert(page: List[tuple]) -> List[str]:
+            query = INSERT_USERS % ", ".join([USER_ROW_TEMPLATE] * len(page))
+            params = tuple(value for row in page for value in row)
+            return [str(row[0]) for row in await self.db.fetch_all(query, params)]
+
+        inserted = await asyncio.gather(*map(insert, pages))
+        return [user_id for ids in inserted for user_id in ids]
+
+    async def get_user_by_email(self, email: str) -> Optional[dict]:
+        """Retrieve a user by email (case-insensitive) or None if there is no such user
+
+        Args:
+            email: user's email
+        """
+        rows = await self.db.fetch_all(
+            """
+               SELECT id, first_name, last_name, email, password, birth_date, phone_number
+               FROM user_details
+               WHERE lower(email) = lower(%s)
+           """,
+            (email,),
+            row_type="dict",
+        )
+        return rows[0] if rows else None
+
+    async def get_users_by_email(self, emails: Iterable[str]) -> List[Optional[dict]]:
+        """Retrieve users by emails concurrently, None for the missing ones
+
+        Args:
+            emails: users' emails
+        """
+        return list(
+            await asyncio.gather(*(self.get_user_by_email(email) for email in emails))
+        )
+
+    async def delete_users(self, user_ids: List[str]) -> int:
+        """Delete users by list of IDs with one statement, the number of deleted users is returned
+
+        Args:
+            user_ids: users IDs
+        """
+        return await self.db.execute(
+            "DELETE FROM public.user_details WHERE id = ANY(%s::uuid[])",
+            (list(user_ids),),
+        )
@@ -1,7 +1,13 @@
-from typing import List, Optional
+from operator import itemgetter
+from typing import Dict, Iterable, List, Optional
 
-from framework.clients.db_client import DBClient
-from framework.tools.generators import generate_string, generate_user
+from framework.clients.db_client import DBClient, check_identifier
+from framework.queries.random_sampling import (
+    order_by_random_query,
+    random_rows_query,
+    sample_rows,
+)
+from framework.tools.generators import generate_string, generate_users, to_db_user
 
 
 class PostgresDB:
@@ -36,7 +42,13 @@ class PostgresDB:
             field: field of table;
             value: field value.
         """
-        return self.db.fetch_all(f"SELECT * FROM {table} WHERE {field} = '{value}';")
+        check_identifier(table)
+        check_identifier(field)
+        return self.db.fetch_prepared(
+            f"data_by_{table}_{field}",
+            f"SELECT * FROM {table} WHERE {field} = $1",
+            (value,),
+        )
 
     def get_random_products(self, quantity: int = 1) -> Optional[List[dict]]:
         """Getting a random product
@@ -44,13 +56,7 @@ class PostgresDB:
         Args:
             quantity: number of random products
         """
-        return self.db.fetch_all(
-            "SELECT *"
-            "FROM product"
-            "WHERE active = true"
-            "ORDER BY RANDOM()"
-            f"LIMIT {quantity};"
-        )
+        return self._random_rows("product", "active = true", quantity)
 
     def get_product_by_filter(
         self, field: str, ascend: bool = False, size: int = -1, page: int = -1
@@ -63,27 +69,38 @@ class PostgresDB:
             size:   the amount of data per page;
             page:   page number.
         """
-
-        response = (
-            "SELECT * "
-            "FROM product "
-            f"ORDER BY {field} {'ASC' if ascend else 'DESC'}"
+        check_identifier(field)
+        order = "ASC" if ascend else "DESC"
+        # LIMIT NULL is no limit
+        return self.db.fetch_prepared(
+            f"products_by_{field}_{order.lower()}",
+            f"SELECT * FROM product ORDER BY {field} {order} LIMIT $1 OFFSET $2",
+            (size if size > 0 else None, max(size, 0) * max(page, 0)),
         )
 
-        if size > 0:
-            response += f" LIMIT {size}"
-        if page >= 0:
-            response += f" OFFSET {size * page}"
-        return self.db.fetch_all(response)
-
     def get_random_users(self, quantity: int = 1) -> List[dict]:
         """Getting a random user
 
         Args:
             quantity: number of random users
         """
-        return self.db.fetch_all(
-            f"SELECT * FROM user_details ORDER BY RANDOM() LIMIT {quantity};"
+        return self._random_rows("user_details", "true", quantity)
+
+    def _random_rows(self, table: str, condition: str, quantity: int) -> List[dict]:
+        """Random rows by index lookups, see random_sampling.sample_rows"""
+        return sample_rows(
+            lambda starts: self.db.fetch_prepared(
+                f"random_{table}",
+                random_rows_query(table, condition, "$1"),
+                (starts,),
+            ),
+            lambda limit: self.db.fetch_prepared(
+                f"random_sorted_{table}",
+                order_by_random_query(table, condition, "$1"),
+                (limit,),
+            ),
+            quantity,
+            key=itemgetter("id"),
         )
 
     def create_user(self, user: dict) -> None:
@@ -98,8 +115,9 @@ class PostgresDB:
                 - password - password for user;
                 - hashed_password - hash of password for user.
         """
-        self.db.execute(
-            f"""
+        self.db.execute_prepared(
+            "create_user",
+            """
                 INSERT INTO public.user_details(id
                     , first_name
                     , last_name
@@ -114,32 +132,69 @@ class PostgresDB:
                     , credentials_non_expired
                     , enabled
                 )
-                VALUES ('{user["id"]}'
-                    , '{user["first_name"]}'
-                    , '{user["last_name"]}'
-                    , '{user["stripe_customer_token"]}'
-                    , '{user["birth_date"]}'
-                    , '{user["phone_number"]}'
-                    , '{user["email"]}'
-                    , '{user["hashed_password"]}'
-                    , null
-                    , true
-                    , true
-                    , true
-                    , true
-                );
+                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, null, true, true, true, true)
+            """,
+            self._user_row(user),
+        )
+
+    def create_users(self, users: Iterable[dict], page_size: int = 10_000) -> List[str]:
+        """Inserting users into database with multi-row INSERT
+
+        Args:
+            users:     users data in the form of create_user(), may be a generator;
+            page_size: number of users inserted by one statement (one round trip).
+
+        Returns:
+            ids of inserted users
+        """
+        rows = self.db.insert_many(
             """
+                INSERT INTO public.user_details(id
+                    , first_name
+                    , last_name
+                    , stripe_customer_token
+                    , birth_date
+                    , phone_number
+                    , email
+                    , password
+                    , address_id
+                    , account_non_expired
+                    , account_non_locked
+                    , credentials_non_expired
+                    , enabled
+                )
+                VALUES %s
+                RETURNING id;
+            """,
+            (self._user_row(user) for user in users),
+            template="(%s, %s, %s, %s, %s, %s, %s, %s, null, true, true, true, true)",
+            page_size=page_size,
+        )
+        return [str(row["id"]) for row in rows]
+
+    @staticmethod
+    def _user_row(user: dict) -> tuple:
+        return (
+            user["id"],
+            user["first_name"],
+            user["last_name"],
+            user["stripe_customer_token"],
+            user["birth_date"],
+            user["phone_number"],
+            user["email"],
+            user["hashed_password"],
         )
 
-    def create_random_users(self, quantity: int = 1) -> List[dict]:
+    def create_random_users(self, quantity: int = 1) -> List[str]:
         """Creating random user(s)
 
         Args:
             quantity: number of random users
-        """
-        users = [self.create_user(generate_user()) for _ in range(quantity)]
 
-        return users
+        Returns:
+            ids of created users
+        """
+        return self.create_users(map(to_db_user, generate_users(quantity)))
 
     def delete_user(self, user_id: str) -> None:
         """Deletes a user from the database based on user ID
@@ -147,8 +202,19 @@ class PostgresDB:
         Args:
             user_id: user ID
         """
-        delete_query = f"DELETE FROM public.user_details WHERE id = '{user_id}';"
-        self.db.execute(delete_query)
+        self.db.execute_prepared(
+            "delete_user", "DELETE FROM public.user_details WHERE id = $1", (user_id,)
+        )
+
+    def delete_users(self, user_ids: List[str]) -> None:
+        """Deletes users from the database by list of IDs with one statement
+
+        Args:
+            user_ids: users IDs
+        """
+        self.db.execute(
+            "DELETE FROM public.user_details WHERE id = ANY(%s::uuid[]);", (user_ids,)
+        )
 
     def select_user_by_email(self, email) -> Optional[List[dict]]:
         """Search user by email in BD
@@ -156,5 +222,12 @@ class PostgresDB:
         Args:
             email: user's email
         """
-        select_query = f"SELECT COUNT(*) FROM user_details WHERE email = '{email}'"
-        return self.db.fetch_all(select_query)
+        return self.db.fetch_prepared(
+            "user_count_by_email",
+            "SELECT COUNT(*) FROM user_details WHERE email = $1",
+            (email,),
+        )
+
+    def statement_summary(self) -> Dict[str, dict]:
+        """Calls, preparations and time of the statements executed on the connection"""
+        return self.db.statement_summary()
@@ -1,10 +1,52 @@
-from typing import Optional
+import logging
+from operator import itemgetter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from psycopg2 import Error
 
 from framework.clients.db_client_ssh import DBClient
-from framework.tools.generators import generate_user
+from framework.queries.random_sampling import (
+    order_by_random_query,
+    random_rows_query,
+    sample_rows,
+)
+from framework.tools.generators import generate_users, to_db_user
+
+INSERT_USER = """
+   INSERT INTO public.user_details(
+       id, first_name, last_name, stripe_customer_token, birth_date,
+       phone_number, email, password, address_id, account_non_expired,
+       account_non_locked, credentials_non_expired, enabled
+   ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, NULL, true, true, true, true);
+"""
+# Multi-row INSERT of users, VALUES %s is filled with USER_ROW_TEMPLATE per user
+INSERT_USERS = """
+   INSERT INTO public.user_details(
+       id, first_name, last_name, stripe_customer_token, birth_date,
+       phone_number, email, password, address_id, account_non_expired,
+       account_non_locked, credentials_non_expired, enabled
+   ) VALUES %s
+   RETURNING id;
+"""
+USER_ROW_TEMPLATE = "(%s, %s, %s, %s, %s, %s, %s, %s, NULL, true, true, true, true)"
 
 
 class PostgresDB:
+    # Single-column foreign keys of the public schema as (table, column, parent table, parent column)
+    FOREIGN_KEYS_QUERY = """
+       SELECT child.relname, child_column.attname, parent.relname, parent_column.attname
+       FROM pg_constraint AS fk
+       JOIN pg_class AS child ON child.oid = fk.conrelid
+       JOIN pg_namespace AS namespace ON namespace.oid = child.relnamespace
+       JOIN pg_class AS parent ON parent.oid = fk.confrelid
+       JOIN pg_attribute AS child_column
+         ON child_column.attrelid = fk.conrelid AND child_column.attnum = fk.conkey[1]
+       JOIN pg_attribute AS parent_column
+         ON parent_column.attrelid = fk.confrelid AND parent_column.attnum = fk.confkey[1]
+       WHERE fk.contype = 'f' AND namespace.nspname = 'public' AND cardinality(fk.conkey) = 1
+       ORDER BY 1, 2, 3
+   """
+
     def __init__(
         self,
         ssh_username: str,
@@ -38,9 +80,22 @@ class PostgresDB:
         )
 
     def close(self) -> None:
-        """Close the database connection"""
+        """Return the database connection to the pool, the SSH tunnel stays open"""
         self.db.close()
 
+    @property
+    def isolated(self) -> bool:
+        """Changes are made inside a transaction that will be rolled back"""
+        return self.db.isolated
+
+    def begin(self) -> None:
+        """Start a transaction (SAVEPOINT if nested), see rollback"""
+        self.db.begin()
+
+    def rollback(self) -> None:
+        """Roll back changes made since the matching begin"""
+        self.db.rollback()
+
     # def get_data_by_filter(self, table: str, field: str, value: str) -> list[tuple]:
     #     """Retrieve data from a specified table by filtering on a specified field"""
     #     query = f"SELECT * FROM {table} WHERE {field} = %s"
@@ -61,14 +116,7 @@ class PostgresDB:
 
     def get_random_products(self, quantity: int = 1) -> list[tuple]:
         """Retrieve a specified number of random active products"""
-        query = """
-           SELECT *
-           FROM product
-           WHERE active = true
-           ORDER BY RANDOM()
-           LIMIT %s;
-       """
-        return self.db.fetch_all(query, (quantity,))
+        return self._random_rows("product", "active = true", quantity)
 
     def get_product_by_filter(
         self, field: str, ascend: bool = False, size: int = -1, page: int = -1
@@ -103,13 +151,20 @@ class PostgresDB:
         Args:
             quantity: number of random users
         """
-        query = """
-           SELECT *
-           FROM user_details
-           ORDER BY RANDOM()
-           LIMIT %s;
-       """
-        return self.db.fetch_all(query, (quantity,))
+        return self._random_rows("user_details", "true", quantity)
+
+    def _random_rows(self, table: str, condition: str, quantity: int) -> list[tuple]:
+        """Random rows by index lookups instead of sorting the table, see random_sampling.sample_rows"""
+        return sample_rows(
+            lambda starts: self.db.fetch_all(
+                random_rows_query(table, condition), (starts,)
+            ),
+            lambda limit: self.db.fetch_all(
+                order_by_random_query(table, condition), (limit,)
+            ),
+            quantity,
+            key=itemgetter(0),
+        )
 
     def create_user(self, user: dict) -> None:
         """Insert a user into the database
@@ -124,14 +179,29 @@ class PostgresDB:
                 - password: password for user;
                 - hashed_password: hash of password for user.
         """
-        query = """
-           INSERT INTO public.user_details(
-               id, first_name, last_name, stripe_customer_token, birth_date,
-               phone_number, email, password, address_id, account_non_expired,
-               account_non_locked, credentials_non_expired, enabled
-           ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, NULL, true, true, true, true);
-       """
-        params = (
+        self.db.execute(INSERT_USER, self._user_row(user))
+
+    def create_users(self, users: Iterable[dict], page_size: int = 10_000) -> List[str]:
+        """Insert users into the database with multi-row INSERT
+
+        Args:
+            users: users data in the form of create_user(), may be a generator;
+            page_size: number of users inserted by one statement (one round trip).
+
+        Returns:
+            ids of inserted users
+        """
+        rows = self.db.insert_many(
+            INSERT_USERS,
+            (self._user_row(user) for user in users),
+            template=USER_ROW_TEMPLATE,
+            page_size=page_size,
+        )
+        return [str(row[0]) for row in rows]
+
+    @staticmethod
+    def _user_row(user: dict) -> tuple:
+        return (
             user["id"],
             user["first_name"],
             user["last_name"],
@@ -141,16 +211,18 @@ class PostgresDB:
             user["email"],
             user["hashed_password"],
         )
-        self.db.execute(query, params)
 
-    def create_random_users(self, quantity: int = 1) -> list[None]:
+    def create_random_users(self, quantity: int = 1) -> List[str]:
         """Create random user(s)
 
 
         Args:
             quantity: number of random users
+
+        Returns:
+            ids of created users
         """
-        return [self.create_user(generate_user()) for _ in range(quantity)]
+        return self.create_users(map(to_db_user, generate_users(quantity)))
 
     def delete_user(self, user_id: str) -> None:
         """Delete a user from the database based on user ID
@@ -162,6 +234,124 @@ class PostgresDB:
         query = "DELETE FROM public.user_details WHERE id = %s"
         self.db.execute(query, (user_id,))
 
+    def delete_users(self, user_ids: List[str]) -> None:
+        """Delete users from the database by list of IDs with one statement
+
+
+        Args:
+            user_ids: users IDs
+        """
+        query = "DELETE FROM public.user_details WHERE id = ANY(%s::uuid[])"
+        self.db.execute(query, (user_ids,))
+
+    def user_dependent_tables(self) -> List[Tuple[str, List[Tuple[str, str, str]]]]:
+        """Tables referencing user_details directly or through other tables, read from the schema
+
+        Returns:
+            [(table, [(column, parent table, parent column), ...]), ...] ordered so that
+            every table comes before the tables it references, i.e. in the order of deletion
+        """
+        references: Dict[str, List[Tuple[str, str, str]]] = {}
+        for table, column, parent, parent_column in self.db.fetch_all(
+            self.FOREIGN_KEYS_QUERY
+        ):
+            if table != parent:
+                references.setdefault(table, []).append((column, parent, parent_column))
+
+        # Longest chain of references from each table to user_details
+        depths = {"user_details": 0}
+        changed = True
+        while changed:
+            changed = False
+            for table, keys in references.items():
+                depth = max(
+                    (depths[parent] + 1 for _, parent, _ in keys if parent in depths),
+                    default=None,
+                )
+                # Chains longer than the number of tables only come from cycles
+                if depth is not None and depths.get(table, 0) < depth <= len(
+                    references
+                ):
+                    depths[table] = depth
+                    changed = True
+
+        tables = sorted(
+            (t for t in depths if t != "user_details"), key=lambda t: (-depths[t], t)
+        )
+        return [
+            (table, [key for key in references[table] if key[1] in depths])
+            for table in tables
+        ]
+
+    def purge_users(
+        self, user_ids: List[str], emails: List[str], email_patterns: List[str]
+    ) -> Dict[str, int]:
+        """Delete users and all rows referencing them with one statement per table
+
+        The tables are found by user_dependent_tables() and cleaned in the order of
+        foreign keys before user_details. A failed statement is logged and the purge
+        goes on, users that still can not be deleted in bulk are deleted one by one.
+
+        Args:
+            user_ids: users IDs;
+            emails: lowercase emails of users;
+            email_patterns: lowercase LIKE patterns of emails, e.g. "icedlate.test+%@gmail.com".
+
+        Returns:
+            number of deleted rows per table
+        """
+        self.db.execute(
+            """
+               CREATE TEMP TABLE purged_users AS
+               SELECT id FROM public.user_details
+               WHERE id = ANY(%s::uuid[]) OR lower(email) = ANY(%s::text[])
+                  OR lower(email) LIKE ANY(%s::text[])
+           """,
+            (list(user_ids), list(emails), list(email_patterns)),
+        )
+        try:
+            dependent_tables = self.user_dependent_tables()
+            conditions = {"user_details": "id IN (SELECT id FROM purged_users)"}
+            # Rows of the parent tables are still there when their children are deleted
+            for table, keys in reversed(dependent_tables):
+                conditions[table] = " OR ".join(
+                    f"{column} IN (SELECT {parent_column} FROM public.{parent} "
+                    f"WHERE {conditions[parent]})"
+                    for column, parent, parent_column in keys
+                    if parent in conditions
+                )
+
+            purged = {}
+            for table, _ in dependent_tables:
+                query = f"DELETE FROM public.{table} WHERE {conditions[table]}"
+                try:
+                    purged[table] = self.db.execute(query)
+                except Error as e:
+                    logging.error(f"Rows of purged users in {table} not deleted: {e}")
+                    purged[table] = 0
+
+            try:
+                purged["user_details"] = self.db.execute(
+                    f"DELETE FROM public.user_details WHERE {conditions['user_details']}"
+                )
+            except Error as e:
+                logging.error(f"Purged users not deleted in bulk: {e}")
+                purged["user_details"] = self._delete_users_one_by_one()
+        finally:
+            self.db.execute("DROP TABLE IF EXISTS purged_users")
+        return purged
+
+    def _delete_users_one_by_one(self) -> int:
+        deleted = 0
+        for (user_id,) in self.db.fetch_all("SELECT id FROM purged_users"):
+            try:
+                deleted += self.db.execute(
+                    "DELETE FROM public.user_details WHERE id = %s", (user_id,)
+                )
+            except Error as e:
+                logging.error(f"User {user_id} not deleted: {e}")
+        return deleted
+
     def select_user_by_email(self, email: str) -> Optional[int]:
         """Search for a user by email in the database and return the count of users with that email.
 
@@ -175,3 +365,63 @@ class PostgresDB:
         if result := self.db.fetch_all(query, (email,)):
             return result[0][0]  # Assuming fetch_all returns a list of tuples
         return None
+
+    def get_products(self) -> List[dict]:
+        """Retrieve all products with the fields exposed by the API"""
+        query = "SELECT id, name, description, price, quantity, active FROM product"
+        columns = ("id", "name", "description", "price", "quantity", "active")
+        return [dict(zip(columns, row)) for row in self.db.fetch_all(query)]
+
+    def get_catalog(self, sort_fields: Iterable[str]) -> List[dict]:
+        """Retrieve all products with their positions in DB order by every sort field
+
+        The positions are given by DB, so ordering by text follows its collation.
+
+        Args:
+            sort_fields: columns of product, the position is returned as "<field>_rank"
+        """
+        sort_fields = list(sort_fields)
+        if not all(map(self.is_valid_identifier, sort_fields)):
+            raise ValueError("Invalid sort field name")
+        columns = ["id", "name", "description", "price", "quantity", "active"]
+        ranks = [f"{field}_rank" for field in sort_fields]
+        query = f"""
+           SELECT {", ".join(columns)},
+                  {", ".join(f"row_number() OVER (ORDER BY {field}, id) AS {rank}" for field, rank in zip(sort_fields, ranks))}
+           FROM product
+       """
+        return [dict(zip(columns + ranks, row)) for row in self.db.fetch_all(query)]
+
+    def get_user_by_id(self, user_id: str) -> Optional[dict]:
+        """Retrieve all columns of the user's row by ID or None if there is no such user
+
+        Args:
+            user_id: user ID
+        """
+        rows = self.db.fetch_all(
+            "SELECT * FROM user_details WHERE id = %s", (user_id,), row_type="dict"
+        )
+        return rows[0] if rows else None
+
+    def get_user_by_email(self, email: str) -> Optional[dict]:
+        """Retrieve a user by email (case-insensitive) or None if there is no such user
+
+        Args:
+            email: user's email
+        """
+        query = """
+           SELECT id, first_name, last_name, email, password, birth_date, phone_number
+           FROM user_details
+           WHERE lower(email) = lower(%s)
+       """
+        columns = (
+            "id",
+            "first_name",
+            "last_name",
+            "email",
+            "password",
+            "birth_date",
+            "phone_number",
+        )
+        rows = self.db.fetch_all(query, (email,))
+        return dict(zip(columns, rows[0])) if rows else None
@@ -0,0 +1,101 @@
+import math
+import random
+import uuid
+from typing import Any, Callable, List, Sequence
+
+# Rounds of random starting points before falling back to ORDER BY RANDOM()
+MAX_ROUNDS = 4
+# Limit of starting ids of a round, for conditions matching few rows
+MAX_STARTS = 10_000
+
+
+def random_rows_query(
+    table: str, condition: str = "true", placeholder: str = "%s"
+) -> str:
+    """Query of the rows following random ids, one index lookup per id
+
+    For every random uuid of the array the row with the nearest greater id is taken
+    through the primary key index, so n rows cost O(n log N) instead of sorting
+    the whole table as ORDER BY RANDOM(). A row is picked with probability
+    proportional to the gap between its id and the previous one: with random
+    (uuid4) ids any row can be picked, though not exactly uniformly.
+
+    The condition filters the following rows instead of being a part of the lookup,
+    otherwise a matching row would take the gaps of the not matching rows before it.
+    A row is returned per id, so the same row may be returned more than once.
+
+    Args:
+        table:       table with uuid primary key "id", checked identifier;
+        condition:   condition of the rows, e.g. "active = true";
+        placeholder: placeholder of the array of starting ids, "%s" or "$1".
+    """
+    return (
+        f"SELECT t.* FROM unnest({placeholder}::text[]::uuid[]) AS s(start) "
+        f"CROSS JOIN LATERAL ("
+        f"SELECT * FROM {table} WHERE id >= s.start ORDER BY id LIMIT 1"
+        f") AS t WHERE {condition}"
+    )
+
+
+def order_by_random_query(
+    table: str, condition: str = "true", placeholder: str = "%s"
+) -> str:
+    """Query sorting the whole table, for tables smaller than the sample"""
+    return (
+        f"SELECT * FROM {table} WHERE {condition} "
+        f"ORDER BY RANDOM() LIMIT {placeholder}"
+    )
+
+
+def is_uuid4(value: Any) -> bool:
+    """Whether the id is a random uuid, the lookups of random ids are biased for other ids"""
+    try:
+        return uuid.UUID(str(value)).version == 4
+    except ValueError:
+        return False
+
+
+def sample_rows(
+    fetch_following: Callable[[List[str]], Sequence[Any]],
+    fetch_sorted: Callable[[int], Sequence[Any]],
+    quantity: int,
+    key: Callable[[Any], Any],
+    rng: random.Random = random,
+) -> List[Any]:
+    """Distinct random rows, picked by random_rows_query
+
+    A few more starting ids than needed are sent, since two of them may land on
+    the same row, after the last one or on a row not matching the condition; the
+    next rounds send more ids by the share of ids giving a new row. When the table
+    has not enough rows after MAX_ROUNDS, or its ids are not uuid4 (time-ordered
+    uuids gather in a small part of the id space), the sample is taken by
+    order_by_random_query.
+
+    Args:
+        fetch_following: function executing random_rows_query with the list of starting ids;
+        fetch_sorted:    function executing order_by_random_query with the quantity;
+        quantity:        number of rows;
+        key:             id of a row, e.g. itemgetter("id");
+        rng:             random generator, e.g. seeded for reproducible choice.
+    """
+    if quantity <= 0:
+        return []
+    rows = {}
+    sent = 0
+    for _ in range(MAX_ROUNDS):
+        missing = quantity - len(rows)
+        # Share of the starting ids giving a new row, by the previous rounds
+        share = max(len(rows), 1) / sent if sent else 1
+        count = min(math.ceil(missing * 1.1 / share) + 1, MAX_STARTS)
+        starts = [
+            str(uuid.UUID(int=rng.getrandbits(128), version=4)) for _ in range(count)
+        ]
+        following = fetch_following(starts)
+        sent += count
+        for row in following:
+            if not is_uuid4(key(row)):
+                return list(fetch_sorted(quantity))
+            rows.setdefault(key(row), row)
+        if len(rows) >= quantity:
+            return list(rows.values())[:quantity]
+    return list(fetch_sorted(quantity))
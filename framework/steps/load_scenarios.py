@@ -0,0 +1,136 @@
+import random
+from typing import Callable, Dict, List, Optional
+
+from configs import HOST
+from framework.endpoints.authenticate_api import AuthenticateAPI
+from framework.endpoints.cart_api import CartAPI
+from framework.endpoints.favorite_api import FavoriteAPI
+from framework.endpoints.product_api import ProductAPI
+from framework.endpoints.review_api import ReviewAPI
+
+
+class LoadAPI:
+    def __init__(self, host: Optional[str] = None):
+        """Endpoint classes shared by the virtual users of load
+
+        Args:
+            host: URL of the backend, HOST of configs if None
+        """
+        self.auth = AuthenticateAPI()
+        self.products = ProductAPI()
+        self.reviews = ReviewAPI()
+        self.cart = CartAPI()
+        self.favorites = FavoriteAPI()
+        if host:
+            for api in (
+                self.auth,
+                self.products,
+                self.reviews,
+                self.cart,
+                self.favorites,
+            ):
+                api.url = host + api.url[len(HOST) :]
+
+
+class VirtualUser:
+    def __init__(
+        self, api: LoadAPI, user: dict, token: str, product_ids: List[str], seed: int
+    ):
+        """Authenticated user running the scenarios of load
+
+        Args:
+            api:         endpoint classes;
+            user:        user from generate_users();
+            token:       JWT token of the user;
+            product_ids: ids of products to choose from;
+            seed:        seed of the random choices of the user.
+        """
+        self.api = api
+        self.user = user
+        self.token = token
+        self.product_ids = product_ids
+        self.random = random.Random(seed)
+
+    def product_id(self) -> str:
+        return self.random.choice(self.product_ids)
+
+
+def browse_catalogue(vu: VirtualUser) -> None:
+    """Viewing a page of catalogue, a product, its reviews and their statistics"""
+    vu.api.products.get_all(
+        params={
+            "page": vu.random.randint(0, 4),
+            "size": 20,
+            "sort_attribute": vu.random.choice(("name", "price")),
+            "sort_direction": vu.random.choice(("asc", "desc")),
+        }
+    )
+    product_id = vu.product_id()
+    vu.api.products.get_by_id(product_id)
+    vu.api.reviews.get_all_product_reviews(product_id, page=0, size=10)
+    vu.api.reviews.get_product_review_statistics(product_id)
+
+
+def shopping_cart(vu: VirtualUser) -> None:
+    """Adding a product to the cart, changing its quantity and removing it"""
+    product_id = vu.product_id()
+    response = vu.api.cart.add_item_to_cart(
+        vu.token, items=[{"productId": product_id, "productQuantity": 1}]
+    )
+    item_ids = [
+        item["id"]
+        for item in response.json()["items"]
+        if item["productInfo"]["id"] == product_id
+    ]
+    vu.api.cart.update_quantity_product(vu.token, item_ids[0], item_quantity=1)
+    vu.api.cart.get_user_cart(vu.token)
+    vu.api.cart.delete_item_from_cart(vu.token, cart_item_id=item_ids)
+
+
+def favorites(vu: VirtualUser) -> None:
+    """Adding a product to favorites, viewing and removing it"""
+    product_id = vu.product_id()
+    vu.api.favorites.add_favorites(vu.token, favorite_product=[product_id])
+    vu.api.favorites.get_favorites(vu.token)
+    vu.api.favorites.delete_favorites(vu.token, id_product=product_id)
+
+
+def review(vu: VirtualUser) -> None:
+    """Reviewing a product, viewing the own review and removing it"""
+    product_id = vu.product_id()
+    response = vu.api.reviews.add_product_review(
+        vu.token,
+        product_id,
+        text_review="Great coffee, will order again",
+        rating=vu.random.randint(1, 5),
+    )
+    vu.api.reviews.get_user_product_review(product_id, vu.token)
+    vu.api.reviews.delete_product_review(
+        vu.token, product_id, response.json()["productReviewId"]
+    )
+
+
+# Share of iterations of every scenario in the "mixed" one
+MIXED_WEIGHTS = {
+    browse_catalogue: 6,
+    shopping_cart: 2,
+    favorites: 1,
+    review: 1,
+}
+
+
+def mixed(vu: VirtualUser) -> None:
+    """One of the scenarios above chosen by MIXED_WEIGHTS"""
+    scenario = vu.random.choices(
+        list(MIXED_WEIGHTS), weights=list(MIXED_WEIGHTS.values())
+    )[0]
+    scenario(vu)
+
+
+SCENARIOS: Dict[str, Callable[[VirtualUser], None]] = {
+    "browse_catalogue": browse_catalogue,
+    "shopping_cart": shopping_cart,
+    "favorites": favorites,
+    "review": review,
+    "mixed": mixed,
+}
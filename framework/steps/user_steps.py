@@ -0,0 +1,41 @@
+from typing import List
+
+from framework.tools.cleanup_registry import cleanup_registry
+from framework.tools.generators import generate_user, to_db_user
+
+
+def generate_and_insert_users(postgres, quantity: int) -> List[dict]:
+    """Generating users and inserting them into the database with one multi-row INSERT
+
+    Args:
+        postgres: connection to Postgres DataBase;
+        quantity: number of users.
+
+    Returns:
+        users in the form of generate_user()
+    """
+    users = [generate_user() for _ in range(quantity)]
+    postgres.create_users(map(to_db_user, users))
+    for user in users:
+        cleanup_registry.add_user(user_id=user["id"])
+    return users
+
+
+async def generate_and_insert_users_async(postgres_async, quantity: int) -> List[dict]:
+    """Generating users and inserting them into the database without blocking the event loop
+
+    The insert runs concurrently with the other setup of the fixture, e.g. requests
+    of the async endpoint classes, see generate_and_insert_users.
+
+    Args:
+        postgres_async: pool of async connections to Postgres DataBase;
+        quantity:       number of users.
+
+    Returns:
+        users in the form of generate_user()
+    """
+    users = [generate_user() for _ in range(quantity)]
+    await postgres_async.create_users(map(to_db_user, users))
+    for user in users:
+        cleanup_registry.add_user(user_id=user["id"])
+    return users
@@ -0,0 +1,77 @@
+import logging
+import random
+import time
+from typing import Dict, List, Optional
+
+
+class CatalogSnapshot:
+    # Attributes the products can be sorted by, as sort_attribute of API
+    SORT_FIELDS = ("id", "name", "price", "quantity")
+
+    def __init__(self, products: List[dict]):
+        """Products loaded from DB once, with the indexes for the checks of API
+
+        Args:
+            products: rows of PostgresDB.get_catalog(SORT_FIELDS)
+        """
+        self.products = products
+        self.by_id: Dict[str, dict] = {str(p["id"]): p for p in products}
+        # Sorted by the positions of DB, ascending
+        self.sorted: Dict[str, List[dict]] = {
+            field: sorted(products, key=lambda p, rank=f"{field}_rank": p[rank])
+            for field in self.SORT_FIELDS
+        }
+        self.active = [p for p in products if p["active"]]
+
+    @classmethod
+    def load(cls, postgres) -> "CatalogSnapshot":
+        """Loading the product table
+
+        Args:
+            postgres: connection to Postgres DataBase
+        """
+        start = time.perf_counter()
+        snapshot = cls(postgres.get_catalog(cls.SORT_FIELDS))
+        logging.info(
+            f"Catalog of {len(snapshot.products)} products loaded "
+            f"in {time.perf_counter() - start:.3f}s"
+        )
+        return snapshot
+
+    def get(self, product_id: str) -> Optional[dict]:
+        return self.by_id.get(str(product_id))
+
+    def page(
+        self, field: str = "name", ascend: bool = False, size: int = -1, page: int = 0
+    ) -> List[dict]:
+        """Sorted products of a page, as PostgresDB.get_product_by_filter
+
+        Args:
+            field:  field for sorting;
+            ascend: ascending sort order, True - ascending, False - descending;
+            size:   the amount of data per page, all products if not positive;
+            page:   page number.
+        """
+        products = self.sorted[field]
+        if size <= 0:
+            return products if ascend else products[::-1]
+        if ascend:
+            return products[page * size : (page + 1) * size]
+        # Descending pages are taken from the end of the ascending index
+        end = max(len(products) - page * size, 0)
+        return products[max(end - size, 0) : end][::-1]
+
+    def random_product(self, rng: random.Random = random) -> dict:
+        """A random active product, O(1)"""
+        return rng.choice(self.active)
+
+    def random_products(
+        self, quantity: int = 1, rng: random.Random = random
+    ) -> List[dict]:
+        """Distinct random active products, as PostgresDB.get_random_products
+
+        Args:
+            quantity: number of products;
+            rng:      random generator, e.g. seeded for reproducible choice.
+        """
+        return rng.sample(self.active, min(quantity, len(self.active)))
@@ -0,0 +1,149 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import Optional
+
+from framework.endpoints.authenticate_api import AuthenticateAPI
+from framework.endpoints.users_api import UsersAPI
+
+
+class CleanupRegistry:
+    def __init__(self):
+        """Registry of users created during the run, removed in bulk at the end
+
+        Fixtures record ids and emails instead of deleting users one by one,
+        email patterns cover users whose fixtures did not get to recording them.
+        The patterns include the id of the run (shared by pytest-xdist workers),
+        so users of other runs against the same database are not purged.
+        """
+        self._lock = threading.Lock()
+        self.run_id = os.environ.get("PYTEST_XDIST_TESTRUNUID", uuid.uuid4().hex)[:8]
+        self.user_ids = set()
+        self.emails = set()
+        self.email_patterns = set()
+        self.purged = {}
+        self.purge_time = 0.0
+
+    def add_user(
+        self, user_id: Optional[str] = None, email: Optional[str] = None
+    ) -> None:
+        """Recording a user to be removed at the end of the run
+
+        Args:
+            user_id: id of the user in DB;
+            email:   email of the user, e.g. if the user was registered through API.
+        """
+        with self._lock:
+            if user_id:
+                self.user_ids.add(str(user_id))
+            if email:
+                self.emails.add(email.lower())
+
+    def run_local_part(self, local_part: str) -> str:
+        """Beginning of the local part of emails generated by this run
+
+        Args:
+            local_part: beginning of the local part, e.g. "icedlate.test+".
+        """
+        return f"{local_part}{self.run_id}"
+
+    def add_email_prefix(self, local_part: str, domain: str) -> None:
+        """Recording all users with plus-addresses of the test mailbox
+
+        Args:
+            local_part: beginning of the local part, see run_local_part();
+            domain:     domain of the email, e.g. "gmail.com".
+        """
+        escaped = (
+            local_part.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        )
+        with self._lock:
+            self.email_patterns.add(f"{escaped}%@{domain}".lower())
+
+    def merge(self, other: dict) -> None:
+        """Adding users recorded by other process (e.g. pytest-xdist worker)
+
+        Args:
+            other: users in the form of CleanupRegistry.as_dict()
+        """
+        with self._lock:
+            self.user_ids.update(other["user_ids"])
+            self.emails.update(other["emails"])
+            self.email_patterns.update(other["email_patterns"])
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "user_ids": sorted(self.user_ids),
+                "emails": sorted(self.emails),
+                "email_patterns": sorted(self.email_patterns),
+            }
+
+    def purge(self, postgres) -> None:
+        """Removing all recorded users and their data, one statement per table
+
+        Args:
+            postgres: connection to Postgres DataBase
+        """
+        users = self.as_dict()
+        if not any(users.values()):
+            return
+
+        start = time.perf_counter()
+        purged = postgres.purge_users(
+            user_ids=users["user_ids"],
+            emails=users["emails"],
+            email_patterns=users["email_patterns"],
+        )
+        with self._lock:
+            self.purged = purged
+            self.purge_time = time.perf_counter() - start
+            self.user_ids.clear()
+            self.emails.clear()
+        logging.info(self.summary())
+
+    def summary(self) -> str:
+        """Human-readable report of purged rows"""
+        with self._lock:
+            tables = ", ".join(f"{t}: {n}" for t, n in self.purged.items())
+            total = sum(self.purged.values())
+            return f"{total} rows purged in {self.purge_time:.3f}s ({tables or 'nothing to purge'})"
+
+
+cleanup_registry = CleanupRegistry()
+
+
+def delete_user_through_api(user: dict, token: Optional[str] = None) -> bool:
+    """Deleting the user right away through API, so the backend also removes the user's
+    reviews, cart and favorites and updates ratings of the reviewed products
+
+    The user is recorded in cleanup_registry as well, it is purged at the end of the run
+    if it can not be deleted now (e.g. the test changed the password or deleted the user).
+
+    Args:
+        user:  user with "id", "email" and "password";
+        token: JWT token of the user, a new one is requested if it is missing or rejected.
+
+    Returns:
+        True if the user was deleted
+    """
+    cleanup_registry.add_user(user_id=user.get("id"), email=user["email"])
+    try:
+        if token:
+            try:
+                UsersAPI().delete_user(token=token)
+                return True
+            except AssertionError:
+                pass
+        token = (
+            AuthenticateAPI()
+            .authentication(email=user["email"], password=user["password"])
+            .json()["token"]
+        )
+        UsersAPI().delete_user(token=token)
+        return True
+    except Exception as e:
+        logging.info(f"User {user['email']} left to purge at the end of the run: {e}")
+        return False
@@ -0,0 +1,1082 @@
+import argparse
+import base64
+import json
+import logging
+import math
+import random
+import re
+import smtplib
+import threading
+import unicodedata
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from email.message import EmailMessage
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from email.utils import formatdate
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import bcrypt
+import jwt
+from faker import Faker
+
+from configs import JWT_SECRET, email_iced_late
+from framework.tools.generators import hash_password
+
+ACCESS_TOKEN_TTL = timedelta(days=1)
+REFRESH_TOKEN_TTL = timedelta(days=7)
+LOGIN_ATTEMPTS_LIMIT = 5
+LOGIN_LOCK_DURATION = timedelta(minutes=60)
+REVIEW_MAX_LENGTH = 1500
+
+_UUID = re.compile(r"[0-9a-fA-F]{8}-(?:[0-9a-fA-F]{4}-){3}[0-9a-fA-F]{12}")
+_CODE = re.compile(r"\d{9}")
+_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+# Symbols rejected in the text of review, letters must be Latin
+_REVIEW_FORBIDDEN_SYMBOLS = set("#%+=/@$*;:<>[]{}\\|^~`")
+
+Mailer = Callable[[str, str, str], None]
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        """Error response of the fake backend
+
+        Args:
+            status:  HTTP status code;
+            message: message of the error in the body of response.
+        """
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+    def body(self) -> dict:
+        return {
+            "message": self.message,
+            "httpStatusCode": self.status,
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "error": HTTPStatus(self.status).phrase,
+        }
+
+
+class Request:
+    __slots__ = ("method", "path", "params", "query", "headers", "body")
+
+    def __init__(
+        self, method: str, path: str, params: dict, query: dict, headers, body: bytes
+    ):
+        """Request to the fake backend as seen by the handlers of FakeStore
+
+        Args:
+            method:  HTTP method;
+            path:    path of the request;
+            params:  parameters of the path, e.g. {"product_id": ...};
+            query:   parameters of the query string;
+            headers: headers of the request;
+            body:    raw body of the request.
+        """
+        self.method = method
+        self.path = path
+        self.params = params
+        self.query = query
+        self.headers = headers
+        self.body = body
+
+    def json(self) -> Any:
+        if not self.body:
+            raise ApiError(400, "Request body is empty")
+        try:
+            return json.loads(self.body)
+        except ValueError as e:
+            raise ApiError(400, f"JSON parse error: {e}") from e
+
+    def arg(self, name: str, default: Any = None, type_: type = str) -> Any:
+        values = self.query.get(name)
+        if not values or values[0] == "":
+            return default
+        try:
+            return type_(values[0])
+        except ValueError as e:
+            raise ApiError(
+                400, f"Invalid value of parameter {name}: {values[0]}"
+            ) from e
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _created_at() -> str:
+    return _now().strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def _check_uuid(value: Any) -> str:
+    if not isinstance(value, str) or not _UUID.fullmatch(value):
+        raise ApiError(400, f"Invalid UUID string: {value}")
+    return value.lower()
+
+
+def _mandatory(body: dict, field: str, name: str) -> str:
+    value = body.get(field)
+    if not isinstance(value, str) or not value.strip():
+        raise ApiError(400, f"{name} is the mandatory attribute")
+    return value
+
+
+def _check_password_length(password: str) -> None:
+    if not 8 <= len(password) <= 128:
+        raise ApiError(
+            400, "Password should have a length between 8 and 128 characters"
+        )
+
+
+def _is_valid_review_text(text: str) -> bool:
+    for char in text:
+        if char in _REVIEW_FORBIDDEN_SYMBOLS:
+            return False
+        if char.isalpha() and not unicodedata.name(char, "").startswith("LATIN"):
+            return False
+    return bool(text.strip())
+
+
+def _page(items: list, page: int, size: int) -> Tuple[list, dict]:
+    if page < 0 or size < 1:
+        raise ApiError(400, "Page must not be negative and size must be positive")
+    total = len(items)
+    info = {
+        "page": page,
+        "size": size,
+        "totalElements": total,
+        "totalPages": math.ceil(total / size),
+    }
+    return items[page * size : (page + 1) * size], info
+
+
+def generate_products(quantity: int = 300, seed: int = 0) -> List[dict]:
+    """Catalogue of the fake backend when it is not loaded from DB
+
+    Args:
+        quantity: number of products;
+        seed:     seed of the generator, the same seed gives the same catalogue.
+    """
+    rng = random.Random(seed)
+    fake = Faker()
+    fake.seed_instance(seed)
+    return [
+        {
+            "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "name": f"{fake.word().capitalize()} {rng.choice(('Espresso', 'Latte', 'Cappuccino', 'Mocha', 'Americano'))}",
+            "description": fake.sentence(),
+            "price": round(rng.uniform(1, 100), 2),
+            "quantity": rng.randint(0, 100),
+            "active": i % 10 != 0,
+            "brandName": fake.company(),
+            "sellerName": fake.name(),
+        }
+        for i in range(quantity)
+    ]
+
+
+def smtp_mailer(host: str, port: int, sender: str = email_iced_late) -> Mailer:
+    """Sending the codes of the fake backend over SMTP, e.g. to the local mail sink
+
+    Args:
+        host:   SMTP server;
+        port:   port of SMTP server;
+        sender: address the messages are sent from.
+    """
+
+    def send(recipient: str, subject: str, text: str) -> None:
+        message = EmailMessage()
+        message["From"] = sender
+        message["To"] = recipient
+        message["Subject"] = subject
+        message["Date"] = formatdate(localtime=True)
+        message.set_content(text)
+        with smtplib.SMTP(host, port, timeout=10) as smtp:
+            smtp.send_message(message)
+
+    return send
+
+
+def _log_mailer(recipient: str, subject: str, text: str) -> None:
+    logging.info(f"Fake backend mail to {recipient}: {subject}. {text}")
+
+
+class FakeStore:
+    def __init__(
+        self,
+        products: Optional[Iterable[dict]] = None,
+        user_loader: Optional[Callable[[str], Optional[dict]]] = None,
+        mailer: Mailer = _log_mailer,
+        secret: str = JWT_SECRET,
+    ):
+        """In-memory state and business rules of the fake Iced Latte backend
+
+        All handlers take a Request and return the body of response (None for
+        an empty one) or raise ApiError. One lock guards the whole state.
+
+        Args:
+            products:    catalogue, generated one if None;
+            user_loader: function returning the user by email from another storage
+                         (e.g. inserted into DB by the fixtures) or None, called
+                         for emails unknown to the store;
+            mailer:      function sending (recipient, subject, text), used for
+                         confirmation and password reset codes;
+            secret:      base64-encoded secret of HS256 tokens, the same as of generate_jwt_token.
+        """
+        self.user_loader = user_loader
+        self.mailer = mailer
+        self._secret = base64.b64decode(secret)
+        self._lock = threading.RLock()
+        self._rng = random.SystemRandom()
+
+        self.products: Dict[str, dict] = {}
+        self._users: Dict[str, dict] = {}
+        self._users_by_id: Dict[str, dict] = {}
+        self._deleted_emails = set()
+        self._verified_passwords = set()
+        self._pending_registrations: Dict[str, dict] = {}
+        self._reset_codes: Dict[str, str] = {}
+        self._blacklist = set()
+        self._failed_logins: Dict[str, Tuple[int, Optional[datetime]]] = {}
+        self._carts: Dict[str, dict] = {}
+        self._favorites: Dict[str, Dict[str, None]] = {}
+        self._reviews: Dict[str, dict] = {}
+        self._product_reviews: Dict[str, Dict[str, None]] = {}
+        self._user_reviews: Dict[Tuple[str, str], str] = {}
+        self._review_sequence = 0
+
+        self.load_products(generate_products() if products is None else products)
+
+    def load_products(self, products: Iterable[dict]) -> None:
+        """Replacing the catalogue
+
+        Args:
+            products: products with id, name, description, price, quantity and active
+        """
+        with self._lock:
+            self.products = {
+                str(p["id"]).lower(): {
+                    "id": str(p["id"]).lower(),
+                    "name": p["name"],
+                    "description": p.get("description"),
+                    "price": float(p["price"]),
+                    "quantity": p.get("quantity", 0),
+                    "active": p.get("active", True),
+                    "averageRating": None,
+                    "reviewsCount": 0,
+                    "brandName": p.get("brandName"),
+                    "sellerName": p.get("sellerName"),
+                    "productFileUrl": p.get("productFileUrl"),
+                }
+                for p in products
+            }
+            self._product_reviews = {product_id: {} for product_id in self.products}
+
+    def add_user(self, user: dict) -> dict:
+        """Adding a user, e.g. loaded from DB
+
+        Args:
+            user: user with id, email and bcrypt hash of password, names in API
+                  (firstName) or DB (first_name) style
+        """
+        stored = {
+            "id": str(user["id"]),
+            "firstName": user.get("firstName", user.get("first_name")),
+            "lastName": user.get("lastName", user.get("last_name")),
+            "email": user["email"],
+            "birthDate": user.get("birthDate", user.get("birth_date")),
+            "phoneNumber": user.get("phoneNumber", user.get("phone_number")),
+            "address": user.get("address"),
+            "avatarLink": "default file",
+            "password": user.get("hashed_password", user.get("password")),
+        }
+        if isinstance(stored["birthDate"], date):
+            stored["birthDate"] = stored["birthDate"].isoformat()
+        with self._lock:
+            stored = self._users.setdefault(stored["email"].lower(), stored)
+            self._users_by_id[stored["id"]] = stored
+            self._deleted_emails.discard(stored["email"].lower())
+        return stored
+
+    def _find_user(self, email: str) -> Optional[dict]:
+        key = email.lower()
+        with self._lock:
+            if user := self._users.get(key):
+                return user
+            if key in self._deleted_emails or not self.user_loader:
+                return None
+        # Loading outside of the lock, the other requests do not wait for the storage
+        loaded = self.user_loader(email)
+        return self.add_user(loaded) if loaded else None
+
+    def _check_password(self, user: dict, password: str) -> bool:
+        key = (user["password"], password)
+        if key in self._verified_passwords:
+            return True
+        if not user["password"] or not bcrypt.checkpw(
+            password.encode(), user["password"].encode()
+        ):
+            return False
+        self._verified_passwords.add(key)
+        return True
+
+    def _issue_tokens(self, email: str) -> dict:
+        now = _now()
+
+        def encode(ttl: timedelta) -> str:
+            payload = {
+                "sub": email,
+                "iat": now,
+                "exp": now + ttl,
+                "jti": uuid.uuid4().hex,
+            }
+            return jwt.encode(payload, self._secret, algorithm="HS256")
+
+        return {
+            "token": encode(ACCESS_TOKEN_TTL),
+            "refreshToken": encode(REFRESH_TOKEN_TTL),
+        }
+
+    def _authorize(self, request: Request) -> Tuple[dict, str]:
+        """Checking the bearer token in the order of the real backend
+
+        Returns:
+            user and token
+        """
+        scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+        token = token.strip()
+        if scheme != "Bearer" or not token:
+            raise ApiError(400, "Bearer authentication header is absent")
+        if token in self._blacklist:
+            raise ApiError(400, "JWT Token is blacklisted")
+        try:
+            claims = jwt.decode(token, self._secret, algorithms=["HS256"])
+        except jwt.ExpiredSignatureError as e:
+            raise ApiError(401, "Jwt token is expired") from e
+        except jwt.InvalidTokenError as e:
+            raise ApiError(401, "Invalid token") from e
+        if not claims.get("sub"):
+            raise ApiError(400, "User email not found in jwtToken")
+        user = self._find_user(claims["sub"])
+        if user is None:
+            raise ApiError(404, "User with the provided email does not exist")
+        return user, token
+
+    def _send_code(self, email: str, subject: str) -> str:
+        code = f"{self._rng.randrange(10**9):09d}"
+        self.mailer(email, subject, f"Your code: {code}")
+        return code
+
+    # Authentication
+
+    def authenticate(self, request: Request) -> dict:
+        body = request.json()
+        email = _mandatory(body, "email", "Email").strip()
+        password = _mandatory(body, "password", "Password")
+
+        key = email.lower()
+        now = _now()
+        with self._lock:
+            attempts, locked_until = self._failed_logins.get(key, (0, None))
+        if locked_until and locked_until > now:
+            raise ApiError(
+                401,
+                "The request was rejected due to an incorrect number of login attempts "
+                f"for the user with email='{email}'. Try again in "
+                f"{LOGIN_LOCK_DURATION.seconds // 60} minutes or reset your password",
+            )
+
+        user = self._find_user(email)
+        if user is None or not self._check_password(user, password):
+            attempts += 1
+            locked_until = now + LOGIN_LOCK_DURATION
+            with self._lock:
+                self._failed_logins[key] = (
+                    attempts,
+                    locked_until if attempts >= LOGIN_ATTEMPTS_LIMIT else None,
+                )
+            raise ApiError(
+                401, f"Invalid credentials for user's account with email = '{email}'"
+            )
+
+        with self._lock:
+            self._failed_logins.pop(key, None)
+        return self._issue_tokens(user["email"])
+
+    def register(self, request: Request) -> dict:
+        body = request.json()
+        email = _mandatory(body, "email", "Email").strip()
+        first_name = _mandatory(body, "firstName", "First name")
+        last_name = _mandatory(body, "lastName", "Last name")
+        password = _mandatory(body, "password", "Password")
+        _check_password_length(password)
+        if self._find_user(email):
+            raise ApiError(400, "Email must be unique")
+
+        code = self._send_code(email, "Confirmation of registration")
+        with self._lock:
+            self._pending_registrations[code] = {
+                "id": str(uuid.uuid4()),
+                "firstName": first_name,
+                "lastName": last_name,
+                "email": email,
+                "password": hash_password(password),
+            }
+        return {"message": "Email verification code has been sent to your email"}
+
+    def confirm(self, request: Request) -> dict:
+        code = request.json().get("token") or ""
+        if not code.strip():
+            raise ApiError(400, "ErrorMessage: Token cannot be empty")
+        if not _CODE.fullmatch(code):
+            raise ApiError(400, "Incorrect token format, token must be #########")
+        with self._lock:
+            registration = self._pending_registrations.pop(code, None)
+        if registration is None:
+            raise ApiError(400, "Incorrect token")
+        if self._find_user(registration["email"]):
+            raise ApiError(400, "Email must be unique")
+        user = self.add_user(registration)
+        return self._issue_tokens(user["email"])
+
+    def refresh(self, request: Request) -> dict:
+        user, _ = self._authorize(request)
+        return self._issue_tokens(user["email"])
+
+    def logout(self, request: Request) -> None:
+        _, token = self._authorize(request)
+        with self._lock:
+            self._blacklist.add(token)
+
+    def forgot_password(self, request: Request) -> None:
+        email = _mandatory(request.json(), "email", "Email").strip()
+        if self._find_user(email) is None:
+            raise ApiError(404, "User with the provided email does not exist")
+        code = self._send_code(email, "Reset of password")
+        with self._lock:
+            self._reset_codes[email.lower()] = code
+
+    def change_password_through_reset(self, request: Request) -> None:
+        body = request.json()
+        email = _mandatory(body, "email", "Email").strip()
+        code = _mandatory(body, "code", "Code")
+        password = _mandatory(body, "password", "Password")
+        _check_password_length(password)
+        user = self._find_user(email)
+        with self._lock:
+            if user is None or self._reset_codes.get(email.lower()) != code:
+                raise ApiError(400, "Incorrect token")
+            del self._reset_codes[email.lower()]
+            user["password"] = hash_password(password)
+            self._failed_logins.pop(email.lower(), None)
+
+    # Users
+
+    @staticmethod
+    def _user_dto(user: dict) -> dict:
+        return {key: value for key, value in user.items() if key != "password"}
+
+    def get_user(self, request: Request) -> dict:
+        user, _ = self._authorize(request)
+        return self._user_dto(user)
+
+    def update_user(self, request: Request) -> dict:
+        user, _ = self._authorize(request)
+        body = request.json()
+        if not body:
+            raise ApiError(400, "Request body is empty")
+        first_name = _mandatory(body, "firstName", "First name")
+        last_name = _mandatory(body, "lastName", "Last name")
+        birth_date = body.get("birthDate")
+        if birth_date is not None:
+            try:
+                if not _DATE.fullmatch(birth_date):
+                    raise ValueError(birth_date)
+                date.fromisoformat(birth_date)
+            except (TypeError, ValueError) as e:
+                raise ApiError(400, f"Invalid date of birthDate: {birth_date}") from e
+        with self._lock:
+            user.update(
+                firstName=first_name,
+                lastName=last_name,
+                birthDate=birth_date,
+                phoneNumber=body.get("phoneNumber"),
+            )
+            if "address" in body:
+                user["address"] = body["address"]
+            return self._user_dto(user)
+
+    def change_password(self, request: Request) -> None:
+        user, _ = self._authorize(request)
+        body = request.json()
+        new_password = _mandatory(body, "newPassword", "Password")
+        old_password = _mandatory(body, "oldPassword", "Password")
+        _check_password_length(new_password)
+        if not self._check_password(user, old_password):
+            raise ApiError(
+                401,
+                f"User with userEmail = '{user['email']}' provided incorrect password.",
+            )
+        with self._lock:
+            user["password"] = hash_password(new_password)
+
+    def delete_user(self, request: Request) -> None:
+        user, _ = self._authorize(request)
+        with self._lock:
+            for (user_id, product_id), review_id in list(self._user_reviews.items()):
+                if user_id == user["id"]:
+                    self._remove_review(self._reviews[review_id])
+            self._carts.pop(user["id"], None)
+            self._favorites.pop(user["id"], None)
+            self._users_by_id.pop(user["id"], None)
+            self._users.pop(user["email"].lower(), None)
+            self._deleted_emails.add(user["email"].lower())
+
+    def get_avatar(self, request: Request) -> str:
+        user, _ = self._authorize(request)
+        return user["avatarLink"]
+
+    def post_avatar(self, request: Request) -> None:
+        user, _ = self._authorize(request)
+        content_type = request.headers.get("Content-Type", "")
+        if not content_type.startswith("multipart/") and request.body.startswith(b"--"):
+            # UsersAPI sends the multipart body with "Content-Type: application/json"
+            boundary = request.body.split(b"\r\n", 1)[0][2:].decode()
+            content_type = f'multipart/form-data; boundary="{boundary}"'
+        message = BytesParser(policy=default_policy).parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode() + request.body
+        )
+        parts = message.iter_parts() if message.is_multipart() else ()
+        files = [
+            part
+            for part in parts
+            if part.get_param("name", header="content-disposition") == "file"
+        ]
+        if not files or not files[0].get_filename():
+            raise ApiError(400, "File is the mandatory attribute")
+        with self._lock:
+            user["avatarLink"] = f"/avatars/{user['id']}/{files[0].get_filename()}"
+
+    # Products
+
+    def _product(self, product_id: str) -> dict:
+        product = self.products.get(_check_uuid(product_id))
+        if product is None:
+            raise ApiError(
+                404, f"The product with productId = {product_id} is not found."
+            )
+        return product
+
+    def get_products(self, request: Request) -> dict:
+        sort_attribute = request.arg("sort_attribute", "name")
+        direction = request.arg("sort_direction", "desc").lower()
+        if direction not in ("asc", "desc"):
+            raise ApiError(400, f"Invalid sort direction: {direction}")
+        with self._lock:
+            products = list(self.products.values())
+        if products and sort_attribute not in products[0]:
+            raise ApiError(400, f"Invalid sort attribute: {sort_attribute}")
+        # Ties are ordered by id, as the positions of CatalogSnapshot
+        products.sort(
+            key=lambda p: (p[sort_attribute] is None, p[sort_attribute] or 0, p["id"])
+            if sort_attribute != "name"
+            else (False, p["name"], p["id"]),
+            reverse=direction == "desc",
+        )
+        page, info = _page(
+            products, request.arg("page", 0, int), request.arg("size", 50, int)
+        )
+        return {"products": page, **info}
+
+    def get_product(self, request: Request) -> dict:
+        return self._product(request.params["product_id"])
+
+    # Shopping cart
+
+    def _cart(self, user: dict) -> dict:
+        if user["id"] not in self._carts:
+            self._carts[user["id"]] = {
+                "id": str(uuid.uuid4()),
+                "userId": user["id"],
+                "items": {},
+                "createdAt": _created_at(),
+                "closedAt": None,
+            }
+        return self._carts[user["id"]]
+
+    def _cart_dto(self, cart: dict) -> dict:
+        items = [
+            {
+                "id": item_id,
+                "productInfo": self.products[item["productId"]],
+                "productQuantity": item["productQuantity"],
+            }
+            for item_id, item in cart["items"].items()
+        ]
+        return {
+            "id": cart["id"],
+            "userId": cart["userId"],
+            "items": items,
+            "itemsQuantity": len(items),
+            "itemsTotalPrice": round(
+                sum(i["productInfo"]["price"] * i["productQuantity"] for i in items), 2
+            ),
+            "productsQuantity": sum(i["productQuantity"] for i in items),
+            "createdAt": cart["createdAt"],
+            "closedAt": cart["closedAt"],
+        }
+
+    def get_cart(self, request: Request) -> dict:
+        user, _ = self._authorize(request)
+        with self._lock:
+            return self._cart_dto(self._cart(user))
+
+    def add_cart_items(self, request: Request) -> dict:
+        user, _ = self._authorize(request)
+        items = request.json().get("items") or []
+        for item in items:
+            _check_uuid(item.get("productId"))
+            quantity = item.get("productQuantity")
+            if not isinstance(quantity, int) or quantity < 1:
+                raise ApiError(400, f"Invalid product quantity = {quantity}")
+        with self._lock:
+            cart = self._cart(user)
+            by_product = {i["productId"]: i for i in cart["items"].values()}
+            for item in items:
+                product_id = item["productId"].lower()
+                # Products which do not exist are skipped as by the real backend
+                if product_id not in self.products:
+                    continue
+                if product_id in by_product:
+                    by_product[product_id]["productQuantity"] += item["productQuantity"]
+                else:
+                    by_product[product_id] = cart["items"][str(uuid.uuid4())] = {
+                        "productId": product_id,
+                        "productQuantity": item["productQuantity"],
+                    }
+            return self._cart_dto(cart)
+
+    def update_cart_item(self, request: Request) -> dict:
+        user, _ = self._authorize(request)
+        body = request.json()
+        item_id = _check_uuid(body.get("shoppingCartItemId"))
+        change = body.get("productQuantityChange")
+        with self._lock:
+            cart = self._cart(user)
+            item = cart["items"].get(item_id)
+            if item is None:
+                raise ApiError(
+                    404,
+                    f"The shopping cart item with shoppingCartItemId = "
+                    f"{body['shoppingCartItemId']} is not found.",
+                )
+            quantity = item["productQuantity"] + (change or 0)
+            if not isinstance(change, int) or not change or quantity < 1:
+                raise ApiError(
+                    400,
+                    f"Invalid product quantity = {quantity} or product quantity without changes",
+                )
+            item["productQuantity"] = quantity
+            return self._cart_dto(cart)
+
+    def delete_cart_items(self, request: Request) -> dict:
+        user, _ = self._authorize(request)
+        item_ids = [
+            _check_uuid(i) for i in request.json().get("shoppingCartItemIds") or []
+        ]
+        with self._lock:
+            cart = self._cart(user)
+            for item_id in item_ids:
+                cart["items"].pop(item_id, None)
+            return self._cart_dto(cart)
+
+    # Favorites
+
+    def _favorites_dto(self, user: dict) -> dict:
+        product_ids = self._favorites.get(user["id"], {})
+        return {"products": [self.products[p] for p in product_ids]}
+
+    def get_favorites(self, request: Request) -> dict:
+        user, _ = self._authorize(request)
+        with self._lock:
+            return self._favorites_dto(user)
+
+    def add_favorites(self, request: Request) -> dict:
+        user, _ = self._authorize(request)
+        product_ids = [_check_uuid(p) for p in request.json().get("productIds") or []]
+        with self._lock:
+            favorites = self._favorites.setdefault(user["id"], {})
+            for product_id in product_ids:
+                if product_id in self.products:
+                    favorites[product_id] = None
+            return self._favorites_dto(user)
+
+    def delete_favorite(self, request: Request) -> dict:
+        user, _ = self._authorize(request)
+        product_id = _check_uuid(request.params["product_id"])
+        with self._lock:
+            self._favorites.get(user["id"], {}).pop(product_id, None)
+            return self._favorites_dto(user)
+
+    # Reviews
+
+    def _review_dto(self, review: dict) -> dict:
+        return {key: value for key, value in review.items() if not key.startswith("_")}
+
+    def _update_rating(self, product_id: str) -> None:
+        ratings = [
+            self._reviews[r]["productRating"] for r in self._product_reviews[product_id]
+        ]
+        product = self.products[product_id]
+        product["reviewsCount"] = len(ratings)
+        product["averageRating"] = (
+            round(sum(ratings) / len(ratings), 1) if ratings else None
+        )
+
+    def _remove_review(self, review: dict) -> None:
+        product_id = review["productId"]
+        del self._reviews[review["productReviewId"]]
+        del self._product_reviews[product_id][review["productReviewId"]]
+        del self._user_reviews[(review["_userId"], product_id)]
+        self._update_rating(product_id)
+
+    def get_reviews(self, request: Request) -> dict:
+        product = self._product(request.params["product_id"])
+        sort_attribute = request.arg("sort_attribute", "createdAt")
+        direction = request.arg("sort_direction", "desc").lower()
+        ratings = request.arg("product_ratings")
+        ratings = {int(r) for r in ratings.split(",")} if ratings else None
+        with self._lock:
+            reviews = [self._reviews[r] for r in self._product_reviews[product["id"]]]
+        if ratings:
+            reviews = [r for r in reviews if r["productRating"] in ratings]
+        if reviews and sort_attribute not in reviews[0]:
+            raise ApiError(400, f"Invalid sort attribute: {sort_attribute}")
+        reviews.sort(
+            key=lambda r: (r[sort_attribute], r["_sequence"]),
+            reverse=direction == "desc",
+        )
+        page, info = _page(
+            reviews, request.arg("page", 0, int), request.arg("size", 10, int)
+        )
+        return {"reviewsWithRatings": [self._review_dto(r) for r in page], **info}
+
+    def add_review(self, request: Request) -> dict:
+        user, _ = self._authorize(request)
+        product = self._product(request.params["product_id"])
+        body = request.json()
+        text, rating = body.get("text"), body.get("rating")
+        if text in (None, "") or rating in (None, ""):
+            raise ApiError(400, "Rating or review should be filled in")
+        if not isinstance(rating, int) or isinstance(rating, bool):
+            raise ApiError(400, f"Invalid rating: {rating}")
+        if rating < 1:
+            raise ApiError(400, "ErrorMessage: must be greater than or equal to 1")
+        if rating > 5:
+            raise ApiError(400, "ErrorMessage: must be less than or equal to 5")
+        if not isinstance(text, str) or len(text) > REVIEW_MAX_LENGTH:
+            raise ApiError(
+                400, f"ErrorMessage: size must be between 1 and {REVIEW_MAX_LENGTH}"
+            )
+        if not _is_valid_review_text(text):
+            raise ApiError(400, "Invalid data")
+
+        with self._lock:
+            if previous := self._user_reviews.get((user["id"], product["id"])):
+                raise ApiError(
+                    400,
+                    "Creation of the product's review for the user with "
+                    f"userId = {user['id']} and the product with productId = {product['id']} "
+                    f"is denied. Delete the previous product's review {previous} first.",
+                )
+            self._review_sequence += 1
+            review = {
+                "productReviewId": str(uuid.uuid4()),
+                "productId": product["id"],
+                "text": text,
+                "productRating": rating,
+                "likesCount": 0,
+                "dislikesCount": 0,
+                "createdAt": _created_at(),
+                "userName": user["firstName"],
+                "userLastname": user["lastName"],
+                "_userId": user["id"],
+                "_sequence": self._review_sequence,
+                "_votes": {},
+            }
+            self._reviews[review["productReviewId"]] = review
+            self._product_reviews[product["id"]][review["productReviewId"]] = None
+            self._user_reviews[(user["id"], product["id"])] = review["productReviewId"]
+            self._update_rating(product["id"])
+            return self._review_dto(review)
+
+    def _review(self, product: dict, review_id: str) -> dict:
+        review = self._reviews.get(_check_uuid(review_id))
+        if review is None or review["productId"] != product["id"]:
+            raise ApiError(
+                404,
+                f"The product's review with productReviewId = {review_id} is not found.",
+            )
+        return review
+
+    def delete_review(self, request: Request) -> None:
+        user, _ = self._authorize(request)
+        product = self._product(request.params["product_id"])
+        with self._lock:
+            review = self._review(product, request.params["review_id"])
+            if review["_userId"] != user["id"]:
+                raise ApiError(
+                    404,
+                    f"The product's review with productReviewId = "
+                    f"{request.params['review_id']} is not found.",
+                )
+            self._remove_review(review)
+
+    def get_user_review(self, request: Request) -> dict:
+        user, _ = self._authorize(request)
+        product = self._product(request.params["product_id"])
+        with self._lock:
+            review_id = self._user_reviews.get((user["id"], product["id"]))
+            if review_id:
+                return self._review_dto(self._reviews[review_id])
+        return {
+            "productReviewId": None,
+            "productId": product["id"],
+            "text": None,
+            "productRating": None,
+            "likesCount": None,
+            "dislikesCount": None,
+            "createdAt": None,
+            "userName": None,
+            "userLastname": None,
+        }
+
+    def rate_review(self, request: Request) -> dict:
+        user, _ = self._authorize(request)
+        product = self._product(request.params["product_id"])
+        is_like = request.json().get("isLike")
+        if not isinstance(is_like, bool):
+            raise ApiError(400, "isLike is the mandatory attribute")
+        with self._lock:
+            review = self._review(product, request.params["review_id"])
+            votes = review["_votes"]
+            votes[user["id"]] = is_like
+            review["likesCount"] = sum(votes.values())
+            review["dislikesCount"] = len(votes) - review["likesCount"]
+            return self._review_dto(review)
+
+    def get_review_statistics(self, request: Request) -> dict:
+        product = self._product(request.params["product_id"])
+        with self._lock:
+            ratings = [
+                self._reviews[r]["productRating"]
+                for r in self._product_reviews[product["id"]]
+            ]
+            return {
+                "productId": product["id"],
+                "avgRating": product["averageRating"],
+                "reviewsCount": product["reviewsCount"],
+                "ratingMap": {f"star{i}": ratings.count(i) for i in range(1, 6)},
+            }
+
+
+# (method, path after /api/v1, handler of FakeStore, status code of success)
+ROUTES = [
+    ("POST", r"/auth/authenticate", "authenticate", 200),
+    ("POST", r"/auth/register", "register", 200),
+    ("POST", r"/auth/confirm", "confirm", 201),
+    ("POST", r"/auth/refresh", "refresh", 200),
+    ("POST", r"/auth/logout", "logout", 200),
+    ("POST", r"/auth/password/forgot", "forgot_password", 200),
+    ("POST", r"/auth/password/change", "change_password_through_reset", 200),
+    ("GET", r"/users", "get_user", 200),
+    ("PUT", r"/users", "update_user", 200),
+    ("PATCH", r"/users", "change_password", 200),
+    ("DELETE", r"/users", "delete_user", 200),
+    ("GET", r"/users/avatar", "get_avatar", 200),
+    ("POST", r"/users/avatar", "post_avatar", 200),
+    ("GET", r"/products", "get_products", 200),
+    ("GET", r"/products/(?P<product_id>[^/]*)", "get_product", 200),
+    ("GET", r"/products/(?P<product_id>[^/]*)/reviews", "get_reviews", 200),
+    ("POST", r"/products/(?P<product_id>[^/]*)/reviews", "add_review", 200),
+    (
+        "GET",
+        r"/products/(?P<product_id>[^/]*)/reviews/statistics",
+        "get_review_statistics",
+        200,
+    ),
+    (
+        "DELETE",
+        r"/products/(?P<product_id>[^/]*)/reviews/(?P<review_id>[^/]*)",
+        "delete_review",
+        200,
+    ),
+    (
+        "POST",
+        r"/products/(?P<product_id>[^/]*)/reviews/(?P<review_id>[^/]*)/rate",
+        "rate_review",
+        200,
+    ),
+    ("GET", r"/products/(?P<product_id>[^/]*)/review", "get_user_review", 200),
+    ("GET", r"/cart", "get_cart", 200),
+    ("POST", r"/cart/items", "add_cart_items", 200),
+    ("PATCH", r"/cart/items", "update_cart_item", 200),
+    ("DELETE", r"/cart/items", "delete_cart_items", 200),
+    ("GET", r"/favorites", "get_favorites", 200),
+    ("POST", r"/favorites", "add_favorites", 200),
+    ("DELETE", r"/favorites/(?P<product_id>[^/]*)", "delete_favorite", 200),
+]
+API_PREFIX = "/api/v1"
+_ROUTES = [
+    (method, re.compile(path), handler, status)
+    for method, path, handler, status in ROUTES
+]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """HTTP/1.1 keep-alive front of FakeStore"""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "FakeIcedLatte"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format: str, *args) -> None:
+        logging.debug(f"Fake backend: {format % args}")
+
+    def _send(self, status: int, payload: Any) -> None:
+        body = b"" if payload is None else json.dumps(payload).encode()
+        self.send_response(status)
+        if payload is not None:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _dispatch(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        url = urlsplit(self.path)
+        # HOST may contain a prefix, e.g. https://iced-latte.uk/backend
+        prefix = url.path.find(API_PREFIX + "/")
+        path = url.path[prefix + len(API_PREFIX) :] if prefix >= 0 else None
+
+        payload = ApiError(404, f"No endpoint {self.command} {url.path}")
+        for method, pattern, handler, success in _ROUTES if path is not None else ():
+            if not (match := pattern.fullmatch(path)):
+                continue
+            if method != self.command:
+                payload = ApiError(405, f"Method {self.command} is not supported")
+                continue
+            request = Request(
+                self.command,
+                url.path,
+                match.groupdict(),
+                parse_qs(url.query, keep_blank_values=True),
+                self.headers,
+                body,
+            )
+            try:
+                status, payload = success, getattr(self.server.store, handler)(request)
+            except ApiError as e:
+                status, payload = e.status, e
+            except Exception:
+                logging.exception(f"Fake backend failed on {self.command} {self.path}")
+                status, payload = 500, ApiError(500, "Internal server error")
+            break
+
+        if isinstance(payload, ApiError):
+            status, payload = payload.status, payload.body()
+        self._send(status, payload)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _dispatch
+
+
+class _Server(ThreadingHTTPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+    # Enough backlog for the load tests opening many connections at once
+    request_queue_size = 1024
+
+    def __init__(self, address: tuple, store: FakeStore):
+        super().__init__(address, _Handler)
+        self.store = store
+
+
+class FakeBackend:
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 0,
+        store: Optional[FakeStore] = None,
+        smtp_port: Optional[int] = None,
+    ):
+        """In-process fake of the Iced Latte backend for offline runs and benchmarks
+
+        Serves the endpoints used by framework/endpoints from an in-memory
+        FakeStore and issues HS256 tokens signed with JWT_SECRET, so the tokens
+        of generate_jwt_token are accepted too.
+
+        Args:
+            host:      address to listen on;
+            port:      port to listen on, 0 for a free one;
+            store:     state of the backend, a new one with generated catalogue if None;
+            smtp_port: port of SMTP server on localhost receiving the codes
+                       (e.g. the local mail sink), the codes are only logged if None.
+        """
+        self.store = store or FakeStore()
+        if smtp_port:
+            self.store.mailer = smtp_mailer("localhost", smtp_port)
+        self._server = _Server((host, port), self.store)
+        self.port = self._server.server_address[1]
+        self.url = (
+            f"http://{'localhost' if host in ('', '0.0.0.0') else host}:{self.port}"
+        )
+        self._thread: Optional[threading.Thread] = None
+
+    def serve_forever(self) -> None:
+        """Serving requests in the current thread until close()"""
+        self._server.serve_forever()
+
+    def start(self) -> "FakeBackend":
+        """Serving requests in background thread"""
+        self._thread = threading.Thread(
+            target=self.serve_forever, name="fake-backend", daemon=True
+        )
+        self._thread.start()
+        logging.info(f"Fake backend started on {self.url}")
+        return self
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        logging.info("Fake backend stopped")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake Iced Latte backend")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8083)
+    parser.add_argument("--products", type=int, default=300, help="size of catalogue")
+    parser.add_argument("--seed", type=int, default=0, help="seed of catalogue")
+    parser.add_argument(
+        "--smtp-port", type=int, help="port of SMTP server on localhost for the codes"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    store = FakeStore(products=generate_products(args.products, args.seed))
+    backend = FakeBackend(args.host, args.port, store, args.smtp_port)
+    logging.info(f"Fake backend serves {backend.url}")
+    try:
+        backend.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
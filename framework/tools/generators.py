@@ -2,17 +2,99 @@ import base64
 import datetime
 import random
 import string
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from random import choice
-from typing import Optional, Any
+from typing import Optional, Any, Iterable, Iterator
 
 import bcrypt
 import jwt
 from faker import Faker
 
-from configs import DEFAULT_PASSWORD, JWT_SECRET
+from configs import (
+    DEFAULT_PASSWORD,
+    JWT_SECRET,
+    BCRYPT_CACHE_SIZE,
+    TEST_USER_BCRYPT_ROUNDS,
+)
+from framework.clients.cassette import generated_ids
 
 faker = Faker()
 
+_password_hashes = OrderedDict()
+_password_hashes_lock = threading.Lock()
+
+
+def _hashpw(password: str, rounds: int) -> str:
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds)).decode()
+
+
+def _cache_password_hash(key: tuple, password_hash: str) -> None:
+    with _password_hashes_lock:
+        _password_hashes[key] = password_hash
+        _password_hashes.move_to_end(key)
+        while len(_password_hashes) > BCRYPT_CACHE_SIZE:
+            _password_hashes.popitem(last=False)
+
+
+def hash_password(password: str, rounds: int = TEST_USER_BCRYPT_ROUNDS) -> str:
+    """Hashing a password with bcrypt, the hash of the same password is reused
+
+    A bcrypt hash carries its own salt, so one hash is valid for any number of users.
+
+    Args:
+        password: password for hashing;
+        rounds:   bcrypt cost factor.
+    """
+    key = (password, rounds)
+    with _password_hashes_lock:
+        if key in _password_hashes:
+            _password_hashes.move_to_end(key)
+            return _password_hashes[key]
+
+    password_hash = _hashpw(password, rounds)
+    _cache_password_hash(key, password_hash)
+
+    return password_hash
+
+
+def hash_passwords(
+    passwords: Iterable[str],
+    rounds: int = TEST_USER_BCRYPT_ROUNDS,
+    processes: Optional[int] = None,
+) -> dict:
+    """Hashing distinct passwords in a process pool
+
+    Args:
+        passwords: passwords for hashing, duplicates are hashed once;
+        rounds:    bcrypt cost factor;
+        processes: number of processes, CPU count by default.
+
+    Returns:
+        {password: hash}
+    """
+    hashes = {}
+    missing = []
+    with _password_hashes_lock:
+        for password in dict.fromkeys(passwords):
+            if (password, rounds) in _password_hashes:
+                hashes[password] = _password_hashes[(password, rounds)]
+            else:
+                missing.append(password)
+
+    if missing:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            for password, password_hash in zip(
+                missing, executor.map(_hashpw, missing, repeat(rounds))
+            ):
+                hashes[password] = password_hash
+                _cache_password_hash((password, rounds), password_hash)
+
+    return hashes
+
 
 def generate_string(length: int, additional_characters: list = None) -> str:
     """Generating a string of the specified length with the possibility of adding special characters
@@ -34,6 +116,7 @@ def generate_user(
     password: str = DEFAULT_PASSWORD,
     with_address: bool = False,
     email: Optional[str] = None,
+    bcrypt_rounds: int = TEST_USER_BCRYPT_ROUNDS,
     **kwargs,
 ):
     """
@@ -45,12 +128,13 @@ def generate_user(
         last_name_length: Optional[int] - Length of the last name.
         password: password for user.
         with_address: Include address information if True.
+        bcrypt_rounds: bcrypt cost factor for hash of password.
         **kwargs: Additional attributes to override.
 
     Returns:
         dict: Generated user data.
     """
-    encrypted_password = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+    encrypted_password = hash_password(password, rounds=bcrypt_rounds)
 
     user_data = {
         "id": faker.uuid4(),
@@ -77,10 +161,93 @@ def generate_user(
         }
 
     user_data.update(kwargs)
+    generated_ids.add(user_data["id"], user_data["stripeCustomerToken"])
 
     return user_data
 
 
+def to_db_user(user: dict) -> dict:
+    """Renaming keys of a generated user to the columns of user_details
+
+    Args:
+        user: user from generate_user() or generate_users()
+    """
+    key_mapping = {
+        "firstName": "first_name",
+        "lastName": "last_name",
+        "birthDate": "birth_date",
+        "phoneNumber": "phone_number",
+        "stripeCustomerToken": "stripe_customer_token",
+    }
+    return {key_mapping.get(k, k): v for k, v in user.items()}
+
+
+def _person_provider(fake: Faker):
+    return next(
+        provider
+        for provider in fake.get_providers()
+        if type(provider).__module__.startswith("faker.providers.person")
+    )
+
+
+def generate_users(
+    n: int,
+    seed: Optional[int] = None,
+    password: str = DEFAULT_PASSWORD,
+    email_domain: str = "example.com",
+    bcrypt_rounds: int = TEST_USER_BCRYPT_ROUNDS,
+    batch_size: int = 1000,
+) -> Iterator[dict]:
+    """Lazily generating users with the same fields as generate_user()
+
+    Random values are drawn in batches from one seeded generator and one
+    Faker provider set, so memory does not depend on n and the same seed
+    gives the same users. The users are inserted straight into the DB and their
+    ids are never sent to the API, so unlike generate_user() they are not added
+    to generated_ids of the cassettes.
+
+    Args:
+        n:             number of users;
+        seed:          seed for reproducible users, random if None;
+        password:      password for all users, hashed once;
+        email_domain:  domain of generated emails;
+        bcrypt_rounds: bcrypt cost factor for hash of password;
+        batch_size:    number of users drawn at once.
+    """
+    rng = random.Random(seed)
+    person = _person_provider(Faker())
+    first_names, first_weights = zip(*person.first_names.items())
+    last_names, last_weights = zip(*person.last_names.items())
+    today = datetime.date.today().toordinal()
+    encrypted_password = hash_password(password, rounds=bcrypt_rounds)
+
+    for start in range(0, n, batch_size):
+        size = min(batch_size, n - start)
+        firsts = rng.choices(first_names, weights=first_weights, k=size)
+        lasts = rng.choices(last_names, weights=last_weights, k=size)
+        ids = [str(uuid.UUID(int=rng.getrandbits(128), version=4)) for _ in range(size)]
+        tokens = [
+            str(uuid.UUID(int=rng.getrandbits(128), version=4)) for _ in range(size)
+        ]
+        birth_days = [today - rng.randint(18 * 365, 80 * 365) for _ in range(size)]
+        phones = [rng.randint(2_000_000_000, 9_999_999_999) for _ in range(size)]
+
+        for i in range(size):
+            yield {
+                "id": ids[i],
+                "firstName": firsts[i],
+                "lastName": lasts[i],
+                "email": f"{firsts[i]}.{lasts[i]}.{ids[i][:8]}@{email_domain}".lower(),
+                "birthDate": datetime.date.fromordinal(birth_days[i]).strftime(
+                    "%Y-%m-%d"
+                ),
+                "phoneNumber": f"+1{phones[i]}",
+                "stripeCustomerToken": tokens[i],
+                "password": password,
+                "hashed_password": encrypted_password,
+            }
+
+
 def generate_jwt_token(email: str = "", expired: bool = False) -> str:
     """Generating a JWT token
 
@@ -0,0 +1,348 @@
+"""Load of the backend by the scenarios of framework/steps/load_scenarios.py
+
+Run from the root directory, e.g. 20 users for a minute against the in-process fake backend:
+    python -m framework.tools.load_runner --fake --users 20 --ramp-up 10 --duration 60
+or 50 iterations per second (open model) against HOST of configs:
+    python -m framework.tools.load_runner --rate 50 --users 100 --duration 60
+"""
+import argparse
+import logging
+import math
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+from framework.clients.http_client import endpoint_name, get_http_client
+from framework.clients.latency_histogram import LatencyRecorder, expected_interval
+from framework.queries.connections import connect_to_postgres
+from framework.steps.load_scenarios import SCENARIOS, LoadAPI, VirtualUser
+from framework.tools.fake_backend import FakeBackend, FakeStore, generate_products
+from framework.tools.generators import generate_users, to_db_user
+
+
+class LoadStats:
+    def __init__(self):
+        """Requests per endpoint and iterations of scenario collected during the load"""
+        self._lock = threading.Lock()
+        self.latencies = LatencyRecorder()
+        self.iterations = 0
+        self.failures: Counter = Counter()
+        self.dropped = 0
+        self.start_lag = 0.0
+
+    def record_request(
+        self, method: str, url: str, status: Optional[int], seconds: float
+    ) -> None:
+        """Listener of HttpClient, see HttpClient.add_listener"""
+        self.latencies.record(endpoint_name(method, url), status, seconds)
+
+    def record_iteration(self, error: Optional[Exception], lag: float = 0.0) -> None:
+        """Registering a finished iteration of scenario
+
+        Args:
+            error: exception of failed iteration, None if it passed;
+            lag:   delay of the start after the planned time in open model, seconds.
+        """
+        with self._lock:
+            self.iterations += 1
+            self.start_lag = max(self.start_lag, lag)
+            if error is not None:
+                self.failures[type(error).__name__] += 1
+
+    def report(self, duration: float) -> str:
+        """Throughput and latency per endpoint
+
+        Args:
+            duration: duration of the load, seconds
+        """
+        endpoints = self.latencies.by_endpoint()
+        errors: Counter = Counter()
+        for (endpoint, status), histogram in self.latencies.histograms().items():
+            if status is None or status >= 400:
+                errors[endpoint] += histogram.measured
+        with self._lock:
+            failed = sum(self.failures.values())
+            reasons = ", ".join(f"{name}: {n}" for name, n in self.failures.items())
+            lines = [
+                f"iterations: {self.iterations} ({self.iterations / duration:.1f}/s), "
+                f"failed: {failed}{f' ({reasons})' if reasons else ''}",
+            ]
+            if self.dropped or self.start_lag:
+                lines.append(
+                    f"not started in time: {self.dropped}, "
+                    f"maximum start lag: {self.start_lag * 1000:.0f} ms"
+                )
+        lines.append(
+            f"{'endpoint':<48}{'requests':>9}{'errors':>8}{'req/s':>8}{'mean':>8}"
+            f"{'p50':>8}{'p90':>8}{'p99':>8}{'p99.9':>8}{'max':>8}  (ms)"
+        )
+        for endpoint in sorted(endpoints):
+            histogram = endpoints[endpoint]
+            row = [histogram.mean()]
+            row += [histogram.percentile(q) for q in (50, 90, 99, 99.9)]
+            row.append(histogram.max / 1_000_000)
+            lines.append(
+                f"{endpoint:<48}{histogram.measured:>9}{errors[endpoint]:>8}"
+                f"{histogram.measured / duration:>8.1f}"
+                + "".join(f"{value * 1000:>8.1f}" for value in row)
+            )
+        return "\n".join(lines)
+
+
+class LoadRunner:
+    def __init__(
+        self,
+        scenario: Callable[[VirtualUser], None],
+        duration: float,
+        ramp_up: float = 0.0,
+        rate: Optional[float] = None,
+        think_time: float = 0.0,
+    ):
+        """Running a scenario by virtual users
+
+        Closed model (rate is None): every user repeats the scenario until the end,
+        the users are started evenly during ramp-up.
+        Open model: iterations are started at the given rate by free users
+        regardless of the response time, the rate grows linearly from 0 during ramp-up.
+
+        Args:
+            scenario:   function of the virtual user, see load_scenarios.SCENARIOS;
+            duration:   duration of the load including ramp-up, seconds;
+            ramp_up:    time of reaching the full load, seconds;
+            rate:       iterations per second of open model;
+            think_time: pause of a user between iterations in closed model, seconds.
+        """
+        self.scenario = scenario
+        self.duration = duration
+        self.ramp_up = min(ramp_up, duration)
+        self.rate = rate
+        self.think_time = think_time
+        self.stats = LoadStats()
+
+    def _iterate(self, vu: VirtualUser, lag: float = 0.0) -> None:
+        try:
+            self.scenario(vu)
+        except Exception as e:
+            logging.debug(f"Iteration of {vu.user['email']} failed: {e!r}")
+            self.stats.record_iteration(e, lag)
+        else:
+            self.stats.record_iteration(None, lag)
+
+    def run(self, users: List[VirtualUser]) -> LoadStats:
+        """Running the load and collecting statistics of requests of the process
+
+        Args:
+            users: authenticated virtual users, their number is the maximum concurrency
+        """
+        if not users:
+            raise ValueError("At least one virtual user is needed")
+        client = get_http_client()
+        client.add_listener(self.stats.record_request)
+        try:
+            if self.rate:
+                self._run_open(users)
+            else:
+                self._run_closed(users)
+        finally:
+            client.remove_listener(self.stats.record_request)
+        return self.stats
+
+    def _run_closed(self, users: List[VirtualUser]) -> None:
+        start = time.perf_counter()
+        deadline = start + self.duration
+
+        def loop(vu: VirtualUser, delay: float) -> None:
+            time.sleep(delay)
+            while time.perf_counter() < deadline:
+                self._iterate(vu)
+                if self.think_time:
+                    time.sleep(
+                        max(min(self.think_time, deadline - time.perf_counter()), 0)
+                    )
+
+        step = self.ramp_up / len(users)
+        threads = [
+            threading.Thread(target=loop, args=(vu, i * step), name=f"vu-{i}")
+            for i, vu in enumerate(users)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def arrival_time(self, k: int) -> float:
+        """Planned start of the k-th iteration of open model since the start of load
+
+        The rate grows as rate * t / ramp_up during ramp-up, so
+        the number of started iterations is rate * t**2 / (2 * ramp_up).
+        """
+        if self.ramp_up and k < self.rate * self.ramp_up / 2:
+            return math.sqrt(2 * self.ramp_up * k / self.rate)
+        return k / self.rate + self.ramp_up / 2
+
+    def rate_at(self, t: float) -> float:
+        """Iterations per second of open model at t seconds since the start of load"""
+        if self.ramp_up and t < self.ramp_up:
+            return self.rate * t / self.ramp_up
+        return self.rate
+
+    def _run_open(self, users: List[VirtualUser]) -> None:
+        free = queue.SimpleQueue()
+        for vu in users:
+            free.put(vu)
+
+        def iterate(planned: float) -> bool:
+            # Every user gets one of len(users) iterations, so a response slower than
+            # the interval between its iterations delays the next ones (coordinated omission)
+            rate = self.rate_at(planned - start)
+            interval = len(users) / rate if rate else 0.0
+            vu = free.get()
+            try:
+                if time.perf_counter() >= deadline:
+                    # Waited for a free user until the end of load, not started
+                    return False
+                lag = time.perf_counter() - planned
+                with expected_interval(interval, start_lag=lag):
+                    self._iterate(vu, lag=lag)
+                return True
+            finally:
+                free.put(vu)
+
+        start = time.perf_counter()
+        deadline = start + self.duration
+        futures = []
+        with ThreadPoolExecutor(
+            max_workers=len(users), thread_name_prefix="vu"
+        ) as executor:
+            k = 0
+            while (planned := start + self.arrival_time(k)) < deadline:
+                time.sleep(max(planned - time.perf_counter(), 0))
+                futures.append(executor.submit(iterate, planned))
+                k += 1
+        self.stats.dropped = sum(not future.result() for future in futures)
+
+
+def create_users(
+    quantity: int, store: Optional[FakeStore] = None, seed: Optional[int] = None
+) -> List[dict]:
+    """Creating users of load in the fake backend or in DB of the backend
+
+    Args:
+        quantity: number of users;
+        store:    storage of the in-process fake backend, DB through ssh if None;
+        seed:     seed for reproducible users.
+    """
+    users = list(generate_users(quantity, seed=seed))
+    if store:
+        for user in users:
+            store.add_user(user)
+        return users
+
+    postgres = connect_to_postgres()
+    try:
+        postgres.create_users(map(to_db_user, users))
+    finally:
+        postgres.close()
+    return users
+
+
+def delete_users(users: List[dict]) -> None:
+    """Removing the users of load and their carts, favorites and reviews from DB"""
+    postgres = connect_to_postgres()
+    try:
+        purged = postgres.purge_users(
+            user_ids=[user["id"] for user in users], emails=[], email_patterns=[]
+        )
+        logging.info(f"Users of load removed: {purged}")
+    finally:
+        postgres.close()
+
+
+def authenticate(api: LoadAPI, users: List[dict]) -> List[str]:
+    """Getting tokens of the users in parallel"""
+
+    def token(user: dict) -> str:
+        response = api.auth.authentication(
+            email=user["email"], password=user["password"]
+        )
+        return response.json()["token"]
+
+    with ThreadPoolExecutor(max_workers=min(len(users), 20)) as executor:
+        return list(executor.map(token, users))
+
+
+def positive_int(value: str) -> int:
+    """Type of argparse arguments which must be at least 1"""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="mixed")
+    parser.add_argument(
+        "--users",
+        type=positive_int,
+        default=10,
+        help="virtual users (maximum concurrency)",
+    )
+    parser.add_argument(
+        "--duration", type=float, default=60, help="seconds including ramp-up"
+    )
+    parser.add_argument("--ramp-up", type=float, default=0, help="seconds")
+    parser.add_argument("--rate", type=float, help="iterations per second (open model)")
+    parser.add_argument(
+        "--think-time", type=float, default=0, help="seconds (closed model)"
+    )
+    parser.add_argument(
+        "--fake", action="store_true", help="load the in-process fake backend"
+    )
+    parser.add_argument(
+        "--products", type=int, default=300, help="catalogue of the fake backend"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    backend = None
+    if args.fake:
+        store = FakeStore(products=generate_products(args.products, seed=args.seed))
+        backend = FakeBackend(store=store).start()
+    api = LoadAPI(host=backend.url if backend else None)
+    users = create_users(args.users, store=backend.store if backend else None)
+    try:
+        tokens = authenticate(api, users)
+        products = api.products.get_all(params={"page": 0, "size": 100}).json()
+        product_ids = [product["id"] for product in products["products"]]
+        virtual_users = [
+            VirtualUser(api, user, token, product_ids, seed=args.seed + i)
+            for i, (user, token) in enumerate(zip(users, tokens))
+        ]
+        runner = LoadRunner(
+            SCENARIOS[args.scenario],
+            duration=args.duration,
+            ramp_up=args.ramp_up,
+            rate=args.rate,
+            think_time=args.think_time,
+        )
+        model = f"{args.rate}/s open model" if args.rate else "closed model"
+        logging.info(
+            f"Scenario {args.scenario}: {args.users} users, {model}, "
+            f"ramp-up {args.ramp_up}s, duration {args.duration}s"
+        )
+        stats = runner.run(virtual_users)
+        print(stats.report(args.duration))
+    finally:
+        if backend:
+            backend.close()
+        else:
+            delete_users(users)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,45 +1,168 @@
+import gzip
 import json
+import threading
+from typing import List, Optional
 
 import curlify
 import allure
 from allure_commons.types import AttachmentType
-from requests import Response
+from requests import PreparedRequest, Response
 
+from configs import ALLURE_LOG_MODE, ALLURE_LOG_MAX_BODY, ALLURE_LOG_GZIP
 
-def log_request(response: Response) -> None:
-    """Logging request and response data to Allure report"""
 
-    method, url = response.request.method, response.request.url
+def timing_parameters(response: Response) -> dict:
+    """Timings (ms) and sizes of body (bytes) of the request as parameters of Allure step
+
+    Args:
+        response: response of HttpClient with RequestTimings
+    """
+    timings = getattr(response, "timings", None)
+    if timings is None:
+        return {"total_ms": round(response.elapsed.total_seconds() * 1000, 1)}
+    return {
+        "dns_ms": round(timings.dns * 1000, 1),
+        "connect_ms": round(timings.connect * 1000, 1),
+        "tls_ms": round(timings.tls * 1000, 1),
+        "ttfb_ms": round(timings.ttfb * 1000, 1),
+        "total_ms": round(timings.total * 1000, 1),
+        "request_body_bytes": timings.request_size,
+        "response_body_bytes": timings.response_size,
+    }
+
 
-    with allure.step(f"{method} {url}"):
-        message = curlify.to_curl(response.request)
+def _attach_text(text: str, name: str, attachment_type, extension: str) -> None:
+    """Attaching a text, gzipped or truncated if it is longer than ALLURE_LOG_MAX_BODY"""
+    if len(text) <= ALLURE_LOG_MAX_BODY:
+        allure.attach(
+            body=text, name=name, attachment_type=attachment_type, extension=extension
+        )
+    elif ALLURE_LOG_GZIP:
+        allure.attach(
+            body=gzip.compress(text.encode("utf8")),
+            name=f"{name} ({len(text)} characters)",
+            extension=f"{extension}.gz",
+        )
+    else:
         allure.attach(
-            body=message.encode("utf8"),
-            name=f"Request {method} {response.status_code}",
+            body=f"{text[:ALLURE_LOG_MAX_BODY]}\n... {len(text) - ALLURE_LOG_MAX_BODY} characters truncated",
+            name=name,
             attachment_type=allure.attachment_type.TEXT,
             extension="txt",
         )
 
-        if (
-            "application/json" in response.headers.get("Content-Type", "")
-            and response.text
-        ):
-            try:
-                body = response.json()
-                allure.attach(
-                    body=json.dumps(body, indent=2),
-                    name="Response body",
-                    attachment_type=AttachmentType.JSON,
-                )
-            except json.decoder.JSONDecodeError:
-                allure.attach(
-                    body=response.text,
-                    name="Non-JSON Response body",
-                    attachment_type=allure.attachment_type.TEXT,
-                )
-        else:
-            allure.attach(
-                body=response.text,
-                name="Non-JSON Response body",
-                attachment_type=allure.attachment_type.TEXT,
+
+def _curl(request: PreparedRequest) -> str:
+    body = request.body
+    if isinstance(body, bytes):
+        try:
+            body.decode("utf8")
+        except UnicodeDecodeError:
+            # e.g. upload of avatar, curlify decodes the body as text
+            request = request.copy()
+            request.body = f"<{len(body)} bytes of binary data>"
+    return curlify.to_curl(request)
+
+
+def _render(response: Response) -> None:
+    method, url = response.request.method, response.request.url
+
+    # The parameters of a step are taken from the arguments of the decorated function,
+    # braces of URL are escaped from formatting of the title with them
+    @allure.step(f"{method} {url}".replace("{", "{{").replace("}", "}}"))
+    def request_step(**timings) -> None:
+        _attach_request(response)
+
+    request_step(**timing_parameters(response))
+
+
+def _attach_request(response: Response) -> None:
+    method = response.request.method
+    _attach_text(
+        _curl(response.request),
+        name=f"Request {method} {response.status_code}",
+        attachment_type=allure.attachment_type.TEXT,
+        extension="txt",
+    )
+
+    text = response.text
+    if "application/json" in response.headers.get("Content-Type", "") and text:
+        try:
+            # Huge bodies are not re-formatted, it takes longer than their request
+            body = (
+                json.dumps(response.json(), indent=2)
+                if len(text) <= ALLURE_LOG_MAX_BODY
+                else text
+            )
+            _attach_text(
+                body,
+                name="Response body",
+                attachment_type=AttachmentType.JSON,
+                extension="json",
             )
+            return
+        except json.decoder.JSONDecodeError:
+            pass
+    _attach_text(
+        text,
+        name="Non-JSON Response body",
+        attachment_type=allure.attachment_type.TEXT,
+        extension="txt",
+    )
+
+
+# Responses of the running test waiting for its result in "failed" ALLURE_LOG_MODE, None between tests.
+# Shared by all threads of the process: a response belongs to the test running when it is received,
+# as in http_timings_by_test, and is dropped if it is received between tests
+_deferred: Optional[List[Response]] = None
+_deferred_lock = threading.Lock()
+
+
+def log_request(response: Response) -> None:
+    """Logging request and response data with timings to Allure report
+
+    In "failed" ALLURE_LOG_MODE only the response is kept for the running test,
+    the attachments are written by flush_logged_requests() if the test fails.
+    Responses received between tests are dropped in this mode.
+    """
+    if ALLURE_LOG_MODE == "failed":
+        with _deferred_lock:
+            if _deferred is not None:
+                _deferred.append(response)
+    else:
+        _render(response)
+
+
+def start_logged_requests() -> None:
+    """Starting to keep the responses of the test, called before its setup"""
+    global _deferred
+    with _deferred_lock:
+        _deferred = []
+
+
+def flush_logged_requests() -> None:
+    """Writing the attachments of the responses kept since the start of the test or the last flush"""
+    with _deferred_lock:
+        if not _deferred:
+            return
+        responses = _deferred[:]
+        _deferred.clear()
+    for response in responses:
+        _render(response)
+
+
+def discard_logged_requests() -> None:
+    """Dropping the responses of the finished test"""
+    global _deferred
+    with _deferred_lock:
+        _deferred = None
+
+
+def attach_slow_query(query: str, seconds: float, plan: Optional[str]) -> None:
+    """Listener of QueryRecorder attaching a slow query with its plan to Allure report"""
+    text = query if plan is None else f"{query}\n\n{plan}"
+    allure.attach(
+        text,
+        name=f"Slow query {seconds * 1000:.0f} ms",
+        attachment_type=allure.attachment_type.TEXT,
+    )
@@ -0,0 +1,373 @@
+import base64
+import logging
+import re
+import socketserver
+import threading
+from collections import defaultdict
+from email.utils import parseaddr
+from typing import Callable, Dict, List, Optional, Set
+
+from imap_tools import MailMessage
+
+from configs import MAIL_WAIT_TIMEOUT
+from framework.tools.mailbox_watcher import CodeIndex
+
+
+class _StoredMessage:
+    __slots__ = ("uid", "raw", "sender", "recipients", "seen")
+
+    def __init__(self, uid: int, raw: bytes, sender: str, recipients: List[str]):
+        self.uid = uid
+        self.raw = raw
+        self.sender = sender
+        self.recipients = recipients
+        self.seen = False
+
+
+class MailStore:
+    def __init__(self, code_pattern: str = r"\d{9}"):
+        """In-memory mailbox of the local mail sink, indexed by sender and recipient
+
+        Args:
+            code_pattern: regular expression of the confirmation code in the text of message.
+        """
+        self.code_pattern = re.compile(code_pattern)
+        self.codes = CodeIndex()
+        self._lock = threading.Lock()
+        self._messages: List[_StoredMessage] = []
+        self._by_recipient: Dict[str, List[int]] = defaultdict(list)
+        self._by_sender: Dict[str, List[int]] = defaultdict(list)
+        self._subscribers: Set[Callable[[int], None]] = set()
+
+    def add(self, raw: bytes, sender: str, recipients: List[str]) -> int:
+        """Storing a received message and indexing its code
+
+        Args:
+            raw:        message in RFC 822 format;
+            sender:     envelope sender (MAIL FROM);
+            recipients: envelope recipients (RCPT TO).
+
+        Returns:
+            UID of the message
+        """
+        msg = MailMessage.from_bytes(raw)
+        sender = (msg.from_ or sender).lower()
+        recipients = [r.lower() for r in recipients] or [r.lower() for r in msg.to]
+        with self._lock:
+            uid = len(self._messages) + 1
+            self._messages.append(_StoredMessage(uid, raw, sender, recipients))
+            for recipient in recipients:
+                self._by_recipient[recipient].append(uid)
+            self._by_sender[sender].append(uid)
+            subscribers = list(self._subscribers)
+
+        if match := self.code_pattern.search(msg.text or msg.html or ""):
+            self.codes.add(recipients, sender, match.group())
+        for notify in subscribers:
+            notify(uid)
+        return uid
+
+    def get(self, uid: int) -> Optional[_StoredMessage]:
+        with self._lock:
+            if 0 < uid <= len(self._messages):
+                return self._messages[uid - 1]
+            return None
+
+    @property
+    def uid_next(self) -> int:
+        with self._lock:
+            return len(self._messages) + 1
+
+    def uids_to(self, recipient: str) -> List[int]:
+        with self._lock:
+            return list(self._by_recipient.get(recipient.lower(), ()))
+
+    def uids_from(self, sender: str) -> List[int]:
+        with self._lock:
+            return list(self._by_sender.get(sender.lower(), ()))
+
+    def subscribe(self, notify: Callable[[int], None]) -> None:
+        """Calling notify(uid) on every new message, used by IMAP IDLE"""
+        with self._lock:
+            self._subscribers.add(notify)
+
+    def unsubscribe(self, notify: Callable[[int], None]) -> None:
+        with self._lock:
+            self._subscribers.discard(notify)
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Receiver of enough SMTP for the backend: EHLO, AUTH, MAIL, RCPT, DATA"""
+
+    disable_nagle_algorithm = True
+
+    def _reply(self, line: str) -> None:
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self) -> None:
+        store: MailStore = self.server.store
+        sender, recipients = "", []
+        self._reply("220 localhost ESMTP mail sink")
+        while line := self.rfile.readline():
+            command, _, argument = line.decode(errors="replace").strip().partition(" ")
+            command = command.upper()
+            if command == "EHLO":
+                self.wfile.write(
+                    b"250-localhost\r\n250-AUTH PLAIN LOGIN\r\n250-8BITMIME\r\n250 SMTPUTF8\r\n"
+                )
+            elif command == "HELO":
+                self._reply("250 localhost")
+            elif command == "AUTH":
+                # Any credentials are accepted, the continuations are only read
+                mechanism, _, initial = argument.partition(" ")
+                if mechanism.upper() == "LOGIN":
+                    for _ in range(2 - bool(initial)):
+                        self._reply("334 " + base64.b64encode(b"Credentials:").decode())
+                        self.rfile.readline()
+                elif not initial:
+                    self._reply("334 ")
+                    self.rfile.readline()
+                self._reply("235 2.7.0 Authentication successful")
+            elif command == "MAIL":
+                sender, recipients = parseaddr(argument.partition(":")[2])[1], []
+                self._reply("250 OK")
+            elif command == "RCPT":
+                recipients.append(parseaddr(argument.partition(":")[2])[1])
+                self._reply("250 OK")
+            elif command == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while (data := self.rfile.readline()) not in (b".\r\n", b".\n", b""):
+                    lines.append(data[1:] if data.startswith(b"..") else data)
+                uid = store.add(b"".join(lines), sender, recipients)
+                self._reply(f"250 OK queued as {uid}")
+                sender, recipients = "", []
+            elif command == "RSET":
+                sender, recipients = "", []
+                self._reply("250 OK")
+            elif command == "NOOP":
+                self._reply("250 OK")
+            elif command == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+
+_IMAP_TOKEN = re.compile(r'"((?:[^"\\]|\\.)*)"|([()])|([^\s()]+)')
+
+
+def _imap_tokens(arguments: str) -> List[str]:
+    """Splitting arguments of IMAP command into atoms, quoted strings and parentheses"""
+    return [
+        match.group(1)
+        if match.group(1) is not None
+        else match.group(2) or match.group(3)
+        for match in _IMAP_TOKEN.finditer(arguments)
+    ]
+
+
+def _sequence_set(value: str, last: int) -> List[int]:
+    """Numbers of "1,3:5,7:*" bounded by the last existing one"""
+    numbers = set()
+    for part in value.split(","):
+        start, _, end = part.partition(":")
+        start = last if start == "*" else int(start)
+        end = start if not end else last if end == "*" else int(end)
+        start, end = min(start, end), max(start, end)
+        numbers.update(range(max(start, 1), min(end, last) + 1))
+    return sorted(numbers)
+
+
+class _IMAPHandler(socketserver.StreamRequestHandler):
+    """Server of enough IMAP4rev1 for imap_tools: LOGIN, SELECT, STATUS, SEARCH, FETCH, IDLE"""
+
+    disable_nagle_algorithm = True
+
+    def setup(self) -> None:
+        super().setup()
+        self._write_lock = threading.Lock()
+
+    def _write(self, data: bytes) -> None:
+        with self._write_lock:
+            self.wfile.write(data)
+
+    def _reply(self, line: str) -> None:
+        self._write(f"{line}\r\n".encode())
+
+    def handle(self) -> None:
+        self._reply("* OK [CAPABILITY IMAP4rev1 IDLE] mail sink ready")
+        while line := self.rfile.readline():
+            tag, _, rest = line.decode(errors="replace").strip().partition(" ")
+            command, _, arguments = rest.partition(" ")
+            command = command.upper()
+            use_uid = command == "UID"
+            if use_uid:
+                command, _, arguments = arguments.partition(" ")
+                command = command.upper()
+            handler = getattr(self, f"_command_{command.lower()}", None)
+            if handler is None:
+                self._reply(f"{tag} BAD {command} is not supported")
+                continue
+            try:
+                if handler(tag, arguments, use_uid) is False:
+                    return
+            except (ValueError, IndexError) as e:
+                self._reply(f"{tag} BAD {e}")
+
+    def _command_capability(self, tag: str, arguments: str, use_uid: bool) -> None:
+        self._reply("* CAPABILITY IMAP4rev1 IDLE")
+        self._reply(f"{tag} OK CAPABILITY completed")
+
+    def _command_noop(self, tag: str, arguments: str, use_uid: bool) -> None:
+        self._reply(f"{tag} OK NOOP completed")
+
+    def _command_login(self, tag: str, arguments: str, use_uid: bool) -> None:
+        self._reply(f"{tag} OK LOGIN completed")
+
+    def _command_logout(self, tag: str, arguments: str, use_uid: bool) -> bool:
+        self._reply("* BYE mail sink logging out")
+        self._reply(f"{tag} OK LOGOUT completed")
+        return False
+
+    def _command_select(self, tag: str, arguments: str, use_uid: bool) -> None:
+        # All messages are kept in one folder, whatever is selected
+        uid_next = self.server.store.uid_next
+        self._reply(f"* {uid_next - 1} EXISTS")
+        self._reply("* 0 RECENT")
+        self._reply("* FLAGS (\\Seen)")
+        self._reply("* OK [UIDVALIDITY 1] UIDs valid")
+        self._reply(f"* OK [UIDNEXT {uid_next}] Predicted next UID")
+        self._reply(f"{tag} OK [READ-WRITE] SELECT completed")
+
+    _command_examine = _command_select
+
+    def _command_close(self, tag: str, arguments: str, use_uid: bool) -> None:
+        self._reply(f"{tag} OK CLOSE completed")
+
+    def _command_status(self, tag: str, arguments: str, use_uid: bool) -> None:
+        folder = _imap_tokens(arguments)[0]
+        uid_next = self.server.store.uid_next
+        self._reply(
+            f'* STATUS "{folder}" (MESSAGES {uid_next - 1} RECENT 0 '
+            f"UIDNEXT {uid_next} UIDVALIDITY 1 UNSEEN 0)"
+        )
+        self._reply(f"{tag} OK STATUS completed")
+
+    def _command_search(self, tag: str, arguments: str, use_uid: bool) -> None:
+        store: MailStore = self.server.store
+        tokens = [t for t in _imap_tokens(arguments) if t not in ("(", ")")]
+        if tokens and tokens[0].upper() == "CHARSET":
+            tokens = tokens[2:]
+        last = store.uid_next - 1
+        found = set(range(1, last + 1))
+        while tokens:
+            key = tokens.pop(0).upper()
+            if key in ("ALL", "SEEN", "UNSEEN", "NEW", "RECENT"):
+                continue
+            if key == "UID":
+                found &= set(_sequence_set(tokens.pop(0), last))
+            elif key == "TO":
+                found &= set(store.uids_to(tokens.pop(0)))
+            elif key == "FROM":
+                found &= set(store.uids_from(tokens.pop(0)))
+            elif key in ("SINCE", "ON", "BEFORE", "SUBJECT", "TEXT", "BODY"):
+                tokens.pop(0)
+            elif key.replace(",", "").replace(":", "").replace("*", "").isdigit():
+                found &= set(_sequence_set(key, last))
+            else:
+                raise ValueError(f"search key {key} is not supported")
+        self._reply("* SEARCH " + " ".join(map(str, sorted(found))))
+        self._reply(f"{tag} OK SEARCH completed")
+
+    def _command_fetch(self, tag: str, arguments: str, use_uid: bool) -> None:
+        store: MailStore = self.server.store
+        sequence, _, items = arguments.partition(" ")
+        items = items.upper()
+        headers_only = "[HEADER]" in items
+        for uid in _sequence_set(sequence, store.uid_next - 1):
+            message = store.get(uid)
+            if ".PEEK" not in items and "BODY[" in items:
+                message.seen = True
+            body = message.raw
+            if headers_only:
+                body = body.split(b"\r\n\r\n", 1)[0] + b"\r\n\r\n"
+            section = "BODY[HEADER]" if headers_only else "BODY[]"
+            flags = "\\Seen" if message.seen else ""
+            self._write(
+                f"* {uid} FETCH (UID {uid} FLAGS ({flags}) RFC822.SIZE {len(message.raw)} "
+                f"{section} {{{len(body)}}}\r\n".encode() + body + b")\r\n"
+            )
+        self._reply(f"{tag} OK FETCH completed")
+
+    def _command_idle(self, tag: str, arguments: str, use_uid: bool) -> None:
+        def notify(uid: int) -> None:
+            try:
+                self._reply(f"* {uid} EXISTS")
+            except OSError:
+                pass
+
+        store: MailStore = self.server.store
+        store.subscribe(notify)
+        try:
+            self._reply("+ idling")
+            while (line := self.rfile.readline()) and line.strip().upper() != b"DONE":
+                pass
+        finally:
+            store.unsubscribe(notify)
+        self._reply(f"{tag} OK IDLE terminated")
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address: tuple, handler, store: MailStore):
+        super().__init__(address, handler)
+        self.store = store
+
+
+class LocalMailSink:
+    def __init__(self, host: str = "localhost", smtp_port: int = 0, imap_port: int = 0):
+        """In-process stand-in for the mail server of the backend and the test mailbox
+
+        The backend sends messages over SMTP, the tests read them over IMAP
+        (MailboxWatcher) or directly from the index by recipient.
+
+        Args:
+            host:      address to listen on, e.g. "0.0.0.0" for the backend in Docker,
+                       the sink accepts any credentials, so only on a trusted network;
+            smtp_port: port of SMTP server, 0 for a free one;
+            imap_port: port of IMAP server, 0 for a free one.
+        """
+        self.store = MailStore()
+        self._smtp = _Server((host, smtp_port), _SMTPHandler, self.store)
+        self._imap = _Server((host, imap_port), _IMAPHandler, self.store)
+        self.smtp_port = self._smtp.server_address[1]
+        self.imap_port = self._imap.server_address[1]
+        self._threads = []
+
+    def start(self) -> "LocalMailSink":
+        for server in (self._smtp, self._imap):
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logging.info(
+            f"Local mail sink started: SMTP port {self.smtp_port}, IMAP port {self.imap_port}"
+        )
+        return self
+
+    def close(self) -> None:
+        for server in (self._smtp, self._imap):
+            server.shutdown()
+            server.server_close()
+        logging.info("Local mail sink stopped")
+
+    def wait_for_code(
+        self,
+        recipient: str,
+        sender: Optional[str] = None,
+        timeout: float = MAIL_WAIT_TIMEOUT,
+    ) -> Optional[str]:
+        """Waiting for the next code sent to the recipient, see CodeIndex.wait_for_code"""
+        return self.store.codes.wait_for_code(recipient, sender=sender, timeout=timeout)
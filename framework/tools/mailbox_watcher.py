@@ -0,0 +1,191 @@
+import logging
+import re
+import socket
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Deque, Dict, Iterable, Optional, Tuple
+
+from imap_tools import A, MailBox, MailBoxUnencrypted, U
+
+from configs import MAIL_IDLE_TIMEOUT, MAIL_WAIT_TIMEOUT
+
+
+class CodeIndex:
+    def __init__(self):
+        """Confirmation codes by recipient, waited for by the tests"""
+        self._codes: Dict[str, Deque[Tuple[str, str]]] = defaultdict(deque)
+        self._condition = threading.Condition()
+
+    def add(self, recipients: Iterable[str], sender: str, code: str) -> None:
+        """Adding the code of a message and waking up the tests waiting for it
+
+        Args:
+            recipients: email addresses the message was sent to;
+            sender:     email address the message was sent from;
+            code:       code found in the text of message.
+        """
+        with self._condition:
+            for recipient in recipients:
+                self._codes[recipient.lower()].append((sender.lower(), code))
+            self._condition.notify_all()
+
+    def _pop(self, recipient: str, sender: Optional[str]) -> Optional[str]:
+        codes = self._codes.get(recipient)
+        if not codes:
+            return None
+        for i, (from_, code) in enumerate(codes):
+            if sender is None or from_ == sender:
+                del codes[i]
+                return code
+        return None
+
+    def wait_for_code(
+        self,
+        recipient: str,
+        sender: Optional[str] = None,
+        timeout: float = MAIL_WAIT_TIMEOUT,
+    ) -> Optional[str]:
+        """Waiting for the next code sent to the recipient
+
+        Each code is returned once, so the codes of several messages
+        (e.g. registration and then reset of password) are returned in order of arrival.
+
+        Args:
+            recipient: email address the message was sent to, e.g. "icedlate.test+abc12@gmail.com";
+            sender:    email address the message was sent from, any if None;
+            timeout:   maximum time of waiting, seconds.
+
+        Returns:
+            code from the message or None if it has not arrived in time
+        """
+        recipient = recipient.lower()
+        sender = sender.lower() if sender else None
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while (code := self._pop(recipient, sender)) is None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logging.warning(f"No code for {recipient} in {timeout}s")
+                    return None
+                self._condition.wait(remaining)
+        return code
+
+
+class MailboxWatcher:
+    def __init__(
+        self,
+        imap_server: str,
+        email_address: str,
+        mail_password: str,
+        email_box: str = "Inbox",
+        code_pattern: str = r"\d{9}",
+        port: Optional[int] = None,
+        ssl: bool = True,
+    ):
+        """Long-lived watcher of the mailbox, indexing confirmation codes by recipient
+
+        One IMAP connection in IDLE mode is shared by all tests of the process,
+        only messages arrived after start() are fetched, each of them once.
+
+        Args:
+            imap_server:   IMAP server, e.g. "imap.gmail.com";
+            email_address: address of the mailbox to log in;
+            mail_password: password of the mailbox;
+            email_box:     folder with incoming messages;
+            code_pattern:  regular expression of the code in the text of message;
+            port:          port of IMAP server, 993 for SSL and 143 otherwise if None;
+            ssl:           connecting over SSL, False e.g. for the local mail sink.
+        """
+        self.imap_server = imap_server
+        self.email_address = email_address
+        self.password = mail_password
+        self.email_box = email_box
+        self.code_pattern = re.compile(code_pattern)
+        self.port = port
+        self.ssl = ssl
+
+        self.codes = CodeIndex()
+        self._stopped = threading.Event()
+        self._last_uid: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._mailbox: Optional[MailBox] = None
+
+    def _connect(self) -> MailBox:
+        mailbox_class = MailBox if self.ssl else MailBoxUnencrypted
+        port = self.port or (993 if self.ssl else 143)
+        mailbox = mailbox_class(self.imap_server, port).login(
+            self.email_address, self.password, initial_folder=self.email_box
+        )
+        if self._last_uid is None:
+            status = mailbox.folder.status(self.email_box, ["UIDNEXT"])
+            self._last_uid = status["UIDNEXT"] - 1
+        return mailbox
+
+    def start(self) -> "MailboxWatcher":
+        """Connecting to the mailbox and starting to watch it in background thread"""
+        mailbox = self._connect()
+        self._thread = threading.Thread(
+            target=self._watch, args=(mailbox,), name="mailbox-watcher", daemon=True
+        )
+        self._thread.start()
+        logging.info(f"Watching mailbox {self.email_address} from UID {self._last_uid}")
+        return self
+
+    def close(self) -> None:
+        self._stopped.set()
+        if self._mailbox:
+            # Interrupting IDLE instead of waiting for its timeout
+            try:
+                self._mailbox.client.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._thread:
+            self._thread.join(timeout=MAIL_IDLE_TIMEOUT + 5)
+        logging.info(f"Mailbox {self.email_address} is not watched anymore")
+
+    def _watch(self, mailbox: MailBox) -> None:
+        """Fetching new messages and waiting for next ones with IDLE, reconnecting on errors"""
+        while not self._stopped.is_set():
+            self._mailbox = mailbox
+            try:
+                with mailbox:
+                    while not self._stopped.is_set():
+                        self._fetch_new(mailbox)
+                        mailbox.idle.wait(timeout=MAIL_IDLE_TIMEOUT)
+                return
+            except Exception as e:
+                if self._stopped.is_set():
+                    return
+                logging.warning(f"Mailbox {self.email_address} watcher failed: {e}")
+                while not self._stopped.wait(1):
+                    try:
+                        mailbox = self._connect()
+                        break
+                    except Exception as e:
+                        logging.warning(
+                            f"Mailbox {self.email_address} reconnect failed: {e}"
+                        )
+
+    def _fetch_new(self, mailbox: MailBox) -> None:
+        """Fetching messages with UID greater than the last seen one"""
+        messages = mailbox.fetch(A(uid=U(self._last_uid + 1, "*")), mark_seen=False)
+        for msg in messages:
+            uid = int(msg.uid)
+            # "N:*" returns the last message even if its UID is less than N
+            if uid <= self._last_uid:
+                continue
+            self._last_uid = uid
+            match = self.code_pattern.search(msg.text or msg.html or "")
+            if not match:
+                continue
+            self.codes.add(msg.to, msg.from_, match.group())
+
+    def wait_for_code(
+        self,
+        recipient: str,
+        sender: Optional[str] = None,
+        timeout: float = MAIL_WAIT_TIMEOUT,
+    ) -> Optional[str]:
+        """Waiting for the next code sent to the recipient, see CodeIndex.wait_for_code"""
+        return self.codes.wait_for_code(recipient, sender=sender, timeout=timeout)
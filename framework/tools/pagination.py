@@ -0,0 +1,39 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, Optional
+
+from requests import Response
+
+
+def iter_pages(
+    fetch: Callable[[int], Response],
+    items_key: str,
+    check: Optional[Callable[[Response], None]] = None,
+) -> Iterator[dict]:
+    """Items of all pages of a listing, the next page is requested while the current one is consumed
+
+    The pages are walked until the last one by the page info of response
+    (page, totalPages) or until an empty page.
+
+    Args:
+        fetch:     function requesting a page by its number, called in background thread;
+        items_key: key of the items in the response, e.g. "products";
+        check:     function checking and logging a response, called in the thread of caller.
+    """
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="next-page")
+    try:
+        page = 0
+        future = executor.submit(fetch, page)
+        while future:
+            response = future.result()
+            if check:
+                check(response)
+            data = response.json()
+            items = data[items_key]
+            future = None
+            if items and data["page"] + 1 < data["totalPages"]:
+                page += 1
+                future = executor.submit(fetch, page)
+            yield from items
+    finally:
+        # The caller may stop before the last page
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,123 @@
+import json
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from framework.clients.http_client import endpoint_name
+from framework.clients.latency_histogram import LatencyRecorder
+
+
+class HttpTimingsByTest:
+    def __init__(self):
+        """Time spent by every test in requests to the backend"""
+        self._lock = threading.Lock()
+        self.tests: Dict[str, dict] = {}
+        self.current: Optional[str] = None
+
+    def _test(self, nodeid: str) -> dict:
+        return self.tests.setdefault(
+            nodeid,
+            {
+                "duration": 0.0,
+                "requests": 0,
+                "http_time": 0.0,
+                "slowest_request": None,
+                "slowest_request_time": 0.0,
+            },
+        )
+
+    def record_request(
+        self, method: str, url: str, status: Optional[int], seconds: float
+    ) -> None:
+        """Listener of HttpClient adding the request to the running test, see HttpClient.add_listener"""
+        if self.current is None:
+            return
+        with self._lock:
+            test = self._test(self.current)
+            test["requests"] += 1
+            test["http_time"] += seconds
+            if seconds > test["slowest_request_time"]:
+                test["slowest_request"] = endpoint_name(method, url)
+                test["slowest_request_time"] = seconds
+
+    def add_duration(self, nodeid: str, seconds: float) -> None:
+        """Adding duration of a phase (setup, call, teardown) of the test"""
+        with self._lock:
+            self._test(nodeid)["duration"] += seconds
+
+    def merge(self, other: Dict[str, dict]) -> None:
+        """Adding tests of other process (e.g. pytest-xdist worker)
+
+        Args:
+            other: tests in the form of HttpTimingsByTest.as_dict()
+        """
+        with self._lock:
+            for nodeid, timings in other.items():
+                test = self._test(nodeid)
+                test["duration"] += timings["duration"]
+                test["requests"] += timings["requests"]
+                test["http_time"] += timings["http_time"]
+                if timings["slowest_request_time"] > test["slowest_request_time"]:
+                    test["slowest_request"] = timings["slowest_request"]
+                    test["slowest_request_time"] = timings["slowest_request_time"]
+
+    def as_dict(self) -> Dict[str, dict]:
+        with self._lock:
+            return {nodeid: dict(timings) for nodeid, timings in self.tests.items()}
+
+
+def timing_summary(
+    latencies: LatencyRecorder, tests: HttpTimingsByTest, top: int = 20
+) -> dict:
+    """Endpoints ranked by p99 latency and tests ranked by time spent in requests
+
+    Args:
+        latencies: histograms of requests of the run;
+        tests:     time of every test in requests;
+        top:       number of the slowest tests in summary.
+    """
+    endpoints = []
+    for endpoint, histogram in latencies.by_endpoint().items():
+        endpoints.append(
+            {
+                "endpoint": endpoint,
+                "requests": histogram.measured,
+                "mean_ms": round(histogram.mean() * 1000, 1),
+                "p50_ms": round(histogram.percentile(50) * 1000, 1),
+                "p90_ms": round(histogram.percentile(90) * 1000, 1),
+                "p99_ms": round(histogram.percentile(99) * 1000, 1),
+                "max_ms": round(histogram.max / 1000, 1),
+            }
+        )
+    endpoints.sort(key=lambda e: e["p99_ms"], reverse=True)
+
+    slowest_tests: List[dict] = sorted(
+        (
+            {
+                "test": nodeid,
+                "duration_s": round(test["duration"], 3),
+                "requests": test["requests"],
+                "http_time_s": round(test["http_time"], 3),
+                "slowest_request": test["slowest_request"],
+                "slowest_request_ms": round(test["slowest_request_time"] * 1000, 1),
+            }
+            for nodeid, test in tests.as_dict().items()
+            if test["requests"]
+        ),
+        key=lambda t: t["http_time_s"],
+        reverse=True,
+    )
+    return {"endpoints": endpoints, "slowest_tests": slowest_tests[:top]}
+
+
+def write_timing_summary(
+    path: str, latencies: LatencyRecorder, tests: HttpTimingsByTest, top: int = 20
+) -> Path:
+    """Writing timing_summary() to JSON file, see timing_summary for the arguments"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(timing_summary(latencies, tests, top), indent=2))
+    return path
+
+
+http_timings_by_test = HttpTimingsByTest()
@@ -0,0 +1,192 @@
+import hashlib
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from filelock import FileLock
+
+from framework.endpoints.authenticate_api import AuthenticateAPI
+from framework.endpoints.cart_api import CartAPI
+from framework.endpoints.favorite_api import FavoriteAPI
+from framework.tools.cleanup_registry import cleanup_registry, delete_user_through_api
+from framework.tools.methods_to_cart import get_item_id
+
+
+class UserPool:
+    def __init__(
+        self,
+        postgres,
+        create_user: Callable[[], dict],
+        state_dir: Path,
+        size: int,
+    ):
+        """Pool of pre-authenticated users shared by pytest-xdist workers
+
+        The state of the pool is kept in a JSON file, all workers of one run
+        read and write it under a file lock.
+
+        Args:
+            postgres:    connection to Postgres DataBase;
+            create_user: function inserting a new user into DB and returning its data;
+            state_dir:   directory shared by all workers of the run;
+            size:        number of users in the pool, 0 disables the pool.
+        """
+        self.postgres = postgres
+        self.create_user = create_user
+        self.size = size
+        self.state_file = state_dir / "user_pool.json"
+        self.lock = FileLock(str(state_dir / "user_pool.lock"))
+
+    def _read(self) -> dict:
+        return json.loads(self.state_file.read_text())
+
+    def _write(self, state: dict) -> None:
+        self.state_file.write_text(json.dumps(state))
+
+    def _fingerprint(self, user_id: str) -> Optional[str]:
+        """Hash of all columns of the user's row in DB, None if the user does not exist"""
+        row = self.postgres.get_user_by_id(user_id)
+        if row is None:
+            return None
+        values = {column: str(value) for column, value in row.items()}
+        return hashlib.sha1(json.dumps(values, sort_keys=True).encode()).hexdigest()
+
+    @staticmethod
+    def _authenticate(user: dict) -> dict:
+        authentication_response = AuthenticateAPI().authentication(
+            email=user["email"], password=user["password"]
+        )
+        return {
+            "token": authentication_response.json()["token"],
+            "refreshToken": authentication_response.json()["refreshToken"],
+        }
+
+    def _new_entry(self) -> dict:
+        user = self.create_user()
+        return {"user": user, **self._authenticate(user)}
+
+    def fill(self) -> None:
+        """Creating and authenticating users of the pool, done once per run by the first worker"""
+        if not self.size:
+            return
+
+        with self.lock:
+            if self.state_file.exists():
+                return
+            with ThreadPoolExecutor(max_workers=min(self.size, 10)) as executor:
+                entries = list(
+                    executor.map(lambda _: self._new_entry(), range(self.size))
+                )
+            for entry in entries:
+                entry["fingerprint"] = self._fingerprint(entry["user"]["id"])
+            self._write({"free": entries, "leased": {}})
+            logging.info(f"User pool filled with {self.size} users")
+
+    def lease(self) -> Optional[dict]:
+        """Taking a user from the pool
+
+        Returns:
+            {"user": ..., "token": ..., "refreshToken": ...} or None if the pool is empty
+        """
+        if not self.size:
+            return None
+
+        with self.lock:
+            state = self._read()
+            if not state["free"]:
+                return None
+            entry = state["free"].pop()
+            state["leased"][entry["user"]["id"]] = entry
+            self._write(state)
+
+        return {
+            "user": dict(entry["user"]),
+            "token": entry["token"],
+            "refreshToken": entry["refreshToken"],
+        }
+
+    def release(self, leased: dict) -> None:
+        """Returning a user to the pool in clean state
+
+        The user is authenticated again, so a blacklisted token or failed login
+        attempts do not leak into the next test. The user is retired if the test
+        changed the user's row in DB, left reviews or the user can not be checked
+        or reset for any reason. Retired users are deleted through API, so their
+        reviews do not stay on the shared products, or purged with the other users
+        of the run by cleanup_registry.
+
+        Args:
+            leased: user returned by lease()
+        """
+        user_id = leased["user"]["id"]
+        with self.lock:
+            entry = self._read()["leased"][user_id]
+
+        try:
+            is_clean = self._fingerprint(user_id) == entry["fingerprint"]
+            if is_clean and self._has_reviews(user_id):
+                is_clean = False
+            if is_clean:
+                entry.update(self._authenticate(entry["user"]))
+                self._reset(entry["token"])
+                entry["fingerprint"] = self._fingerprint(user_id)
+        except Exception as e:
+            logging.warning(f"User {user_id} can not be returned to the pool: {e}")
+            is_clean = False
+
+        with self.lock:
+            state = self._read()
+            del state["leased"][user_id]
+            if is_clean:
+                state["free"].append(entry)
+            self._write(state)
+
+        if not is_clean:
+            logging.info(f"User {user_id} retired from the pool")
+            delete_user_through_api(entry["user"], entry["token"])
+
+    def _reset(self, token: str) -> None:
+        """Clearing shopping cart and favorites of the user"""
+        if item_ids := get_item_id(CartAPI().get_user_cart(token=token)):
+            CartAPI().delete_item_from_cart(token=token, cart_item_id=item_ids)
+        favorites = FavoriteAPI().get_favorites(token=token).json()
+        for product in favorites.get("products", []):
+            FavoriteAPI().delete_favorites(token=token, id_product=product["id"])
+
+    def _has_reviews(self, user_id: str) -> bool:
+        """Checking that the user left reviews, any error is treated as yes"""
+        try:
+            rows = self.postgres.get_data_by_filter(
+                "product_review", "user_id", user_id
+            )
+        except Exception as e:
+            logging.warning(f"Reviews of user {user_id} can not be checked: {e}")
+            return True
+        return bool(rows)
+
+    @staticmethod
+    def remove(state_dir: Path) -> List[dict]:
+        """Removing the state of the pool when all workers of the run are finished
+
+        Called by the controller (or the only process without pytest-xdist), since
+        a worker can not know that the others will not fill the pool or lease
+        from it anymore. The users are purged with the other users of the run.
+
+        Args:
+            state_dir: directory shared by all workers of the run
+
+        Returns:
+            users of the pool, empty if the pool was not filled
+        """
+        state_file = state_dir / "user_pool.json"
+        with FileLock(str(state_dir / "user_pool.lock")):
+            if not state_file.exists():
+                return []
+            state = json.loads(state_file.read_text())
+            state_file.unlink()
+        logging.info("User pool removed")
+        return [
+            entry["user"] for entry in state["free"] + list(state["leased"].values())
+        ]
@@ -3,18 +3,11 @@ from allure import feature, description, link, step, title
 from allure import severity
 from hamcrest import assert_that, not_
 
-from configs import (
-    email_iced_late,
-    imap_server2,
-    email_address_to_connect2,
-    gmail_password2,
-    EMAIL_DOMAIN2,
-    EMAIL_LOCAL_PART2,
-)
+from configs import email_iced_late, EMAIL_DOMAIN2, EMAIL_LOCAL_PART2
 from framework.asserts.common import assert_message_in_response
 from framework.endpoints.authenticate_api import AuthenticateAPI
 from framework.endpoints.users_api import UsersAPI
-from framework.tools.class_email import Email
+from framework.tools.cleanup_registry import cleanup_registry
 from framework.tools.generators import (
     generate_password,
     generate_string,
@@ -38,11 +31,11 @@ class TestResetPassword:
         "WHEN user sent request to change password."
         "THEN status HTTP CODE = 200 "
     )
-    def test_change_password_through_reset_password(self, postgres):
+    def test_change_password_through_reset_password(self, postgres, mailbox_watcher2):
         with step("Registration user"):
             email_random = append_random_to_local_part_email(
                 domain=EMAIL_DOMAIN2,
-                email_local_part=EMAIL_LOCAL_PART2,
+                email_local_part=cleanup_registry.run_local_part(EMAIL_LOCAL_PART2),
                 length_random_part=5,
             )
             user_data = generate_user(email=email_random)
@@ -63,15 +56,8 @@ class TestResetPassword:
             AuthenticateAPI().forgot_password(email=email_to_reset_password)
 
         with step("Verify reset code successfully delivered to user's email"):
-            email_box = "Inbox"
-            key = "from_"
-            value = email_iced_late
-            code_reset_from_email = Email(
-                imap_server=imap_server2,
-                email_address=email_address_to_connect2,
-                mail_password=gmail_password2,
-            ).extract_confirmation_code_from_email(
-                email_box=email_box, key=key, value=value
+            code_reset_from_email = mailbox_watcher2.wait_for_code(
+                recipient=email, sender=email_iced_late
             )
 
             assert_that(code_reset_from_email, not_(None), "Code should not be empty")
@@ -387,11 +373,12 @@ class TestResetPassword:
         expected_status_code,
         expected_message_part,
         postgres,
+        mailbox_watcher2,
     ):
         with step("Registration user"):
             email_random = append_random_to_local_part_email(
                 domain=EMAIL_DOMAIN2,
-                email_local_part=EMAIL_LOCAL_PART2,
+                email_local_part=cleanup_registry.run_local_part(EMAIL_LOCAL_PART2),
                 length_random_part=5,
             )
             user_data = generate_user(email=email_random)
@@ -414,17 +401,8 @@ class TestResetPassword:
             AuthenticateAPI().forgot_password(email=email_to_reset_password)
 
         with step("Verify reset code successfully delivered to user's email"):
-            email_box = "Inbox"
-            key = "from_"
-            value = email_iced_late
             code_for_reset_password = (
-                Email(
-                    imap_server=imap_server2,
-                    email_address=email_address_to_connect2,
-                    mail_password=gmail_password2,
-                ).extract_confirmation_code_from_email(
-                    email_box=email_box, key=key, value=value
-                )
+                mailbox_watcher2.wait_for_code(recipient=email, sender=email_iced_late)
                 if code_for_reset_password is None
                 else code_for_reset_password
             )
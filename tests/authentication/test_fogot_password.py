@@ -15,7 +15,6 @@ from configs import (
 )
 from framework.asserts.common import assert_content_type, assert_response_message
 from framework.endpoints.authenticate_api import AuthenticateAPI
-from framework.tools.class_email import Email
 from framework.tools.generators import faker
 
 
@@ -47,7 +46,9 @@ class TestForgotPassword:
         ],
         indirect=True,
     )
-    def test_forgot_password(self, registration_and_cleanup_user_through_api):
+    def test_forgot_password(
+        self, registration_and_cleanup_user_through_api, mailbox_watcher
+    ):
         with step("Registration user"):
             user = registration_and_cleanup_user_through_api["user"]
             email = user["email"]
@@ -57,15 +58,8 @@ class TestForgotPassword:
             assert_that(response_to_reset_password.status_code, is_(200))
 
         with step("Verify reset code successfully delivered to user's email"):
-            email_box = "Inbox"
-            key = "from_"
-            value = email_iced_late
-            code_from_email = Email(
-                imap_server=imap_server,
-                email_address=email_address_to_connect,
-                mail_password=gmail_password,
-            ).extract_confirmation_code_from_email(
-                email_box=email_box, key=key, value=value
+            code_from_email = mailbox_watcher.wait_for_code(
+                recipient=email, sender=email_iced_late
             )
             assertpy_assert_that(code_from_email).is_not_empty()
 
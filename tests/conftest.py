@@ -1,3 +1,7 @@
+import asyncio
+import json
+import logging
+
 import pytest
 from allure import title, step
 
@@ -8,49 +12,78 @@ from psycopg2 import connect
 from pytest import fixture
 
 from configs import (
+    BACKEND_MODE,
+    FAKE_BACKEND_HOST,
+    FAKE_BACKEND_PORT,
+    DB_QUERY_SUMMARY_PATH,
+    DB_QUERY_SUMMARY_TOP,
+    HTTP_TIMING_SUMMARY_PATH,
+    HTTP_TIMING_SUMMARY_TOP,
     EMAIL_LOCAL_PART,
     EMAIL_DOMAIN,
     EMAIL_DOMAIN2,
     EMAIL_LOCAL_PART2,
+    email_address_to_connect,
     email_address_to_connect2,
+    gmail_password,
+    gmail_password2,
+    imap_server,
+    imap_server2,
+    MAIL_MODE,
+    MAIL_SINK_HOST,
+    MAIL_SINK_SMTP_PORT,
+    MAIL_SINK_IMAP_PORT,
+    USER_POOL_SIZE,
 )
-from data.data_for_auth import (
-    ssh_username,
-    ssh_password,
-    local_server_ip,
-    remote_server_ip,
-    db_username,
-    db_password,
-    database_name,
-    port_ssh,
-)
-
 from data.data_for_auth import DB_NAME, HOST_DB, DB_USER, DB_PASS, PORT_DB
 from data.data_for_cart import data_for_adding_product_to_cart
 from framework.asserts.assert_favorite import assert_added_product_in_favorites
+from framework.clients.async_http_client import close_async_http_client
+from framework.clients.db_client_ssh import close_tunnel_pools
+from framework.clients.http_client import get_http_client, transport_stats
+from framework.clients.latency_histogram import latency_recorder
+from framework.clients.query_recorder import query_recorder
 from framework.endpoints.authenticate_api import AuthenticateAPI
 from framework.endpoints.cart_api import CartAPI
 from framework.endpoints.favorite_api import FavoriteAPI
 from framework.endpoints.product_api import ProductAPI
 from framework.endpoints.review_api import ReviewAPI
 from framework.endpoints.users_api import UsersAPI
+from framework.queries.connections import (
+    connect_to_postgres,
+    connect_to_postgres_async,
+)
+from framework.queries.postgres_async_db import AsyncPostgresDB
 from framework.queries.postgres_remote_db import PostgresDB
-from framework.tools.class_email import Email
+from framework.tools.catalog_snapshot import CatalogSnapshot
+from framework.tools.cleanup_registry import cleanup_registry, delete_user_through_api
+from framework.tools.fake_backend import FakeBackend, FakeStore
 from framework.tools.favorite_methods import extract_random_product_ids
+from framework.tools.mail_sink import LocalMailSink
+from framework.tools.mailbox_watcher import MailboxWatcher
 from framework.tools.generators import (
     generate_user,
     generate_user_data,
+    to_db_user,
     append_random_to_local_part_email,
 )
 from framework.tools.methods_to_cart import (
     assert_product_to_add_matches_response,
     get_product_info,
 )
+from framework.tools.logging_allure import (
+    attach_slow_query,
+    discard_logged_requests,
+    flush_logged_requests,
+    start_logged_requests,
+)
+from framework.tools.timing_summary import http_timings_by_test, write_timing_summary
 from framework.tools.review_methods import (
     verify_user_review_in_all_reviews,
     verify_user_review_by_user_name_in_all_product_reviews,
     extract_random_product_info,
 )
+from framework.tools.user_pool import UserPool
 
 # Connection configuration
 PostgresDB.dbname = DB_NAME
@@ -60,23 +93,254 @@ PostgresDB.user = DB_USER
 PostgresDB.password = DB_PASS
 
 
+local_mail_sink = None
+fake_backend = None
+
+
+def pytest_configure(config):
+    """Starting the local mail sink and the fake backend in the controller (or the only process without pytest-xdist)
+
+    Every process collects the time spent by its tests in requests and queries to DB.
+    """
+    global local_mail_sink, fake_backend
+
+    get_http_client().add_listener(http_timings_by_test.record_request)
+    query_recorder.add_listener(attach_slow_query)
+
+    if MAIL_MODE == "local" and not hasattr(config, "workerinput"):
+        local_mail_sink = LocalMailSink(
+            host=MAIL_SINK_HOST,
+            smtp_port=MAIL_SINK_SMTP_PORT,
+            imap_port=MAIL_SINK_IMAP_PORT,
+        ).start()
+    if BACKEND_MODE == "fake" and not hasattr(config, "workerinput"):
+        fake_backend = start_fake_backend()
+
+
+def pytest_unconfigure(config):
+    close_async_http_client()
+    if local_mail_sink:
+        local_mail_sink.close()
+    if fake_backend:
+        fake_backend.close()
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item):
+    """Attributing the requests and queries to the running test"""
+    http_timings_by_test.current = item.nodeid
+    query_recorder.current = item.nodeid
+    start_logged_requests()
+    yield
+    http_timings_by_test.current = None
+    query_recorder.current = None
+    discard_logged_requests()
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    """Writing the requests of failed test to Allure report in "failed" ALLURE_LOG_MODE"""
+    outcome = yield
+    if outcome.get_result().failed:
+        flush_logged_requests()
+
+
+def pytest_runtest_logreport(report):
+    """Collecting durations of the tests in the process running them
+
+    The reports of pytest-xdist workers received by the controller have node and
+    are skipped, the workers pass the durations with their timings.
+    """
+    if not hasattr(report, "node"):
+        http_timings_by_test.add_duration(report.nodeid, report.duration)
+
+
+def pytest_sessionfinish(session):
+    """Passing the counters, latencies and created users of pytest-xdist worker to the controller
+
+    The users created by the run, including the pool of pre-authenticated users,
+    are removed by the controller (or the only process without pytest-xdist)
+    when all tests are finished.
+    """
+    if hasattr(session.config, "workeroutput"):
+        session.config.workeroutput["http_transport"] = json.dumps(
+            transport_stats.as_dict()
+        )
+        session.config.workeroutput["http_latency"] = json.dumps(
+            latency_recorder.as_dict()
+        )
+        session.config.workeroutput["http_timings"] = json.dumps(
+            http_timings_by_test.as_dict()
+        )
+        session.config.workeroutput["db_queries"] = json.dumps(query_recorder.as_dict())
+        session.config.workeroutput["cleanup"] = json.dumps(cleanup_registry.as_dict())
+        return
+
+    if latency_recorder.histograms():
+        write_timing_summary(
+            HTTP_TIMING_SUMMARY_PATH,
+            latency_recorder,
+            http_timings_by_test,
+            top=HTTP_TIMING_SUMMARY_TOP,
+        )
+
+    if USER_POOL_SIZE and BACKEND_MODE != "fake":
+        # The base temporary directory of the controller is the parent of the ones of pytest-xdist workers
+        for user in UserPool.remove(session.config._tmp_path_factory.getbasetemp()):
+            cleanup_registry.add_user(user["id"], user["email"])
+
+    if any(cleanup_registry.as_dict().values()):
+        try:
+            conn = connect_to_postgres()
+            try:
+                cleanup_registry.purge(conn)
+            finally:
+                conn.close()
+        except Exception as e:
+            # The results of the run are reported even if DB is unreachable
+            logging.error(f"Users created by the run are not purged: {e}")
+        finally:
+            close_tunnel_pools()
+
+    if query_recorder.shapes:
+        query_recorder.write_summary(DB_QUERY_SUMMARY_PATH, top=DB_QUERY_SUMMARY_TOP)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    """Collecting the counters, latencies, timings of tests, DB queries and created users of finished pytest-xdist worker"""
+    if worker_stats := getattr(node, "workeroutput", {}).get("http_transport"):
+        transport_stats.merge(json.loads(worker_stats))
+    if worker_latency := getattr(node, "workeroutput", {}).get("http_latency"):
+        latency_recorder.merge(json.loads(worker_latency))
+    if worker_timings := getattr(node, "workeroutput", {}).get("http_timings"):
+        http_timings_by_test.merge(json.loads(worker_timings))
+    if worker_queries := getattr(node, "workeroutput", {}).get("db_queries"):
+        query_recorder.merge(json.loads(worker_queries))
+    if worker_users := getattr(node, "workeroutput", {}).get("cleanup"):
+        cleanup_registry.merge(json.loads(worker_users))
+
+
+def pytest_terminal_summary(terminalreporter):
+    """Reporting reuse of HTTP connections, latencies of endpoints, DB queries and purged users of the run"""
+    terminalreporter.write_sep("-", "HTTP transport")
+    terminalreporter.write_line(transport_stats.summary())
+    if latency_recorder.histograms():
+        terminalreporter.write_sep("-", "HTTP latency")
+        terminalreporter.write_line(latency_recorder.summary())
+        terminalreporter.write_line(
+            f"Slowest endpoints and tests: {HTTP_TIMING_SUMMARY_PATH}"
+        )
+    if query_recorder.shapes:
+        terminalreporter.write_sep("-", "DB queries")
+        terminalreporter.write_line(query_recorder.totals())
+        terminalreporter.write_line(
+            f"Most expensive queries and tests: {DB_QUERY_SUMMARY_PATH}"
+        )
+    if cleanup_registry.purged:
+        terminalreporter.write_sep("-", "Cleanup of created users")
+        terminalreporter.write_line(cleanup_registry.summary())
+
+
+def load_user_from_postgres(email: str) -> dict:
+    """Loading a user inserted into DB by the fixtures for the fake backend
+
+    Args:
+        email: email of the user
+    """
+    conn = connect_to_postgres()
+    try:
+        return conn.get_user_by_email(email)
+    finally:
+        conn.close()
+
+
+def start_fake_backend() -> FakeBackend:
+    """Starting the fake backend serving products and users of Postgres DataBase
+
+    The users inserted into DB are loaded on their first request, without DB
+    the backend serves its own generated catalogue. Codes of registration and
+    password reset are sent to the local mail sink in "local" MAIL_MODE.
+    """
+    try:
+        conn = connect_to_postgres()
+        try:
+            store = FakeStore(
+                products=conn.get_products(), user_loader=load_user_from_postgres
+            )
+        finally:
+            conn.close()
+    except Exception as e:
+        logging.warning(f"Fake backend is started without Postgres DataBase: {e}")
+        store = FakeStore()
+    if MAIL_MODE != "local":
+        logging.warning("Fake backend sends mail only to the local mail sink")
+    return FakeBackend(
+        host=FAKE_BACKEND_HOST,
+        port=FAKE_BACKEND_PORT,
+        store=store,
+        smtp_port=MAIL_SINK_SMTP_PORT if MAIL_MODE == "local" else None,
+    ).start()
+
+
+@fixture(scope="session", autouse=True)
+def postgres_tunnel_pools():
+    """Closing SSH tunnels and pooled connections to Postgres DataBase of the worker"""
+    yield
+    close_tunnel_pools()
+
+
 @title("SetUp and TearDown connect to Postgres DataBase for testing")
 @fixture(scope="function")
-def postgres() -> connect:
-    """Connect to Postgres DataBase through ssh"""
+def postgres(request) -> connect:
+    """Borrow a connection to Postgres DataBase from the pool behind the ssh tunnel
+
+    For tests marked with db_isolation all changes made through the connection
+    are kept in a transaction and rolled back at teardown. Use it only if
+    the backend does not need to see the data, uncommitted rows are invisible to it.
+
+    Args:
+        request: pytest request of the test
+    """
     with step("SetUp. Connecting to Postgres database"):
-        conn = PostgresDB(
-            ssh_username=ssh_username,
-            ssh_password=ssh_password,
-            local_server_ip=local_server_ip,
-            remote_server_ip=remote_server_ip,
-            db_username=db_username,
-            db_password=db_password,
-            database_name=database_name,
-            port_ssh=port_ssh,
-        )
+        conn = connect_to_postgres()
+    if request.node.get_closest_marker("db_isolation"):
+        with step("SetUp. Starting transaction for isolation of the test"):
+            conn.begin()
     yield conn
-    with step("TearDown. Closing connect to Postgres database"):
+    if conn.isolated:
+        with step("TearDown. Rolling back transaction of the test"):
+            conn.rollback()
+    with step("TearDown. Returning connect to Postgres database to the pool"):
+        conn.close()
+
+
+@title("SetUp and TearDown pool of async connections to Postgres DataBase")
+@fixture(scope="session")
+def postgres_async() -> AsyncPostgresDB:
+    """Pool of asynchronous connections behind the ssh tunnel of the process
+
+    Independent queries of the fixtures run concurrently on it, each fixture
+    awaits them with its own asyncio.run().
+    """
+    conn = connect_to_postgres_async()
+    yield conn
+    with step("TearDown. Closing async connections to Postgres database"):
+        asyncio.run(conn.close())
+
+
+@title("Loading the catalog of products from Postgres DataBase")
+@fixture(scope="session")
+def catalog() -> CatalogSnapshot:
+    """Snapshot of the product table, loaded once per run (per pytest-xdist worker)
+
+    The products are not changed by the tests, so the expected pages and
+    random products are taken from it instead of querying DB in every test.
+    """
+    conn = connect_to_postgres()
+    try:
+        return CatalogSnapshot.load(conn)
+    finally:
         conn.close()
 
 
@@ -102,16 +366,8 @@ def generate_and_insert_user(postgres):
 
     user = generate_user()
 
-    key_mapping = {
-        "firstName": "first_name",
-        "lastName": "last_name",
-        "birthDate": "birth_date",
-        "phoneNumber": "phone_number",
-        "stripeCustomerToken": "stripe_customer_token",
-    }
-    user_to_insert = {key_mapping.get(k, k): v for k, v in user.items()}
-
-    postgres.create_user(user_to_insert)
+    postgres.create_user(to_db_user(user))
+    cleanup_registry.add_user(user_id=user["id"])
 
     return user
 
@@ -130,19 +386,64 @@ def create_user(postgres):
 
     yield user_to_create
 
-    with step("Removing user from DB"):
-        postgres.delete_user(user_to_create["id"])
+    if postgres.isolated:
+        # The user is removed by rollback of the test transaction
+        return
+    with step("Deleting user via API"):
+        delete_user_through_api(user_to_create)
+
+
+@title("Pool of pre-authenticated users")
+@fixture(scope="session")
+def user_pool(tmp_path_factory, worker_id):
+    """Pool of pre-authenticated users shared by pytest-xdist workers
+
+    Args:
+        tmp_path_factory: pytest factory of temporary directories
+        worker_id: id of pytest-xdist worker, "master" without xdist
+    """
+    state_dir = tmp_path_factory.getbasetemp()
+    if worker_id != "master":
+        state_dir = state_dir.parent
+    # Changes made by the tests in the fake backend are invisible to the checks of the pool in DB
+    size = USER_POOL_SIZE if BACKEND_MODE != "fake" else 0
+    conn = connect_to_postgres() if size else None
+    pool = UserPool(
+        postgres=conn,
+        create_user=lambda: generate_and_insert_user(conn),
+        state_dir=state_dir,
+        size=size,
+    )
+    with step("SetUp. Filling the pool of authorized users"):
+        pool.fill()
+
+    yield pool
+
+    # The pool is removed by the controller, when no worker can lease from it anymore
+    if conn:
+        conn.close()
 
 
 @title("Creating an authorized user")
 @fixture(scope="function")
-def create_authorized_user(postgres):
+def create_authorized_user(request, user_pool):
     """Creating and authorizing a user
 
+    The user is leased from the pool of pre-authenticated users, a new user
+    is created only if the pool is disabled or empty.
+
     Args:
-        postgres: connection to Postgres DataBase
+        request: pytest request of the test
+        user_pool: pool of pre-authenticated users
     """
+    if leased_user := user_pool.lease():
+        yield leased_user
 
+        with step("Returning user to the pool"):
+            user_pool.release(leased_user)
+        return
+
+    postgres = request.getfixturevalue("postgres")
     with step("Creating user in DB"):
         user_to_create = generate_and_insert_user(postgres)
 
@@ -155,8 +456,8 @@ def create_authorized_user(postgres):
 
     yield {"user": user_to_create, "token": token, "refreshToken": refresh_token}
 
-    with step("Removing user from DB"):
-        postgres.delete_user(user_to_create["id"])
+    with step("Deleting user via API"):
+        delete_user_through_api(user_to_create, token)
 
 
 @fixture(scope="function")
@@ -180,12 +481,10 @@ def create_and_delete_user_via_api():
     with step("Getting user's info via API"):
         getting_user_response = UsersAPI().get_user(token=token)
         new_user_id = getting_user_response.json()["id"]
+        cleanup_registry.add_user(user_id=new_user_id)
 
     yield token, new_user_id
 
-    with step("Deleting user"):
-        UsersAPI().delete_user(token=token)
-
 
 @fixture(scope="function")
 def creating_and_adding_product_to_shopping_cart(create_authorized_user):
@@ -284,11 +583,66 @@ def add_product_to_favorite_list(create_authorized_user, product_quantity):
     yield token, product_list_to_favorite
 
 
+def watch_mailbox(imap_server: str, email_address: str, mail_password: str):
+    """Watching the mailbox during the session, depending on MAIL_MODE
+
+    In "local" mode codes are taken directly from the local mail sink of the process,
+    pytest-xdist workers watch it over IMAP.
+
+    Args:
+        imap_server: IMAP server of the mailbox in "gmail" mode
+        email_address: address of the mailbox
+        mail_password: password of the mailbox
+    """
+    if local_mail_sink:
+        yield local_mail_sink
+        return
+
+    with step("SetUp. Connecting to the mailbox"):
+        if MAIL_MODE == "local":
+            watcher = MailboxWatcher(
+                imap_server="localhost",
+                email_address=email_address,
+                mail_password=mail_password,
+                port=MAIL_SINK_IMAP_PORT,
+                ssl=False,
+            ).start()
+        else:
+            watcher = MailboxWatcher(
+                imap_server=imap_server,
+                email_address=email_address,
+                mail_password=mail_password,
+            ).start()
+    yield watcher
+    with step("TearDown. Disconnecting from the mailbox"):
+        watcher.close()
+
+
+@title("Watcher of the mailbox of user#1")
+@fixture(scope="session")
+def mailbox_watcher():
+    """Watcher of the mailbox receiving messages to plus-addresses of user#1"""
+    yield from watch_mailbox(imap_server, email_address_to_connect, gmail_password)
+
+
+@title("Watcher of the mailbox of user#2")
+@fixture(scope="session")
+def mailbox_watcher2():
+    """Watcher of the mailbox receiving messages to plus-addresses of user#2"""
+    yield from watch_mailbox(imap_server2, email_address_to_connect2, gmail_password2)
+
+
 @pytest.fixture
-def registration_and_cleanup_user_through_api(request):
+def registration_and_cleanup_user_through_api(request, mailbox_watcher):
     with step("Prepare data for registration"):
         email_random = append_random_to_local_part_email(
-            domain=EMAIL_DOMAIN, email_local_part=EMAIL_LOCAL_PART, length_random_part=5
+            domain=EMAIL_DOMAIN,
+            email_local_part=cleanup_registry.run_local_part(EMAIL_LOCAL_PART),
+            length_random_part=5,
+        )
+        cleanup_registry.add_user(email=email_random)
+        cleanup_registry.add_email_prefix(
+            cleanup_registry.run_local_part(EMAIL_LOCAL_PART), EMAIL_DOMAIN
         )
         data_for_registration = {
             "firstName": request.param["firstName"],
@@ -301,19 +655,8 @@ def registration_and_cleanup_user_through_api(request):
         AuthenticateAPI().registration(body=data_for_registration)
 
     with step("Extract code from email for confirmation registration"):
-        email_box = "Inbox"
-        key = "from_"
-        value = request.param["email_iced_late"]
-        imap_server = request.param["imap_server"]
-        email_address_to_connect = request.param["email_address_to_connect"]
-        gmail_password = request.param["gmail_password"]
-
-        code_from_email = Email(
-            imap_server=imap_server,
-            email_address=email_address_to_connect,
-            mail_password=gmail_password,
-        ).extract_confirmation_code_from_email(
-            email_box=email_box, key=key, value=value
+        code_from_email = mailbox_watcher.wait_for_code(
+            recipient=email_random, sender=request.param["email_iced_late"]
         )
         assert_that(code_from_email, is_not(None), "Code should not be empty")
 
@@ -333,16 +676,17 @@ def registration_and_cleanup_user_through_api(request):
         "code": code_from_email,
     }
 
-    with step("Deleting user"):
-        UsersAPI().delete_user(
-            token=response_after_confirmation_registration.json().get("token")
-        )
-
 
 @pytest.fixture
-def register_user_and_reset_password(request):
+def register_user_and_reset_password(request, mailbox_watcher2):
     email_random = append_random_to_local_part_email(
-        domain=EMAIL_DOMAIN2, email_local_part=EMAIL_LOCAL_PART2, length_random_part=5
+        domain=EMAIL_DOMAIN2,
+        email_local_part=cleanup_registry.run_local_part(EMAIL_LOCAL_PART2),
+        length_random_part=5,
+    )
+    cleanup_registry.add_user(email=email_random)
+    cleanup_registry.add_email_prefix(
+        cleanup_registry.run_local_part(EMAIL_LOCAL_PART2), EMAIL_DOMAIN2
     )
     data_for_registration = {
         "firstName": request.param["firstName"],
@@ -355,19 +699,8 @@ def register_user_and_reset_password(request):
         AuthenticateAPI().registration(body=data_for_registration)
 
     with step("Extract code from email for confirmation registration"):
-        email_box = "Inbox"
-        key = "from_"
-        value = request.param["email_iced_late"]
-        imap_server = request.param["imap_server"]
-        email_address_to_connect = request.param["email_address_to_connect"]
-        gmail_password = request.param["gmail_password"]
-
-        code_registration_from_email = Email(
-            imap_server=imap_server,
-            email_address=email_address_to_connect,
-            mail_password=gmail_password,
-        ).extract_confirmation_code_from_email(
-            email_box=email_box, key=key, value=value
+        code_registration_from_email = mailbox_watcher2.wait_for_code(
+            recipient=email_random, sender=request.param["email_iced_late"]
         )
         assert_that(
             code_registration_from_email, not_(None), "Code should not be empty"
@@ -388,15 +721,8 @@ def register_user_and_reset_password(request):
         AuthenticateAPI().forgot_password(email=email_to_reset_password)
 
     with step("Verify reset code successfully delivered to user's email"):
-        email_box = "Inbox"
-        key = "from_"
-        value = request.param["email_iced_late"]
-        code_reset_from_email = Email(
-            imap_server=imap_server,
-            email_address=email_address_to_connect2,
-            mail_password=gmail_password,
-        ).extract_confirmation_code_from_email(
-            email_box=email_box, key=key, value=value
+        code_reset_from_email = mailbox_watcher2.wait_for_code(
+            recipient=email_random, sender=request.param["email_iced_late"]
         )
 
         assert_that(code_reset_from_email, not_(None), "Code should not be empty")
@@ -407,11 +733,6 @@ def register_user_and_reset_password(request):
         "code": code_reset_from_email,
     }
 
-    with step("Deleting user"):
-        UsersAPI().delete_user(
-            token=response_after_confirmation_registration.json().get("token")
-        )
-
 
 def generate_and_insert_user_with_custom_gmail(postgres, user):
     """Generating and inserting a user into the database
@@ -421,16 +742,8 @@ def generate_and_insert_user_with_custom_gmail(postgres, user):
         user: A dictionary representing the user to insert
     """
 
-    key_mapping = {
-        "firstName": "first_name",
-        "lastName": "last_name",
-        "birthDate": "birth_date",
-        "phoneNumber": "phone_number",
-        "stripeCustomerToken": "stripe_customer_token",
-    }
-    user_to_insert = {key_mapping.get(k, k): v for k, v in user.items()}
-
-    postgres.create_user(user_to_insert)
+    postgres.create_user(to_db_user(user))
+    cleanup_registry.add_user(user_id=user["id"])
 
     return user
 
@@ -0,0 +1,105 @@
+import json
+import smtplib
+import threading
+from email.message import EmailMessage
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from pytest import fixture
+
+from configs import email_iced_late
+from framework.tools.fake_backend import FakeBackend, FakeStore, generate_products
+from framework.tools.generators import generate_user, to_db_user
+from framework.tools.mail_sink import LocalMailSink
+
+
+class EchoHandler(BaseHTTPRequestHandler):
+    """Local stub answering every request with its method, path and Authorization header"""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def _echo(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        body = json.dumps(
+            {
+                "method": self.command,
+                "path": self.path,
+                "authorization": self.headers.get("Authorization"),
+            }
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _echo
+
+    def log_message(self, format, *args):
+        pass
+
+
+class EchoServer(ThreadingHTTPServer):
+    # The default backlog of 5 refuses connections of concurrent clients under load
+    request_queue_size = 128
+
+
+@fixture(scope="session")
+def echo_server():
+    """Starting the local echo stub, yields its base URL"""
+    server = EchoServer(("127.0.0.1", 0), EchoHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield f"http://127.0.0.1:{server.server_port}"
+
+    server.shutdown()
+    server.server_close()
+
+
+@fixture(scope="function")
+def fake_backend_user():
+    """User known to local_fake_backend, with the password in plain text"""
+    return generate_user()
+
+
+@fixture(scope="function")
+def local_fake_backend(fake_backend_user):
+    """Starting the fake backend with a small catalogue and fake_backend_user, yields the backend"""
+    backend = FakeBackend(store=FakeStore(products=generate_products(25, seed=1)))
+    backend.store.add_user(to_db_user(fake_backend_user))
+    backend.start()
+
+    yield backend
+
+    backend.close()
+
+
+@fixture(scope="function")
+def local_mail_sink():
+    """Starting the local mail sink on free ports of the loopback interface, yields the sink"""
+    sink = LocalMailSink(host="127.0.0.1").start()
+
+    yield sink
+
+    sink.close()
+
+
+@fixture(scope="function")
+def send_code(local_mail_sink):
+    """Function sending a message with a confirmation code to local_mail_sink over SMTP like the backend"""
+
+    def send(recipient: str, code: str) -> None:
+        message = EmailMessage()
+        message["From"] = email_iced_late
+        message["To"] = recipient
+        message["Subject"] = "Email confirmation"
+        message.set_content(
+            f"Your code: {code}\r\n.\r\nThe line above starts with a dot"
+        )
+        with smtplib.SMTP("127.0.0.1", local_mail_sink.smtp_port) as smtp:
+            smtp.login("backend", "any password")
+            smtp.send_message(message)
+
+    return send
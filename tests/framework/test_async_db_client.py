@@ -0,0 +1,227 @@
+import asyncio
+import socket
+import threading
+import time
+from collections import namedtuple
+
+import pytest
+from allure import description, feature, step, title
+from hamcrest import assert_that, equal_to, less_than
+from psycopg2 import ProgrammingError
+from psycopg2.extensions import POLL_OK, POLL_READ
+
+from framework.clients import async_db_client
+from framework.clients.async_db_client import AsyncDBClient
+
+Column = namedtuple("Column", "name")
+
+DELAY = 0.05
+
+
+class FakeServer:
+    """Answers queries of the fake connections after DELAY seconds, counting the running ones"""
+
+    def __init__(self):
+        self.connections = []
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def connect(self, async_: bool, **connection_params) -> "FakeAsyncConnection":
+        assert async_
+        conn = FakeAsyncConnection(self)
+        self.connections.append(conn)
+        return conn
+
+    def started(self) -> None:
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+
+    def finished(self) -> None:
+        with self.lock:
+            self.running -= 1
+
+
+class FakeAsyncConnection:
+    """Asynchronous connection, readable when the answer to the query has come"""
+
+    def __init__(self, server: FakeServer):
+        self.server = server
+        self.reader, self.writer = socket.socketpair()
+        self.reader.setblocking(False)
+        self.closed = 0
+        self.timer = None
+        self.error = None
+
+    def fileno(self) -> int:
+        return self.reader.fileno()
+
+    def query(self, error) -> None:
+        self.error = error
+        self.server.started()
+        self.timer = threading.Timer(DELAY, self.writer.send, (b"1",))
+        self.timer.start()
+
+    def poll(self) -> int:
+        if self.timer is None:
+            return POLL_OK
+        try:
+            self.reader.recv(1)
+        except BlockingIOError:
+            return POLL_READ
+        self.timer = None
+        self.server.finished()
+        if self.error:
+            raise self.error
+        return POLL_OK
+
+    def isexecuting(self) -> bool:
+        return self.timer is not None
+
+    def cursor(self) -> "FakeAsyncCursor":
+        return FakeAsyncCursor(self)
+
+    def close(self) -> None:
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+            self.server.finished()
+        self.closed = 1
+        self.reader.close()
+        self.writer.close()
+
+
+class FakeAsyncCursor:
+    """Cursor of a query returning its params as one row, "FAIL" fails"""
+
+    def __init__(self, conn: FakeAsyncConnection):
+        self.conn = conn
+        self.description = [Column("value")]
+        self.rows = []
+        self.rowcount = -1
+
+    def execute(self, query: str, params: tuple):
+        self.conn.query(ProgrammingError(query) if query == "FAIL" else None)
+        self.rows = [params]
+        self.rowcount = 1
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+@pytest.fixture
+def fake_server(monkeypatch) -> FakeServer:
+    server = FakeServer()
+    monkeypatch.setattr(async_db_client, "connect", server.connect)
+    return server
+
+
+def client(size: int) -> AsyncDBClient:
+    return AsyncDBClient(
+        host="localhost", port="5432", dbname="db", user="u", password="", size=size
+    )
+
+
+@feature("Async Postgres client")
+class TestAsyncDBClient:
+    @title("Independent queries run concurrently on the pool of connections")
+    @description(
+        "GIVEN AsyncDBClient with 5 connections to a server answering after 50 ms "
+        "WHEN 20 queries are gathered in one event loop "
+        "THEN every query gets its own rows, at most 5 queries run at once on 5 connections "
+        "and all of them take about the time of 4 queries"
+    )
+    def test_concurrent_queries(self, fake_server):
+        db = client(size=5)
+
+        async def run_all() -> list:
+            async with db:
+                return await asyncio.gather(
+                    *(db.fetch_all("SELECT %s", (number,)) for number in range(20))
+                )
+
+        with step("Gathering 20 queries"):
+            start = time.perf_counter()
+            rows = asyncio.run(run_all())
+            elapsed = time.perf_counter() - start
+
+        with step("Verify that every query got its own rows"):
+            assert_that(rows, equal_to([[(number,)] for number in range(20)]))
+
+        with step(
+            "Verify that the queries ran concurrently within the size of the pool"
+        ):
+            assert_that(fake_server.max_running, equal_to(5))
+            assert_that(len(fake_server.connections), equal_to(5))
+            assert_that(elapsed, less_than(20 * DELAY / 2))
+
+        with step("Verify that the connections are closed with the client"):
+            assert_that(
+                [conn.closed for conn in fake_server.connections], equal_to([1] * 5)
+            )
+
+    @title("Failed and cancelled queries release their connection")
+    @description(
+        "GIVEN AsyncDBClient with 2 connections "
+        "WHEN a query fails and another one is cancelled while running "
+        "THEN the error is raised, the connection of the failed query is reused, "
+        "the connection of the cancelled query is closed and the pool still runs 2 queries at once"
+    )
+    def test_failed_and_cancelled_queries(self, fake_server):
+        db = client(size=2)
+
+        async def fail_and_cancel() -> None:
+            with step("Verify that the error of the query is raised"):
+                with pytest.raises(ProgrammingError):
+                    await db.execute("FAIL")
+                assert_that(await db.execute("UPDATE t SET v = %s", (1,)), equal_to(1))
+                assert_that(len(fake_server.connections), equal_to(1))
+
+            with step("Cancelling a running query"):
+                with pytest.raises(asyncio.TimeoutError):
+                    await asyncio.wait_for(db.fetch_all("SELECT %s", (1,)), DELAY / 5)
+                assert_that(fake_server.connections[0].closed, equal_to(1))
+
+            with step("Verify that the pool still runs 2 queries at once"):
+                rows = await asyncio.gather(
+                    *(db.fetch_all("SELECT %s", (number,)) for number in range(4))
+                )
+                assert_that(rows, equal_to([[(number,)] for number in range(4)]))
+                assert_that(fake_server.max_running, equal_to(2))
+                await db.close()
+
+        asyncio.run(fail_and_cancel())
+        assert_that(
+            [conn.closed for conn in fake_server.connections], equal_to([1, 1, 1])
+        )
+
+    @title("Client serves consecutive event loops")
+    @description(
+        "GIVEN AsyncDBClient with 2 connections, not closed between event loops "
+        "WHEN 4 queries are gathered by two consecutive asyncio.run() calls, as by two fixtures "
+        "THEN both loops get their rows with at most 2 queries at once on the same 2 connections"
+    )
+    def test_consecutive_event_loops(self, fake_server):
+        db = client(size=2)
+
+        async def run_all() -> list:
+            return await asyncio.gather(
+                *(db.fetch_all("SELECT %s", (number,)) for number in range(4))
+            )
+
+        for run in ("first", "second"):
+            with step(f"Verify the queries of the {run} event loop"):
+                assert_that(
+                    asyncio.run(run_all()),
+                    equal_to([[(number,)] for number in range(4)]),
+                )
+                assert_that(fake_server.max_running, equal_to(2))
+                assert_that(len(fake_server.connections), equal_to(2))
+        asyncio.run(db.close())
@@ -0,0 +1,168 @@
+import asyncio
+import glob
+import json
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+from allure import description, feature, step, title
+from hamcrest import assert_that, calling, equal_to, greater_than, is_, raises
+
+from framework.clients.http_client import get_http_client
+from framework.endpoints.async_api import (
+    AsyncAuthenticateAPI,
+    AsyncCartAPI,
+    AsyncUsersAPI,
+)
+
+CALLS = 200
+
+ROOT = Path(__file__).resolve().parents[2]
+
+# Two tests calling the async endpoint one after another in one process
+CONSECUTIVE_TESTS = """
+import asyncio
+import os
+
+from framework.endpoints.async_api import AsyncCartAPI
+
+
+def call(token):
+    cart_api = AsyncCartAPI()
+    cart_api.url = os.environ["ECHO_SERVER"] + f"/api/v1/cart/{token}"
+    asyncio.run(cart_api.get_user_cart(token=token))
+
+
+def test_first():
+    call("first")
+
+
+def test_second():
+    call("second")
+"""
+
+
+@feature("Async endpoint classes")
+class TestAsyncEndpoints:
+    @title("Concurrent calls from one event loop get their own responses")
+    @description(
+        "GIVEN AsyncCartAPI pointed at a local stub "
+        "WHEN 200 calls with different tokens are gathered in one event loop "
+        "THEN every call gets the response to its own request, sent by several threads through the HTTP client of the process"
+    )
+    def test_concurrent_calls(self, echo_server):
+        with step("Pointing the async endpoint at the local stub"):
+            cart_api = AsyncCartAPI()
+            cart_api.url = f"{echo_server}/api/v1/cart"
+            assert_that(cart_api.client.client, is_(get_http_client()))
+
+        threads = set()
+
+        def record_thread(method, url, status, seconds):
+            threads.add(threading.current_thread().name)
+
+        async def send_all() -> list:
+            return await asyncio.gather(
+                *(
+                    cart_api.get_user_cart(token=f"token-{number}")
+                    for number in range(CALLS)
+                )
+            )
+
+        with step("Gathering the calls in one event loop"):
+            get_http_client().add_listener(record_thread)
+            try:
+                responses = asyncio.run(send_all())
+            finally:
+                get_http_client().remove_listener(record_thread)
+
+        with step("Verify that every call got the response with its own token"):
+            received = [response.json()["authorization"] for response in responses]
+            assert_that(received, equal_to([f"Bearer token-{n}" for n in range(CALLS)]))
+
+        with step("Verify that the requests were sent concurrently"):
+            assert_that(len(threads), greater_than(1))
+
+    @title("expected_status_code is checked as in the sync classes")
+    @description(
+        "GIVEN the fake backend knows a user "
+        "WHEN the user authenticates through the async endpoint classes "
+        "THEN a response with the expected status code is returned and an unexpected one fails the call"
+    )
+    def test_expected_status_code(self, local_fake_backend, fake_backend_user):
+        auth_api, users_api = AsyncAuthenticateAPI(), AsyncUsersAPI()
+        auth_api.url = f"{local_fake_backend.url}/api/v1/auth"
+        users_api.url = f"{local_fake_backend.url}/api/v1/users"
+        email, password = fake_backend_user["email"], fake_backend_user["password"]
+
+        with step("Authentication with the right password and getting the user"):
+            response = asyncio.run(
+                auth_api.authentication(email=email, password=password)
+            )
+            user = asyncio.run(users_api.get_user(token=response.json()["token"]))
+            assert_that(user.json()["email"], equal_to(email))
+
+        with step("Verify that the expected error status is accepted"):
+            response = asyncio.run(
+                auth_api.authentication(
+                    email=email, password=password + "x", expected_status_code=401
+                )
+            )
+            assert_that(response.status_code, equal_to(401))
+
+        with step("Verify that an unexpected status fails the call"):
+            assert_that(
+                calling(asyncio.run).with_args(
+                    auth_api.authentication(email=email, password=password + "x")
+                ),
+                raises(AssertionError, "Expected status code 200"),
+            )
+
+    @title("Requests of consecutive tests are logged to their own Allure results")
+    @description(
+        "GIVEN two tests calling the async endpoint one after another in one process "
+        "WHEN they are run with Allure results "
+        "THEN the result of every test has the step of its own request"
+    )
+    def test_request_steps_of_consecutive_tests(self, echo_server, tmp_path):
+        (tmp_path / "test_consecutive.py").write_text(CONSECUTIVE_TESTS)
+        results = tmp_path / "results"
+
+        with step("Running the tests with Allure results"):
+            run = subprocess.run(
+                [
+                    sys.executable,
+                    "-m",
+                    "pytest",
+                    "-q",
+                    "-p",
+                    "no:cacheprovider",
+                    f"--alluredir={results}",
+                    str(tmp_path / "test_consecutive.py"),
+                ],
+                cwd=tmp_path,
+                env={**os.environ, "PYTHONPATH": str(ROOT), "ECHO_SERVER": echo_server},
+                capture_output=True,
+                text=True,
+            )
+            assert_that(run.returncode, equal_to(0), run.stdout + run.stderr)
+
+        with step("Verify that every test has the step of its own request"):
+            steps = {}
+            for path in glob.glob(str(results / "*-result.json")):
+                result = json.loads(Path(path).read_text())
+                steps[result["name"]] = [s["name"] for s in result.get("steps", [])]
+            assert_that(
+                steps,
+                equal_to(
+                    {
+                        name: [f"GET {echo_server}/api/v1/cart/{token}"]
+                        for name, token in (
+                            ("test_first", "first"),
+                            ("test_second", "second"),
+                        )
+                    }
+                ),
+            )
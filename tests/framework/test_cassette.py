@@ -0,0 +1,104 @@
+import uuid
+
+import pytest
+from allure import description, feature, step, title
+from hamcrest import assert_that, equal_to
+
+from framework.clients.cassette import CassetteMissError
+from framework.clients.http_client import HttpClient
+from framework.tools.generators import generate_user
+
+# Nothing listens on the port, so a request reaching the network fails
+UNREACHABLE = "http://127.0.0.1:9"
+# Ids of products are the same in every run
+PRODUCT_A = "4fa32a6e-8a2b-4b43-9b4a-3f1e0b3d1a01"
+PRODUCT_B = "9b1c7d02-5e6f-4a8b-8c9d-0e1f2a3b4c5d"
+
+
+def send_requests(client: HttpClient, base_url: str) -> list:
+    """Requests of a test with a freshly generated user"""
+    user = generate_user()
+    return [
+        client.post(
+            f"{base_url}/api/v1/auth/authenticate",
+            json={"email": user["email"], "password": user["password"]},
+        ).json(),
+        client.get(
+            f"{base_url}/api/v1/products/{PRODUCT_A}/reviews",
+            params={"email": user["email"], "page": 0},
+        ).json(),
+        client.put(
+            f"{base_url}/api/v1/users",
+            json={"id": user["id"], "stripeCustomerToken": user["id"]},
+        ).json(),
+    ]
+
+
+@feature("Record and replay of HTTP interactions")
+class TestCassette:
+    @title("Requests of the next run are answered from the recorded cassette")
+    @description(
+        "GIVEN requests with generated emails and ids recorded into a cassette "
+        "WHEN the same requests are sent with other generated emails and ids in replay mode "
+        "THEN the recorded responses are returned without network"
+    )
+    def test_record_then_replay(self, echo_server, tmp_path):
+        cassette_path = tmp_path / "api.jsonl"
+
+        with step("Recording the requests sent to the local stub"):
+            recording = HttpClient(cassette_mode="record", cassette_path=cassette_path)
+            recorded = send_requests(recording, echo_server)
+            recording.close()
+
+        with step("Replaying the requests of another run without network"):
+            replaying = HttpClient(cassette_mode="replay", cassette_path=cassette_path)
+            replayed = send_requests(replaying, UNREACHABLE)
+
+        with step("Verify that the recorded responses are returned"):
+            assert_that(replayed, equal_to(recorded))
+
+        with step("Verify that a request with other shape of ids is not replayed"):
+            other_id = str(uuid.uuid4())
+            with pytest.raises(CassetteMissError):
+                replaying.put(
+                    f"{UNREACHABLE}/api/v1/users",
+                    json={"id": other_id, "stripeCustomerToken": str(uuid.uuid4())},
+                )
+            replaying.close()
+
+    @title("Requests for different products are answered by their own responses")
+    @description(
+        "GIVEN reviews of two products recorded into a cassette "
+        "WHEN the reviews are requested in the other order in replay mode "
+        "THEN each request gets the response recorded for its product and an unrecorded product is not replayed"
+    )
+    def test_replay_keeps_product_ids(self, echo_server, tmp_path):
+        cassette_path = tmp_path / "api.jsonl"
+
+        def reviews_path(base_url: str, product_id: str) -> str:
+            return f"{base_url}/api/v1/products/{product_id}/reviews"
+
+        with step("Recording the reviews of two products"):
+            recording = HttpClient(cassette_mode="record", cassette_path=cassette_path)
+            for product_id in (PRODUCT_A, PRODUCT_B):
+                recording.get(reviews_path(echo_server, product_id))
+            recording.close()
+
+        with step("Replaying the requests in the other order"):
+            replaying = HttpClient(cassette_mode="replay", cassette_path=cassette_path)
+            replayed = {
+                product_id: replaying.get(reviews_path(UNREACHABLE, product_id)).json()
+                for product_id in (PRODUCT_B, PRODUCT_A)
+            }
+
+        with step("Verify that each product got its own response"):
+            for product_id, response in replayed.items():
+                assert_that(
+                    response["path"],
+                    equal_to(f"/api/v1/products/{product_id}/reviews"),
+                )
+
+        with step("Verify that a request for another product is not replayed"):
+            with pytest.raises(CassetteMissError):
+                replaying.get(reviews_path(UNREACHABLE, str(uuid.uuid4())))
+            replaying.close()
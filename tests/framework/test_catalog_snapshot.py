@@ -0,0 +1,117 @@
+import random
+import uuid
+
+from allure import description, feature, step, title
+from hamcrest import assert_that, equal_to, has_length
+
+from framework.tools.catalog_snapshot import CatalogSnapshot
+
+
+def synthetic_catalog(quantity: int, seed: int = 1) -> list:
+    """Rows of PostgresDB.get_catalog(SORT_FIELDS) with repeated prices and quantities"""
+    rng = random.Random(seed)
+    products = [
+        {
+            "id": uuid.UUID(int=rng.getrandbits(128), version=4),
+            "name": f"Product {rng.randrange(1000):03}",
+            "description": "",
+            "price": rng.choice((1.5, 2.0, 10.0)),
+            "quantity": rng.randrange(5),
+            "active": i % 3 != 0,
+        }
+        for i in range(quantity)
+    ]
+    # row_number() OVER (ORDER BY field, id)
+    for field in CatalogSnapshot.SORT_FIELDS:
+        ordered = sorted(products, key=lambda p: (p[field], p["id"]))
+        for rank, product in enumerate(ordered, start=1):
+            product[f"{field}_rank"] = rank
+    return products
+
+
+def product_by_filter(
+    products: list, field: str, ascend: bool = False, size: int = -1, page: int = 0
+) -> list:
+    """ORDER BY field, id ASC|DESC LIMIT size OFFSET size * page of PostgresDB.get_product_by_filter"""
+    ordered = sorted(products, key=lambda p: (p[field], p["id"]), reverse=not ascend)
+    if size > 0:
+        ordered = ordered[size * page : size * page + size]
+    return ordered
+
+
+@feature("Catalog snapshot")
+class TestCatalogSnapshot:
+    @title("Pages of the snapshot are the pages of DB")
+    @description(
+        "GIVEN a snapshot of 23 products with repeated values of sort fields "
+        "WHEN pages of every size, sort field and order are taken, including the tail and past the end "
+        "THEN they are the pages of ORDER BY, LIMIT and OFFSET"
+    )
+    def test_page(self):
+        products = synthetic_catalog(23)
+        catalog = CatalogSnapshot(products)
+
+        with step("Verify every page of every sort field, order and size"):
+            for field in CatalogSnapshot.SORT_FIELDS:
+                for ascend in (True, False):
+                    for size in (1, 5, 10, 23, 30):
+                        for page in range(len(products) // size + 2):
+                            assert_that(
+                                catalog.page(field, ascend, size, page),
+                                equal_to(
+                                    product_by_filter(
+                                        products, field, ascend, size, page
+                                    )
+                                ),
+                                f"{field} {ascend} {size} {page}",
+                            )
+
+        with step("Verify the descending tail page shorter than the size"):
+            tail = catalog.page("price", ascend=False, size=5, page=4)
+            assert_that(tail, has_length(3))
+            assert_that(
+                tail, equal_to(catalog.page("price", ascend=True, size=3)[::-1])
+            )
+
+        with step("Verify that pages past the end are empty"):
+            assert_that(
+                catalog.page("name", ascend=False, size=5, page=5), equal_to([])
+            )
+            assert_that(
+                catalog.page("name", ascend=True, size=5, page=100), equal_to([])
+            )
+
+        with step("Verify that all products are returned for size not positive"):
+            for size in (0, -1):
+                for ascend in (True, False):
+                    assert_that(
+                        catalog.page("quantity", ascend, size, page=3),
+                        equal_to(product_by_filter(products, "quantity", ascend)),
+                    )
+
+    @title("Random products of the snapshot")
+    @description(
+        "GIVEN a snapshot of products, a third of them inactive "
+        "WHEN random products are taken "
+        "THEN they are distinct active products, reproducible by the seed of generator"
+    )
+    def test_random_products(self):
+        products = synthetic_catalog(30)
+        catalog = CatalogSnapshot(products)
+        active_ids = {p["id"] for p in products if p["active"]}
+
+        with step("Verify that the random products are distinct and active"):
+            chosen = catalog.random_products(10, rng=random.Random(7))
+            ids = [p["id"] for p in chosen]
+            assert_that(set(ids), has_length(10))
+            assert_that(set(ids) - active_ids, equal_to(set()))
+
+        with step("Verify that the same seed gives the same products"):
+            again = catalog.random_products(10, rng=random.Random(7))
+            assert_that([p["id"] for p in again], equal_to(ids))
+
+        with step("Verify that no more than all active products are returned"):
+            everything = catalog.random_products(100)
+            assert_that(everything, has_length(len(active_ids)))
+            assert_that({p["id"] for p in everything}, equal_to(active_ids))
+            assert_that(catalog.random_product()["id"] in active_ids, equal_to(True))
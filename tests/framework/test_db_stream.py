@@ -0,0 +1,91 @@
+from collections import namedtuple
+
+import pytest
+from allure import description, feature, step, title
+from hamcrest import assert_that, equal_to, is_, same_instance
+
+from framework.clients.db_stream import (
+    ROW_TYPES,
+    SlotsRow,
+    convert_rows,
+    row_converter,
+    slots_row_type,
+)
+
+Column = namedtuple("Column", "name")
+
+
+class FakeCursor:
+    """Executed cursor with the given columns and rows"""
+
+    def __init__(self, columns: tuple, rows: list):
+        self.description = [Column(name) for name in columns] if columns else None
+        self.rows = rows
+
+    def __iter__(self):
+        return iter(self.rows)
+
+
+ROWS = [("id-1", "Latte", 3.5), ("id-2", "Mocha", None)]
+COLUMNS = ("id", "name", "price")
+
+
+@feature("Row types of query results")
+class TestDBStream:
+    @title("Rows are converted to tuples, dicts and slots rows")
+    @description(
+        "GIVEN an executed cursor with two rows "
+        "WHEN its rows are converted to every row type "
+        "THEN tuples, dicts by column and slots rows with the same values are returned"
+    )
+    def test_convert_rows(self):
+        with step("Verify that tuples and dicts keep the values of the columns"):
+            assert_that(
+                list(convert_rows(FakeCursor(COLUMNS, ROWS), "tuple")), equal_to(ROWS)
+            )
+            assert_that(
+                list(convert_rows(FakeCursor(COLUMNS, ROWS), "dict")),
+                equal_to([dict(zip(COLUMNS, row)) for row in ROWS]),
+            )
+
+        with step("Verify that slots rows are read by attribute, by key and as tuple"):
+            first, second = convert_rows(FakeCursor(COLUMNS, ROWS), "slots")
+            assert_that(first.name, equal_to("Latte"))
+            assert_that(second["price"], is_(None))
+            assert_that(tuple(first), equal_to(ROWS[0]))
+            assert_that(first.as_dict(), equal_to(dict(zip(COLUMNS, ROWS[0]))))
+            assert_that(
+                repr(second), equal_to("Row(id='id-2', name='Mocha', price=None)")
+            )
+
+        with step("Verify that a query without result gives no rows"):
+            for row_type in ROW_TYPES:
+                assert_that(
+                    list(convert_rows(FakeCursor((), []), row_type)), equal_to([])
+                )
+
+    @title("Slots row classes are created once per set of columns")
+    @description(
+        "GIVEN rows of the same and of different columns "
+        "WHEN their classes are created and the rows are compared "
+        "THEN the class is reused for the same columns and rows are equal only with the same class and values"
+    )
+    def test_slots_row_type(self):
+        with step("Verify that the class is cached and has no __dict__"):
+            row_class = slots_row_type(COLUMNS)
+            assert_that(slots_row_type(COLUMNS), same_instance(row_class))
+            assert_that(issubclass(row_class, SlotsRow), is_(True))
+            assert_that(hasattr(row_class(*ROWS[0]), "__dict__"), is_(False))
+
+        with step("Verify that rows are equal by class and values"):
+            other_class = slots_row_type(("id", "title", "price"))
+            assert_that(row_class(*ROWS[0]) == row_class(*ROWS[0]), is_(True))
+            assert_that(row_class(*ROWS[0]) == row_class(*ROWS[1]), is_(False))
+            assert_that(row_class(*ROWS[0]) == other_class(*ROWS[0]), is_(False))
+
+        with step("Verify that columns which can not be attributes are rejected"):
+            for columns in (("id", "id"), ("id", "?column?"), ("count(*)",)):
+                with pytest.raises(ValueError):
+                    slots_row_type(columns)
+            with pytest.raises(ValueError):
+                row_converter("list", COLUMNS)
@@ -0,0 +1,66 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+from allure import description, feature, step, title
+from hamcrest import assert_that, empty, is_, not_, has_key
+
+from framework.endpoints.cart_api import CartAPI
+from framework.endpoints.favorite_api import FavoriteAPI
+from framework.endpoints.users_api import UsersAPI
+
+# Enough threads to interleave the calls, few enough for the stub to serve reliably
+THREADS = 8
+CALLS = 2000
+
+
+@feature("Thread safety of endpoint classes")
+class TestEndpointThreadSafety:
+    @title("One endpoint instance shared by many threads does not mix tokens")
+    @description(
+        "GIVEN single CartAPI, FavoriteAPI and UsersAPI instances pointed at a local stub "
+        "WHEN 2000 calls with different tokens are sent from a pool of 8 threads "
+        "THEN every request carries exactly the token of its own call"
+    )
+    def test_no_token_cross_talk(self, echo_server):
+        with step("Pointing shared endpoint instances at the local stub"):
+            cart_api, favorite_api, users_api = CartAPI(), FavoriteAPI(), UsersAPI()
+            cart_api.url = f"{echo_server}/api/v1/cart"
+            favorite_api.url = f"{echo_server}/api/v1/favorites"
+            users_api.url = f"{echo_server}/api/v1/users"
+            calls = [
+                lambda token: cart_api.get_user_cart(token=token),
+                lambda token: cart_api.add_item_to_cart(token=token, items=[]),
+                lambda token: favorite_api.get_favorites(token=token),
+                lambda token: favorite_api.delete_favorites(
+                    token=token, id_product="1"
+                ),
+                lambda token: users_api.get_user(token=token),
+                lambda token: users_api.update_user(token=token, user_data={}),
+            ]
+
+        def send(number: int) -> tuple:
+            """Expected and received Authorization header, or the error of transport"""
+            token = f"token-{number}"
+            try:
+                response = random.choice(calls)(token)
+                return f"Bearer {token}", response.json()["authorization"], None
+            except Exception as error:
+                return f"Bearer {token}", None, repr(error)
+
+        with step("Sending mixed-token calls concurrently"):
+            with ThreadPoolExecutor(max_workers=THREADS) as executor:
+                results = list(executor.map(send, range(CALLS)))
+
+        with step("Verify that every call got a response of the stub"):
+            errors = [error for _, _, error in results if error]
+            assert_that(errors, is_(empty()), "Calls failed in transport")
+
+        with step("Verify that every request was sent with its own token"):
+            mismatches = [
+                (sent, received) for sent, received, _ in results if sent != received
+            ]
+            assert_that(mismatches, is_(empty()), "Tokens leaked between calls")
+
+        with step("Verify that base headers of instances are not modified"):
+            for api in (cart_api, favorite_api, users_api):
+                assert_that(api.headers, not_(has_key("Authorization")))
@@ -0,0 +1,231 @@
+from allure import description, feature, step, title
+from hamcrest import assert_that, equal_to, has_length, is_, none
+
+from framework.endpoints.authenticate_api import AuthenticateAPI
+from framework.endpoints.cart_api import CartAPI
+from framework.endpoints.favorite_api import FavoriteAPI
+from framework.endpoints.product_api import ProductAPI
+from framework.endpoints.review_api import ReviewAPI
+from framework.endpoints.users_api import UsersAPI
+
+
+def endpoints(backend) -> dict:
+    """Endpoint classes pointed at the fake backend"""
+    apis = {
+        "auth": (AuthenticateAPI(), "/auth"),
+        "products": (ProductAPI(), "/products"),
+        "reviews": (ReviewAPI(), "/products"),
+        "cart": (CartAPI(), "/cart"),
+        "favorites": (FavoriteAPI(), "/favorites"),
+        "users": (UsersAPI(), "/users"),
+    }
+    for api, path in apis.values():
+        api.url = f"{backend.url}/api/v1{path}"
+    return {name: api for name, (api, _) in apis.items()}
+
+
+def authenticate(api: dict, user: dict) -> str:
+    return (
+        api["auth"]
+        .authentication(email=user["email"], password=user["password"])
+        .json()["token"]
+    )
+
+
+@feature("Fake backend")
+class TestFakeBackend:
+    @title("Authentication, refresh and logout")
+    @description(
+        "GIVEN the fake backend knows a user "
+        "WHEN the user authenticates with right and wrong passwords and logs out "
+        "THEN tokens are issued only for the right password and rejected after logout"
+    )
+    def test_authentication(self, local_fake_backend, fake_backend_user):
+        api = endpoints(local_fake_backend)
+
+        with step("Authentication with the right and wrong password"):
+            token = authenticate(api, fake_backend_user)
+            api["auth"].authentication(
+                email=fake_backend_user["email"],
+                password=fake_backend_user["password"] + "x",
+                expected_status_code=401,
+            )
+
+        with step("Verify that the token is accepted and can be refreshed"):
+            user = api["users"].get_user(token=token).json()
+            assert_that(user["email"], equal_to(fake_backend_user["email"]))
+            api["auth"].refresh_token(token=token)
+
+        with step("Verify that the token is rejected after logout"):
+            assert_that(api["auth"].logout(token=token).status_code, equal_to(200))
+            api["users"].get_user(token=token, expected_status_code=400)
+
+    @title("Paging and sorting of products")
+    @description(
+        "GIVEN the fake backend with 25 products "
+        "WHEN pages of products sorted by price are requested "
+        "THEN the pages are sorted, do not overlap and cover the catalogue"
+    )
+    def test_products_paging_and_sorting(self, local_fake_backend):
+        api = endpoints(local_fake_backend)
+
+        with step("Getting all pages of products sorted by price"):
+            pages = [
+                api["products"]
+                .get_all(
+                    params={
+                        "page": page,
+                        "size": 10,
+                        "sort_attribute": "price",
+                        "sort_direction": "asc",
+                    }
+                )
+                .json()
+                for page in range(4)
+            ]
+
+        with step("Verify the pages and the sort order"):
+            assert_that(
+                [len(page["products"]) for page in pages], equal_to([10, 10, 5, 0])
+            )
+            assert_that(pages[0]["totalElements"], equal_to(25))
+            assert_that(pages[0]["totalPages"], equal_to(3))
+            prices = [p["price"] for page in pages for p in page["products"]]
+            assert_that(prices, equal_to(sorted(prices)))
+            ids = {p["id"] for page in pages for p in page["products"]}
+            assert_that(ids, has_length(25))
+
+        with step("Verify that iteration over all pages returns the same products"):
+            products = api["products"].iter_all(
+                params={"sort_attribute": "price", "sort_direction": "asc"},
+                page_size=10,
+            )
+            assert_that([p["price"] for p in products], equal_to(prices))
+
+        with step("Verify that the default order is by name descending"):
+            products = api["products"].get_all(params={"size": 25}).json()["products"]
+            names = [p["name"] for p in products]
+            assert_that(names, equal_to(sorted(names, reverse=True)))
+
+        with step("Verify that invalid page and sorting are rejected"):
+            for params in ({"size": 0}, {"sort_direction": "up"}):
+                response = api["products"].get_all(params=params)
+                assert_that(response.status_code, equal_to(400))
+
+    @title("Shopping cart")
+    @description(
+        "GIVEN an authenticated user of the fake backend "
+        "WHEN products are added to the cart twice and removed "
+        "THEN quantities are summed per product and the cart is emptied"
+    )
+    def test_cart(self, local_fake_backend, fake_backend_user):
+        api = endpoints(local_fake_backend)
+        token = authenticate(api, fake_backend_user)
+        first, second = list(local_fake_backend.store.products)[:2]
+
+        with step("Adding products to the cart twice"):
+            items = [
+                {"productId": first, "productQuantity": 2},
+                {"productId": second, "productQuantity": 1},
+            ]
+            api["cart"].add_item_to_cart(token=token, items=items)
+            cart = (
+                api["cart"]
+                .add_item_to_cart(
+                    token=token, items=[{"productId": first, "productQuantity": 1}]
+                )
+                .json()
+            )
+
+        with step("Verify the quantities of the cart"):
+            quantities = {
+                i["productInfo"]["id"]: i["productQuantity"] for i in cart["items"]
+            }
+            assert_that(quantities, equal_to({first: 3, second: 1}))
+            assert_that(cart["productsQuantity"], equal_to(4))
+
+        with step("Verify that the removed items are not in the cart"):
+            api["cart"].delete_item_from_cart(
+                token=token, cart_item_id=[i["id"] for i in cart["items"]]
+            )
+            cart = api["cart"].get_user_cart(token=token).json()
+            assert_that(cart["items"], has_length(0))
+
+    @title("Favorites")
+    @description(
+        "GIVEN an authenticated user of the fake backend "
+        "WHEN products are added to favorites and one is removed "
+        "THEN only the remaining product is in favorites"
+    )
+    def test_favorites(self, local_fake_backend, fake_backend_user):
+        api = endpoints(local_fake_backend)
+        token = authenticate(api, fake_backend_user)
+        first, second = list(local_fake_backend.store.products)[:2]
+
+        with step("Adding two products to favorites and removing one"):
+            api["favorites"].add_favorites(
+                token=token, favorite_product=[first, second]
+            )
+            api["favorites"].delete_favorites(token=token, id_product=first)
+
+        with step("Verify that only the other product is in favorites"):
+            favorites = api["favorites"].get_favorites(token=token).json()
+            assert_that([p["id"] for p in favorites["products"]], equal_to([second]))
+
+    @title("Reviews and rating of product")
+    @description(
+        "GIVEN an authenticated user of the fake backend "
+        "WHEN the user reviews a product twice and deletes the review "
+        "THEN the second review is rejected and the rating follows the reviews"
+    )
+    def test_reviews(self, local_fake_backend, fake_backend_user):
+        api = endpoints(local_fake_backend)
+        token = authenticate(api, fake_backend_user)
+        product_id = next(iter(local_fake_backend.store.products))
+
+        with step("Adding a review and a second one to the same product"):
+            review = (
+                api["reviews"]
+                .add_product_review(
+                    token=token, product_id=product_id, text_review="Tasty", rating=4
+                )
+                .json()
+            )
+            api["reviews"].add_product_review(
+                token=token,
+                product_id=product_id,
+                text_review="Again",
+                rating=5,
+                expected_status_code=400,
+            )
+
+        with step("Verify the review, the rating and the statistics of the product"):
+            reviews = (
+                api["reviews"]
+                .get_all_product_reviews(product_id=product_id)
+                .json()["reviewsWithRatings"]
+            )
+            assert_that(
+                [r["productReviewId"] for r in reviews],
+                equal_to([review["productReviewId"]]),
+            )
+            assert_that(
+                [
+                    r["productReviewId"]
+                    for r in api["reviews"].iter_all_product_reviews(product_id)
+                ],
+                equal_to([review["productReviewId"]]),
+            )
+            statistics = api["reviews"].get_product_review_statistics(product_id).json()
+            assert_that(statistics["avgRating"], equal_to(4))
+            assert_that(statistics["ratingMap"]["star4"], equal_to(1))
+
+        with step("Verify that the rating is cleared with the deleted review"):
+            api["reviews"].delete_product_review(
+                token=token,
+                product_id=product_id,
+                review_id=review["productReviewId"],
+            )
+            product = local_fake_backend.store.products[product_id]
+            assert_that(product["reviewsCount"], equal_to(0))
+            assert_that(product["averageRating"], is_(none()))
@@ -0,0 +1,175 @@
+import json
+import random
+import threading
+
+from allure import description, feature, step, title
+from hamcrest import assert_that, close_to, equal_to, greater_than_or_equal_to
+
+from framework.clients.latency_histogram import (
+    MAX_VALUE,
+    SUB_BUCKET_BITS,
+    LatencyHistogram,
+    LatencyRecorder,
+    _highest_value,
+    _index,
+    expected_interval,
+)
+
+
+def histogram_of(values: list) -> LatencyHistogram:
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record_value(value)
+    return histogram
+
+
+@feature("Latency histogram")
+class TestLatencyHistogram:
+    @title("Values are counted in sub-buckets with relative error below 1/128")
+    @description(
+        "GIVEN values from 0 to MAX_VALUE "
+        "WHEN their sub-buckets are computed "
+        "THEN small values are exact, larger ones are within 1/128 and the order is kept"
+    )
+    def test_index_and_highest_value(self):
+        rng = random.Random(1)
+        values = list(range(4096)) + [rng.randrange(MAX_VALUE) for _ in range(10_000)]
+        values += [2**bits + delta for bits in range(31) for delta in (-1, 0, 1)]
+        values.append(MAX_VALUE)
+
+        with step(
+            "Verify that every value is not above the highest value of its sub-bucket"
+        ):
+            for value in values:
+                highest = _highest_value(_index(value))
+                assert_that(highest, greater_than_or_equal_to(value), str(value))
+                if value < 2**SUB_BUCKET_BITS:
+                    assert_that(highest, equal_to(value), str(value))
+                else:
+                    assert (highest - value) / value < 1 / 128, value
+
+        with step("Verify that sub-buckets follow the order of values"):
+            indexes = [_index(value) for value in sorted(values)]
+            assert_that(indexes, equal_to(sorted(indexes)))
+            assert_that(_index(MAX_VALUE), equal_to(len(LatencyHistogram().counts) - 1))
+
+    @title("Merged histograms and histograms passed between processes are equal")
+    @description(
+        "GIVEN two histograms of different values "
+        "WHEN they are merged or passed through as_dict, JSON and from_dict "
+        "THEN the result is the histogram of all values"
+    )
+    def test_merge_and_from_dict(self):
+        rng = random.Random(2)
+        first = [rng.randrange(1, 1_000_000) for _ in range(1000)]
+        second = [rng.randrange(1, 5_000_000) for _ in range(500)]
+        expected = histogram_of(first + second)
+
+        with step("Merging the histogram of the second values into the first one"):
+            merged = histogram_of(first)
+            merged.merge(histogram_of(second))
+            merged.merge(LatencyHistogram())
+
+        with step("Verify that the merged histogram is the histogram of all values"):
+            assert_that(merged.as_dict(), equal_to(expected.as_dict()))
+
+        with step("Verify that the histogram is restored from JSON of as_dict"):
+            restored = LatencyHistogram.from_dict(
+                json.loads(json.dumps(merged.as_dict()))
+            )
+            assert_that(restored.counts, equal_to(expected.counts))
+            assert_that(restored.as_dict(), equal_to(expected.as_dict()))
+
+    @title("Percentiles of uniform latencies")
+    @description(
+        "GIVEN latencies 1..10000 µs, each recorded once "
+        "WHEN percentiles are computed "
+        "THEN they are within 1% of the exact ones"
+    )
+    def test_percentile_of_uniform_values(self):
+        histogram = histogram_of(range(1, 10_001))
+
+        with step("Verify the percentiles"):
+            for q in (50, 90, 99, 99.9):
+                exact = q / 100 * 10_000 / 1_000_000
+                assert_that(
+                    histogram.percentile(q), close_to(exact, exact * 0.01), str(q)
+                )
+            assert_that(histogram.percentile(100), equal_to(0.01))
+            assert_that(histogram.mean(), close_to(0.0050005, 1e-9))
+            assert_that(LatencyHistogram().percentile(99), equal_to(0.0))
+
+        with step("Verify that ranks are exact for percentiles not exact in binary"):
+            small = histogram_of(range(1, 101))
+            for q in range(1, 101):
+                assert_that(small.percentile(q), equal_to(q / 1_000_000), str(q))
+
+    @title("Correction of a stall at a fixed rate for coordinated omission")
+    @description(
+        "GIVEN requests planned every 10 ms taking 1 ms and one stall of 1 s "
+        "WHEN the latencies are recorded with the planned interval "
+        "THEN the requests delayed by the stall are added with their waiting"
+    )
+    def test_coordinated_omission_of_stall(self):
+        latencies = [0.001] * 100 + [1.0]
+
+        with step("Recording the latencies with and without the planned interval"):
+            plain, corrected = LatencyHistogram(), LatencyHistogram()
+            for seconds in latencies:
+                plain.record(seconds)
+                corrected.record(seconds, interval=0.01)
+
+        with step(
+            "Verify that the stall alone hides in the percentiles without correction"
+        ):
+            assert_that(plain.count, equal_to(101))
+            assert_that(plain.percentile(99), close_to(0.001, 0.00001))
+
+        with step("Verify that the 99 requests planned during the stall are added"):
+            assert_that(corrected.measured, equal_to(101))
+            assert_that(corrected.count, equal_to(200))
+            # 100 values of 1 ms, then 10 ms, 20 ms, ..., 990 ms and the stall of 1 s
+            assert_that(corrected.percentile(50), close_to(0.001, 0.00001))
+            assert_that(corrected.percentile(90), close_to(0.8, 0.8 * 0.01))
+            assert_that(corrected.percentile(99), close_to(0.98, 0.98 * 0.01))
+
+        with step("Verify that the recorder applies the interval of the thread"):
+            recorder = LatencyRecorder()
+            with expected_interval(0.01):
+                for seconds in latencies:
+                    recorder.record("GET /products", 200, seconds)
+            recorder.record("GET /products", 200, 1.0)
+            histogram = recorder.histograms()[("GET /products", 200)]
+            assert_that(histogram.measured, equal_to(102))
+            assert_that(histogram.count, equal_to(201))
+
+    @title("Histograms of finished threads are merged and released")
+    @description(
+        "GIVEN a recorder used by 200 short-lived threads "
+        "WHEN the threads finish "
+        "THEN their latencies are kept in the merged histograms and no histograms of the threads are left"
+    )
+    def test_finished_threads_are_merged(self):
+        recorder = LatencyRecorder()
+
+        def record_requests() -> None:
+            for _ in range(5):
+                recorder.record("GET /products", 200, 0.002)
+
+        with step("Recording latencies from 200 threads started one after another"):
+            for _ in range(200):
+                thread = threading.Thread(target=record_requests)
+                thread.start()
+                thread.join()
+
+        with step("Verify that the histograms of the threads are released"):
+            assert_that(recorder._threads, equal_to({}))
+
+        with step("Verify that the latencies of all threads are kept"):
+            histogram = recorder.histograms()[("GET /products", 200)]
+            assert_that(histogram.count, equal_to(1000))
+
+        with step("Verify that reset drops the histograms of the running thread"):
+            recorder.record("GET /products", 200, 0.002)
+            recorder.reset()
+            assert_that(recorder.histograms(), equal_to({}))
@@ -0,0 +1,212 @@
+import threading
+import time
+import uuid
+from collections import Counter
+
+import pytest
+from allure import description, feature, step, title
+from hamcrest import (
+    assert_that,
+    close_to,
+    equal_to,
+    greater_than,
+    has_length,
+    less_than,
+    starts_with,
+)
+
+from framework.steps.load_scenarios import LoadAPI, VirtualUser
+from framework.tools.load_runner import LoadRunner, authenticate, create_users
+
+RATE = 5
+RAMP_UP = 4
+
+
+def started_iterations(t: float) -> float:
+    """Iterations of open model started by t seconds, the integral of the linear ramp-up of RATE"""
+    if t < RAMP_UP:
+        return RATE * t**2 / (2 * RAMP_UP)
+    return RATE * RAMP_UP / 2 + RATE * (t - RAMP_UP)
+
+
+@pytest.fixture(scope="function")
+def virtual_users(local_fake_backend):
+    """Factory of authenticated virtual users of local_fake_backend"""
+    api = LoadAPI(host=local_fake_backend.url)
+    product_ids = list(local_fake_backend.store.products)
+
+    def create(quantity: int) -> list:
+        users = create_users(quantity, store=local_fake_backend.store)
+        return [
+            VirtualUser(api, user, token, product_ids, seed=i)
+            for i, (user, token) in enumerate(zip(users, authenticate(api, users)))
+        ]
+
+    return create
+
+
+@feature("Load runner")
+class TestLoadRunner:
+    @title("Iterations of open model are planned by the closed-form ramp-up schedule")
+    @description(
+        "GIVEN the open model with 5 iterations per second reached in 4 seconds of ramp-up "
+        "WHEN the planned starts and rates are calculated "
+        "THEN the number of iterations started by the planned start of the k-th is k, "
+        "the rate is the derivative of that number and grows linearly during ramp-up"
+    )
+    def test_arrival_schedule(self):
+        runner = LoadRunner(lambda vu: None, duration=10, ramp_up=RAMP_UP, rate=RATE)
+
+        with step("Verify the planned starts of iterations"):
+            starts = [runner.arrival_time(k) for k in range(60)]
+            for k, start in enumerate(starts):
+                assert_that(started_iterations(start), close_to(k, 1e-9))
+            assert_that(starts, equal_to(sorted(set(starts))))
+            planned = sum(start < runner.duration for start in starts)
+            assert_that(planned, equal_to(started_iterations(runner.duration)))
+
+        with step("Verify the rate during and after ramp-up"):
+            for t in (0, 1, 2.5, 3.9, 4, 4.1, 9):
+                assert_that(
+                    runner.rate_at(t), close_to(RATE * min(t / RAMP_UP, 1), 1e-9)
+                )
+            for t in (1, 3, 6):
+                derivative = (
+                    started_iterations(t + 1e-4) - started_iterations(t - 1e-4)
+                ) / 2e-4
+                assert_that(runner.rate_at(t), close_to(derivative, 1e-6))
+
+        with step(
+            "Verify the schedule without ramp-up and a ramp-up longer than the load"
+        ):
+            steady = LoadRunner(lambda vu: None, duration=10, rate=RATE)
+            assert_that(
+                [steady.arrival_time(k) for k in range(5)],
+                equal_to([k / RATE for k in range(5)]),
+            )
+            assert_that(steady.rate_at(0), equal_to(RATE))
+            assert_that(
+                LoadRunner(lambda vu: None, duration=2, ramp_up=5, rate=RATE).ramp_up,
+                equal_to(2),
+            )
+
+    @title("Iterations of open model not started in time are dropped")
+    @description(
+        "GIVEN the fake backend and virtual users whose iteration takes 100 ms "
+        "WHEN 20 iterations are planned in 0.5 s for 2 users and 10 iterations for 4 users "
+        "THEN the iterations the 2 users could not start are dropped and counted with the start lag, "
+        "and all iterations of the 4 users are started"
+    )
+    def test_open_model_drops(self, virtual_users):
+        def slow_browse(vu: VirtualUser) -> None:
+            vu.api.products.get_by_id(vu.product_id())
+            time.sleep(0.1)
+
+        with step("Running 40 iterations per second by 2 users"):
+            stats = LoadRunner(slow_browse, duration=0.5, rate=40).run(virtual_users(2))
+
+        with step("Verify that every planned iteration is started or dropped"):
+            assert_that(stats.iterations + stats.dropped, equal_to(20))
+            assert_that(stats.dropped, greater_than(5))
+            assert_that(stats.start_lag, greater_than(0.1))
+            assert_that(
+                stats.report(0.5).splitlines()[1],
+                starts_with(f"not started in time: {stats.dropped}, "),
+            )
+
+        with step("Verify that nothing is dropped when the users keep up"):
+            stats = LoadRunner(slow_browse, duration=0.5, rate=20).run(virtual_users(4))
+            assert_that(stats.iterations, equal_to(10))
+            assert_that(stats.dropped, equal_to(0))
+
+    @title("Virtual users of closed model are started evenly during ramp-up")
+    @description(
+        "GIVEN the fake backend and 4 virtual users "
+        "WHEN the closed model runs for 1.2 s with 0.8 s of ramp-up "
+        "THEN the users start 0.2 s one after another and repeat the scenario until the end"
+    )
+    def test_closed_model_ramp_up(self, virtual_users):
+        users = virtual_users(4)
+        first_starts, iterations = {}, Counter()
+        lock = threading.Lock()
+
+        def browse(vu: VirtualUser) -> None:
+            with lock:
+                first_starts.setdefault(vu.user["id"], time.perf_counter())
+                iterations[vu.user["id"]] += 1
+            vu.api.products.get_by_id(vu.product_id())
+            time.sleep(0.05)
+
+        with step("Running the closed model"):
+            start = time.perf_counter()
+            stats = LoadRunner(browse, duration=1.2, ramp_up=0.8).run(users)
+            elapsed = time.perf_counter() - start
+
+        with step("Verify that the users are started evenly during ramp-up"):
+            for i, vu in enumerate(users):
+                assert_that(
+                    first_starts[vu.user["id"]] - start, close_to(i * 0.2, 0.08)
+                )
+
+        with step("Verify that the users repeat the scenario until the end"):
+            counts = [iterations[vu.user["id"]] for vu in users]
+            assert_that(sum(counts), equal_to(stats.iterations))
+            assert_that(counts[0], greater_than(counts[3]))
+            assert_that(counts[3], greater_than(3))
+            assert_that(elapsed, less_than(1.2 + 0.2))
+
+    @title("Report shows iterations, failures and requests per endpoint")
+    @description(
+        "GIVEN the fake backend and a scenario requesting a known and an unknown product "
+        "WHEN every second iteration of a user fails "
+        "THEN the report has the number and rate of iterations, the failures by exception "
+        "and the requests with errors of the endpoint"
+    )
+    def test_report(self, virtual_users):
+        done = Counter()
+        lock = threading.Lock()
+
+        def browse_and_fail(vu: VirtualUser) -> None:
+            vu.api.products.get_by_id(vu.product_id())
+            vu.api.products.get_by_id(str(uuid.uuid4()))
+            with lock:
+                done[vu.user["id"]] += 1
+                failed = done[vu.user["id"]] % 2 == 0
+            if failed:
+                raise AssertionError("Product is not found")
+
+        with step("Running the closed model"):
+            stats = LoadRunner(browse_and_fail, duration=0.5).run(virtual_users(2))
+            report = stats.report(0.5).splitlines()
+
+        with step("Verify the iterations and failures"):
+            iterations = sum(done.values())
+            failed = sum(count // 2 for count in done.values())
+            assert_that(iterations, equal_to(stats.iterations))
+            assert_that(
+                report[0],
+                equal_to(
+                    f"iterations: {iterations} ({iterations / 0.5:.1f}/s), "
+                    f"failed: {failed} (AssertionError: {failed})"
+                ),
+            )
+
+        with step("Verify the requests and errors of the endpoint"):
+            assert_that(report[1], starts_with("endpoint"))
+            assert_that(report, has_length(3))
+            columns = report[2].split()
+            assert_that(
+                columns[:5],
+                equal_to(
+                    [
+                        "GET",
+                        "/api/v1/products/{id}",
+                        str(2 * iterations),
+                        str(iterations),
+                        f"{2 * iterations / 0.5:.1f}",
+                    ]
+                ),
+            )
+            mean, p50, p90, p99, p999, maximum = map(float, columns[5:])
+            assert_that(p50 <= p90 <= p99 <= p999 <= maximum * 1.01, equal_to(True))
+            assert_that(mean, greater_than(0))
@@ -0,0 +1,71 @@
+import threading
+
+from allure import description, feature, step, title
+from hamcrest import assert_that, empty, equal_to, is_
+
+from framework.clients.http_client import HttpClient
+from framework.tools import logging_allure
+from framework.tools.logging_allure import (
+    discard_logged_requests,
+    flush_logged_requests,
+    log_request,
+    start_logged_requests,
+)
+
+
+@feature("Allure logging of requests")
+class TestLoggingAllure:
+    @title("Requests are written to the report only for failed tests")
+    @description(
+        'GIVEN "failed" ALLURE_LOG_MODE '
+        "WHEN requests are logged by the test and other threads, then the test fails or passes "
+        "THEN the requests of the failed test are written once and the requests of the passed test and between tests are dropped"
+    )
+    def test_failed_mode(self, echo_server, monkeypatch):
+        rendered = []
+        monkeypatch.setattr(logging_allure, "ALLURE_LOG_MODE", "failed")
+        monkeypatch.setattr(logging_allure, "_render", rendered.append)
+        client = HttpClient()
+        responses = [client.get(f"{echo_server}/{number}") for number in range(4)]
+        client.close()
+
+        with step("Logging requests of a failing test from two threads"):
+            start_logged_requests()
+            log_request(responses[0])
+            thread = threading.Thread(target=log_request, args=(responses[1],))
+            thread.start()
+            thread.join()
+            assert_that(rendered, is_(empty()))
+
+        with step("Verify that the requests are written when the test fails"):
+            flush_logged_requests()
+            flush_logged_requests()
+            discard_logged_requests()
+            assert_that(rendered, equal_to(responses[:2]))
+
+        with step("Verify that a request between tests is dropped"):
+            log_request(responses[2])
+            start_logged_requests()
+            flush_logged_requests()
+            assert_that(rendered, equal_to(responses[:2]))
+
+        with step("Verify that the requests of a passed test are dropped"):
+            log_request(responses[3])
+            discard_logged_requests()
+            flush_logged_requests()
+            assert_that(rendered, equal_to(responses[:2]))
+
+    @title("Request is written as a step with its timings")
+    @description(
+        "GIVEN a response of HttpClient to a URL with braces "
+        'WHEN it is logged in "always" ALLURE_LOG_MODE '
+        "THEN it is written as a step without error"
+    )
+    def test_always_mode(self, echo_server, monkeypatch):
+        monkeypatch.setattr(logging_allure, "ALLURE_LOG_MODE", "always")
+        client = HttpClient()
+        response = client.get(f"{echo_server}/api/v1/products", params={"q": "{id}"})
+        client.close()
+
+        with step("Logging the request"):
+            log_request(response)
@@ -0,0 +1,49 @@
+from allure import description, feature, step, title
+from hamcrest import assert_that, contains_string, equal_to, has_length, is_
+from imap_tools import A, MailBoxUnencrypted
+
+from configs import email_iced_late
+
+RECIPIENT = "icedlate.test+abc12@gmail.com"
+OTHER_RECIPIENT = "icedlate.test+xyz89@gmail.com"
+
+
+@feature("Local mail sink")
+class TestLocalMailSink:
+    @title("Message sent over SMTP is read over IMAP and its code is indexed")
+    @description(
+        "GIVEN the local mail sink "
+        "WHEN messages with codes are sent to two recipients over SMTP with authentication "
+        "THEN each message is found over IMAP by its recipient and the code is returned for its recipient"
+    )
+    def test_smtp_imap_round_trip(self, local_mail_sink, send_code):
+        with step("Sending messages with codes over SMTP"):
+            send_code(RECIPIENT, "123456789")
+            send_code(OTHER_RECIPIENT, "987654321")
+
+        with step("Reading the message of the recipient over IMAP"):
+            with MailBoxUnencrypted("127.0.0.1", local_mail_sink.imap_port).login(
+                "test", "any password"
+            ) as mailbox:
+                messages = list(mailbox.fetch(A(to=RECIPIENT), mark_seen=False))
+
+        with step("Verify that only the message of the recipient is found"):
+            assert_that(messages, has_length(1))
+            assert_that(messages[0].from_, equal_to(email_iced_late))
+            assert_that(messages[0].to, equal_to((RECIPIENT,)))
+            assert_that(messages[0].text, contains_string("Your code: 123456789"))
+            # Dot-stuffing of SMTP DATA is undone by the sink
+            assert_that(messages[0].text, contains_string("\n.\r\n"))
+
+        with step("Verify that codes are indexed by recipient and sender"):
+            assert_that(
+                local_mail_sink.wait_for_code(
+                    OTHER_RECIPIENT, sender=email_iced_late, timeout=1
+                ),
+                equal_to("987654321"),
+            )
+            assert_that(
+                local_mail_sink.wait_for_code(RECIPIENT, timeout=1),
+                equal_to("123456789"),
+            )
+            assert_that(local_mail_sink.wait_for_code(RECIPIENT, timeout=0), is_(None))
@@ -0,0 +1,123 @@
+import threading
+import time
+
+from allure import description, feature, step, title
+from hamcrest import assert_that, equal_to, greater_than_or_equal_to, is_
+
+from framework.tools.mailbox_watcher import CodeIndex, MailboxWatcher
+
+RECIPIENT = "icedlate.test+abc12@gmail.com"
+OTHER_RECIPIENT = "icedlate.test+xyz89@gmail.com"
+SENDER = "youricedlatteshop@gmail.com"
+# Shorter than MAIL_IDLE_TIMEOUT, so a code arrives in time only if IDLE wakes up the watcher
+PUSH_TIMEOUT = 5
+
+
+def watch(sink) -> MailboxWatcher:
+    return MailboxWatcher(
+        imap_server="127.0.0.1",
+        email_address="test",
+        mail_password="any password",
+        port=sink.imap_port,
+        ssl=False,
+    ).start()
+
+
+@feature("Mailbox watcher")
+class TestMailboxWatcher:
+    @title("Codes are returned by recipient and sender in order of arrival")
+    @description(
+        "GIVEN codes of two recipients and two senders in the index "
+        "WHEN the tests wait for codes of each recipient "
+        "THEN each test gets only the codes sent to its recipient, every code once and in order"
+    )
+    def test_code_lookup_by_recipient(self):
+        codes = CodeIndex()
+        with step("Adding codes of two recipients"):
+            codes.add([RECIPIENT], SENDER, "111111111")
+            codes.add([OTHER_RECIPIENT.upper()], SENDER, "222222222")
+            codes.add([RECIPIENT], "other@example.com", "333333333")
+            codes.add([RECIPIENT], SENDER, "444444444")
+
+        with step("Verify that codes are returned for their recipient and sender"):
+            assert_that(
+                codes.wait_for_code(OTHER_RECIPIENT, timeout=0), equal_to("222222222")
+            )
+            assert_that(
+                codes.wait_for_code(RECIPIENT.upper(), sender=SENDER, timeout=0),
+                equal_to("111111111"),
+            )
+            assert_that(
+                codes.wait_for_code(RECIPIENT, sender=SENDER, timeout=0),
+                equal_to("444444444"),
+            )
+            assert_that(
+                codes.wait_for_code(RECIPIENT, timeout=0), equal_to("333333333")
+            )
+            assert_that(codes.wait_for_code(RECIPIENT, timeout=0), is_(None))
+
+        with step("Verify that a waiting test is woken up by a new code"):
+            timer = threading.Timer(0.2, codes.add, ([RECIPIENT], SENDER, "555555555"))
+            timer.start()
+            assert_that(
+                codes.wait_for_code(RECIPIENT, timeout=5), equal_to("555555555")
+            )
+
+    @title("Waiting for a code that does not arrive times out")
+    @description(
+        "GIVEN the watcher of the local mail sink and a code sent to another recipient "
+        "WHEN a test waits for a code of its recipient with a timeout "
+        "THEN None is returned after the timeout"
+    )
+    def test_wait_for_code_timeout(self, local_mail_sink, send_code):
+        watcher = watch(local_mail_sink)
+        try:
+            with step("Sending a code to another recipient"):
+                send_code(OTHER_RECIPIENT, "222222222")
+                assert_that(
+                    watcher.wait_for_code(OTHER_RECIPIENT, timeout=PUSH_TIMEOUT),
+                    equal_to("222222222"),
+                )
+
+            with step("Waiting for a code of the recipient"):
+                start = time.monotonic()
+                code = watcher.wait_for_code(RECIPIENT, timeout=0.5)
+                waited = time.monotonic() - start
+
+            with step("Verify that None is returned after the timeout"):
+                assert_that(code, is_(None))
+                assert_that(waited, greater_than_or_equal_to(0.5))
+        finally:
+            watcher.close()
+
+    @title("Only new messages are fetched, after IDLE and after reconnect")
+    @description(
+        "GIVEN a message in the mailbox before the watcher started "
+        "WHEN messages arrive while the watcher is idle and after its connection is broken "
+        "THEN codes of the new messages are indexed without waiting for the IDLE timeout and the old one is skipped"
+    )
+    def test_new_messages_after_idle_and_reconnect(self, local_mail_sink, send_code):
+        with step("Sending a message before the watcher is started"):
+            send_code(RECIPIENT, "111111111")
+            watcher = watch(local_mail_sink)
+
+        try:
+            with step("Verify that a message arrived during IDLE is indexed"):
+                send_code(RECIPIENT, "222222222")
+                assert_that(
+                    watcher.wait_for_code(RECIPIENT, timeout=PUSH_TIMEOUT),
+                    equal_to("222222222"),
+                )
+
+            with step("Breaking the IMAP connection of the watcher"):
+                watcher._mailbox.client.sock.close()
+                send_code(RECIPIENT, "333333333")
+
+            with step("Verify that the watcher reconnects and indexes the new message"):
+                assert_that(
+                    watcher.wait_for_code(RECIPIENT, timeout=PUSH_TIMEOUT),
+                    equal_to("333333333"),
+                )
+                assert_that(watcher.wait_for_code(RECIPIENT, timeout=0), is_(None))
+        finally:
+            watcher.close()
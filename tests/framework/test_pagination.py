@@ -0,0 +1,116 @@
+import json
+import threading
+import time
+
+from allure import description, feature, step, title
+from hamcrest import assert_that, equal_to, is_, less_than
+from requests import Response
+
+from framework.tools.pagination import iter_pages
+
+
+def page_response(items: list, page: int, total_pages: int) -> Response:
+    response = Response()
+    response.status_code = 200
+    response._content = json.dumps(
+        {"products": items, "page": page, "totalPages": total_pages}
+    ).encode()
+    return response
+
+
+class FakeListing:
+    """Fetch function of a listing with the given pages, the requested pages are recorded"""
+
+    def __init__(self, pages: list, total_pages: int = None):
+        self.pages = pages
+        self.total_pages = len(pages) if total_pages is None else total_pages
+        self.requested = []
+
+    def __call__(self, page: int) -> Response:
+        self.requested.append(page)
+        items = self.pages[page] if page < len(self.pages) else []
+        return page_response(items, page, self.total_pages)
+
+
+@feature("Pagination of listings")
+class TestIterPages:
+    @title("Pages are walked until the last one of the page info")
+    @description(
+        "GIVEN a listing of three pages "
+        "WHEN its items are iterated "
+        "THEN the items of all pages are returned and no page after the last one is requested"
+    )
+    def test_stop_on_last_page(self):
+        fetch = FakeListing([[1, 2], [3, 4], [5]])
+        checked = []
+
+        def check(response: Response) -> None:
+            checked.append((response.json()["page"], threading.current_thread()))
+
+        with step("Iterating over the items of the listing"):
+            items = list(iter_pages(fetch, items_key="products", check=check))
+
+        with step(
+            "Verify that all items are returned and only three pages are requested"
+        ):
+            assert_that(items, equal_to([1, 2, 3, 4, 5]))
+            assert_that(fetch.requested, equal_to([0, 1, 2]))
+
+        with step("Verify that every page is checked in the thread of caller"):
+            caller = threading.current_thread()
+            assert_that(checked, equal_to([(0, caller), (1, caller), (2, caller)]))
+
+    @title("Pages are walked until an empty one")
+    @description(
+        "GIVEN a listing reporting more pages than it has "
+        "WHEN its items are iterated "
+        "THEN the iteration stops on the first empty page"
+    )
+    def test_stop_on_empty_page(self):
+        fetch = FakeListing([[1, 2], [3, 4]], total_pages=10)
+
+        with step("Iterating over the items of the listing"):
+            items = list(iter_pages(fetch, items_key="products"))
+
+        with step("Verify that the pages after the empty one are not requested"):
+            assert_that(items, equal_to([1, 2, 3, 4]))
+            assert_that(fetch.requested, equal_to([0, 1, 2]))
+
+        with step("Verify that an empty listing returns no items"):
+            fetch = FakeListing([])
+            assert_that(list(iter_pages(fetch, items_key="products")), equal_to([]))
+            assert_that(fetch.requested, equal_to([0]))
+
+    @title("Requesting of pages is stopped when the caller stops early")
+    @description(
+        "GIVEN a listing of many pages with a slow second page "
+        "WHEN the caller stops after the first item "
+        "THEN the iteration ends without waiting for the second page and no further pages are requested"
+    )
+    def test_prefetch_stopped_when_caller_stops(self):
+        fetch = FakeListing([[1, 2]] * 5)
+        second_page_requested = threading.Event()
+        release = threading.Event()
+
+        def slow_fetch(page: int) -> Response:
+            if page == 1:
+                second_page_requested.set()
+                release.wait(10)
+            return fetch(page)
+
+        with step("Taking the first item while the second page is requested"):
+            items = iter_pages(slow_fetch, items_key="products")
+            assert_that(next(items), equal_to(1))
+            assert_that(second_page_requested.wait(10), is_(True))
+
+        with step("Verify that stopping does not wait for the requested page"):
+            started = time.monotonic()
+            items.close()
+            assert_that(time.monotonic() - started, less_than(1))
+
+        with step("Verify that no page is requested after the requested one"):
+            release.set()
+            for thread in threading.enumerate():
+                if thread.name.startswith("next-page"):
+                    thread.join(10)
+            assert_that(fetch.requested, equal_to([0, 1]))
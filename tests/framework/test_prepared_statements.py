@@ -0,0 +1,171 @@
+import time
+from collections import namedtuple
+
+import pytest
+from allure import description, feature, step, title
+from hamcrest import (
+    assert_that,
+    calling,
+    close_to,
+    equal_to,
+    greater_than_or_equal_to,
+    raises,
+)
+
+from framework.clients import db_client
+from framework.clients.db_client import DBClient, check_identifier
+
+Column = namedtuple("Column", "name")
+
+EXECUTE_SECONDS = 0.005
+QUERY = "SELECT id, name FROM public.products WHERE id = $1"
+
+
+class FakeCursor:
+    """Cursor recording the statements, EXECUTE returns one row of its params"""
+
+    def __init__(self, statements: list):
+        self.statements = statements
+        self.description = None
+        self.rows = []
+
+    def execute(self, query: str, params=None):
+        self.statements.append((query, params))
+        if query.startswith("EXECUTE"):
+            time.sleep(EXECUTE_SECONDS)
+            self.description = [Column("id"), Column("name")]
+            self.rows = [(params[0] if params else None, "Latte")]
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, **kwargs):
+        self.autocommit = False
+        self.statements = []
+
+    def cursor(self, cursor_factory=None):
+        return FakeCursor(self.statements)
+
+
+@pytest.fixture
+def fake_db(monkeypatch) -> DBClient:
+    """DBClient over a connection recording the statements, without a server"""
+    monkeypatch.setattr(db_client, "connect", FakeConnection)
+    return DBClient(dbname="db", host="localhost", port="5432", user="u", password="")
+
+
+@feature("Prepared statements of DBClient")
+class TestPreparedStatements:
+    @title("Statement is prepared once and executed by the next calls")
+    @description(
+        "GIVEN DBClient over a connection recording the statements "
+        "WHEN a statement is fetched three times and executed once "
+        "THEN PREPARE is sent only by the first call, every call sends EXECUTE with its params "
+        "and the summary counts one prepare, three hits and the time of the calls"
+    )
+    def test_prepare_once(self, fake_db):
+        with step("Calling the statement four times"):
+            rows = [
+                fake_db.fetch_prepared("product_by_id", QUERY, (f"id-{n}",))
+                for n in range(3)
+            ]
+            fake_db.execute_prepared("product_by_id", QUERY, ["id-3"])
+
+        with step("Verify that PREPARE is sent once before the EXECUTEs"):
+            assert_that(
+                fake_db.conn.statements,
+                equal_to(
+                    [(f"PREPARE product_by_id AS {QUERY}", None)]
+                    + [("EXECUTE product_by_id (%s)", (f"id-{n}",)) for n in range(4)]
+                ),
+            )
+            assert_that(rows[1], equal_to([{"id": "id-1", "name": "Latte"}]))
+
+        with step("Verify the counters and the time of the statement"):
+            summary = fake_db.statement_summary()["product_by_id"]
+            assert_that(summary["calls"], equal_to(4))
+            assert_that(summary["prepares"], equal_to(1))
+            assert_that(summary["hits"], equal_to(3))
+            assert_that(
+                summary["total_ms"],
+                greater_than_or_equal_to(4 * EXECUTE_SECONDS * 1000),
+            )
+            assert_that(
+                summary["max_ms"], greater_than_or_equal_to(EXECUTE_SECONDS * 1000)
+            )
+            assert_that(summary["mean_ms"], close_to(summary["total_ms"] / 4, 0.001))
+
+    @title("Summary lists the slowest statement first")
+    @description(
+        "GIVEN two statements, one called once and one called three times "
+        "WHEN the summary is built "
+        "THEN the statement with the larger total time is the first and a statement without params sends bare EXECUTE"
+    )
+    def test_summary_order(self, fake_db):
+        with step("Calling the statements"):
+            fake_db.fetch_prepared("all_products", "SELECT id, name FROM products")
+            for n in range(3):
+                fake_db.fetch_prepared("product_by_id", QUERY, (n,))
+
+        with step("Verify the order of the summary and the bare EXECUTE"):
+            assert_that(
+                list(fake_db.statement_summary()),
+                equal_to(["product_by_id", "all_products"]),
+            )
+            assert_that(
+                fake_db.conn.statements[1], equal_to(("EXECUTE all_products", ()))
+            )
+
+    @title("Name of a prepared statement is not reused for another query")
+    @description(
+        "GIVEN a prepared statement "
+        "WHEN the same name is called with another query or an invalid name is used "
+        "THEN ValueError is raised and nothing is sent to the server"
+    )
+    def test_invalid_statements(self, fake_db):
+        fake_db.fetch_prepared("product_by_id", QUERY, ("id-0",))
+        sent = list(fake_db.conn.statements)
+
+        with step("Verify that the name can not be reused for another query"):
+            assert_that(
+                calling(fake_db.fetch_prepared).with_args(
+                    "product_by_id", QUERY.replace("id =", "name ="), ("Latte",)
+                ),
+                raises(ValueError, "prepared for other query"),
+            )
+
+        with step("Verify that an invalid name is rejected"):
+            assert_that(
+                calling(fake_db.execute_prepared).with_args("x; DROP TABLE t", QUERY),
+                raises(ValueError, "Invalid SQL identifier"),
+            )
+            assert_that(fake_db.conn.statements, equal_to(sent))
+
+    @title("Only lowercase SQL identifiers are accepted")
+    @description(
+        "GIVEN valid and invalid names of tables, columns and statements "
+        "WHEN they are checked "
+        "THEN valid names are returned as is and the others raise ValueError"
+    )
+    def test_check_identifier(self):
+        with step("Verify that valid names are returned"):
+            for name in ("user_details", "_tmp", "products2"):
+                assert_that(check_identifier(name), equal_to(name))
+
+        with step("Verify that invalid names are rejected"):
+            for name in ("", "2products", "Products", "user-details", "a b", "t;", 1):
+                assert_that(
+                    calling(check_identifier).with_args(name),
+                    raises(ValueError, "Invalid SQL identifier"),
+                )
@@ -0,0 +1,129 @@
+import bisect
+import random
+import uuid
+from operator import itemgetter
+
+from allure import description, feature, step, title
+from hamcrest import assert_that, equal_to, greater_than, has_length
+
+from framework.queries.random_sampling import sample_rows
+
+
+class FakeTable:
+    """Rows sorted by id, answering random_rows_query and order_by_random_query"""
+
+    def __init__(self, ids: list, active=lambda i: True):
+        self.rows = sorted(
+            ({"id": str(id_), "active": active(i)} for i, id_ in enumerate(ids)),
+            key=lambda row: uuid.UUID(row["id"]),
+        )
+        self.keys = [uuid.UUID(row["id"]) for row in self.rows]
+        self.sent = []
+        self.sorted_calls = []
+
+    def following(self, starts: list) -> list:
+        self.sent.append(len(starts))
+        rows = []
+        for start in starts:
+            position = bisect.bisect_left(self.keys, uuid.UUID(start))
+            if position < len(self.rows) and self.rows[position]["active"]:
+                rows.append(self.rows[position])
+        return rows
+
+    def sorted(self, quantity: int) -> list:
+        self.sorted_calls.append(quantity)
+        active = [row for row in self.rows if row["active"]]
+        return random.sample(active, min(quantity, len(active)))
+
+    def sample(self, quantity: int, seed: int = 1) -> list:
+        return sample_rows(
+            self.following,
+            self.sorted,
+            quantity,
+            key=itemgetter("id"),
+            rng=random.Random(seed),
+        )
+
+
+def uuid4_ids(quantity: int, seed: int = 1) -> list:
+    rng = random.Random(seed)
+    return [uuid.UUID(int=rng.getrandbits(128), version=4) for _ in range(quantity)]
+
+
+@feature("Random rows by index lookups")
+class TestSampleRows:
+    @title("Distinct random rows matching the condition")
+    @description(
+        "GIVEN a table of 200 rows with every second row not matching the condition "
+        "WHEN 10 random rows are sampled "
+        "THEN 10 distinct matching rows are returned by the lookups, reproducible by the seed"
+    )
+    def test_distinct_rows(self):
+        table = FakeTable(uuid4_ids(200), active=lambda i: i % 2 == 0)
+
+        with step("Sampling 10 rows twice with the same seed"):
+            rows = table.sample(10, seed=3)
+            again = table.sample(10, seed=3)
+
+        with step("Verify that the rows are distinct, matching and reproducible"):
+            ids = [row["id"] for row in rows]
+            assert_that(set(ids), has_length(10))
+            assert_that(all(row["active"] for row in rows), equal_to(True))
+            assert_that([row["id"] for row in again], equal_to(ids))
+            assert_that(table.sorted_calls, equal_to([]))
+
+    @title("More starting ids are sent for a condition matching few rows")
+    @description(
+        "GIVEN a table of 500 rows with 20 of them matching the condition "
+        "WHEN 5 random rows are sampled "
+        "THEN the next rounds send more ids by the share of ids giving a new row, without sorting"
+    )
+    def test_condition_matching_few_rows(self):
+        table = FakeTable(uuid4_ids(500), active=lambda i: i % 25 == 0)
+
+        with step("Sampling 5 rows"):
+            rows = table.sample(5)
+
+        with step("Verify that the rows are found by the lookups"):
+            assert_that({row["id"] for row in rows}, has_length(5))
+            assert_that(all(row["active"] for row in rows), equal_to(True))
+            assert_that(table.sorted_calls, equal_to([]))
+            assert_that(table.sent[-1], greater_than(table.sent[0] * 5))
+
+    @title("Tables smaller than the sample are sorted")
+    @description(
+        "GIVEN a table of 3 rows "
+        "WHEN 5 random rows are sampled "
+        "THEN the sample is taken by ORDER BY RANDOM() after the rounds of lookups"
+    )
+    def test_fallback_for_small_table(self):
+        table = FakeTable(uuid4_ids(3))
+
+        with step("Sampling 5 rows"):
+            rows = table.sample(5)
+
+        with step("Verify that all rows are returned by sorting"):
+            assert_that(table.sorted_calls, equal_to([5]))
+            assert_that(rows, has_length(3))
+            assert_that(table.sample(0), equal_to([]))
+
+    @title("Tables with ids other than uuid4 are sorted")
+    @description(
+        "GIVEN a table with uuid1 ids "
+        "WHEN random rows are sampled "
+        "THEN the sample is taken by ORDER BY RANDOM() after the first lookups"
+    )
+    def test_fallback_for_ids_not_uuid4(self):
+        rng = random.Random(0)
+        # Spread over the id range, so the first lookups find rows
+        table = FakeTable(
+            [uuid.UUID(int=rng.getrandbits(128), version=1) for _ in range(50)]
+        )
+
+        with step("Sampling 5 rows"):
+            rows = table.sample(5)
+
+        with step("Verify that the rows are returned by sorting"):
+            assert_that(table.sent, has_length(1))
+            assert_that(table.sorted_calls, equal_to([5]))
+            assert_that({row["id"] for row in rows}, has_length(5))
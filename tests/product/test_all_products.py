@@ -16,9 +16,9 @@ class TestAllProducts:
         "WHEN not authorized requesting to get all products without parameters, "
         "THEN all products from the list are returned"
     )
-    def test_get_all_products_not_auth(self, postgres):
+    def test_get_all_products_not_auth(self, catalog):
         with step("Getting info about the random product in DB"):
-            db_data = postgres.get_random_products()[0]
+            db_data = catalog.random_product()
 
         with step("Getting all products via API"):
             api_data = ProductAPI().get_all()
@@ -98,7 +98,7 @@ class TestAllProducts:
             ),
         ],
     )
-    def test_get_all_products_with_params(self, params: dict, postgres):
+    def test_get_all_products_with_params(self, params: dict, catalog):
         with step("Setting the parameters by default"):
             # These are the values required to query the database
             field = params["sort_attribute"] if params.get("sort_attribute") else "name"
@@ -110,9 +110,7 @@ class TestAllProducts:
             api_data = ProductAPI().get_all(params=params).json()["products"]
 
         with step("Getting products by filters from DB"):
-            db_data = postgres.get_product_by_filter(
-                field=field, ascend=ascend, size=size, page=page
-            )
+            db_data = catalog.page(field=field, ascend=ascend, size=size, page=page)
 
         with step("Checking count items DB <> API"):
             assert_that(len(db_data), is_(len(api_data)))
@@ -14,9 +14,9 @@ class TestProduct:
     @description(
         "WHEN not authorized requesting to get product info by ID, THEN product info is returned"
     )
-    def test_get_all_products(self, postgres):
+    def test_get_all_products(self, catalog):
         with step("Getting info about the random product in DB"):
-            db_data = postgres.get_random_products()[0]
+            db_data = catalog.random_product()
 
         with step("Getting product info by ID via API"):
             data = ProductAPI().get_by_id(_id=db_data["id"])
@@ -0,0 +1,96 @@
+import random
+import uuid
+
+import pytest
+from allure import description, feature, severity, step, title
+from hamcrest import assert_that, greater_than, less_than
+
+from framework.queries.random_sampling import random_rows_query
+
+TABLE = "random_sampling_check"
+# Critical values of chi-square at significance 0.001 by degrees of freedom
+CHI_SQUARE_0001 = {14: 36.12, 19: 43.82}
+
+
+def uuid4_position(value: str) -> int:
+    """Position of a uuid4 among all uuid4 values, without the fixed version and variant bits"""
+    number = uuid.UUID(value).int
+    return (
+        (number >> 80) << 74 | ((number >> 64) & 0xFFF) << 62 | number & ((1 << 62) - 1)
+    )
+
+
+def chi_square(observed: dict, weights: dict) -> float:
+    """Chi-square of the counts of rows against the expected shares of the weights"""
+    total, weight = sum(observed.values()), sum(weights.values())
+    expected = {row: total * w / weight for row, w in weights.items()}
+    assert min(expected.values()) >= 5, "too few starting ids for chi-square"
+    return sum(
+        (observed.get(row, 0) - count) ** 2 / count for row, count in expected.items()
+    )
+
+
+@feature("Random rows by index lookups")
+class TestRandomRowsQuery:
+    @pytest.mark.low
+    @pytest.mark.db_isolation
+    @severity(severity_level="MINOR")
+    @title(
+        "Test rows of random ids are picked in proportion to the gaps before their ids"
+    )
+    @description(
+        "GIVEN a table of 20 rows with uuid4 ids, a run of 5 of them not matching the condition "
+        "WHEN the rows following 20000 random ids are taken with and without the condition "
+        "THEN the counts of rows fit the gaps before their ids by chi-square, "
+        "the matching rows do not take the gaps of the not matching rows before them"
+    )
+    def test_distribution_of_random_rows(self, postgres):
+        rng = random.Random(5)
+        ids = sorted(
+            (str(uuid.UUID(int=rng.getrandbits(128), version=4)) for _ in range(20)),
+            key=uuid4_position,
+        )
+        inactive = set(ids[5:10])
+        # The gap before a row, a random id in it is followed by the row
+        gaps = {
+            row: uuid4_position(row) - (uuid4_position(ids[i - 1]) if i else -1)
+            for i, row in enumerate(ids)
+        }
+        starts = [
+            str(uuid.UUID(int=rng.getrandbits(128), version=4)) for _ in range(20000)
+        ]
+
+        with step("Creating the temporary table, rolled back with the test"):
+            postgres.db.execute(
+                f"CREATE TEMP TABLE {TABLE} (id uuid PRIMARY KEY, active boolean)"
+            )
+            for row in ids:
+                postgres.db.execute(
+                    f"INSERT INTO {TABLE} VALUES (%s, %s)", (row, row not in inactive)
+                )
+
+        with step("Verify that all rows fit the gaps before their ids"):
+            counts = {}
+            for (row,) in postgres.db.fetch_all(
+                f"SELECT id FROM ({random_rows_query(TABLE)}) AS r", (starts,)
+            ):
+                counts[str(row)] = counts.get(str(row), 0) + 1
+            assert_that(chi_square(counts, gaps), less_than(CHI_SQUARE_0001[19]))
+
+        with step("Verify that the matching rows fit their own gaps"):
+            counts = {}
+            for (row,) in postgres.db.fetch_all(
+                f"SELECT id FROM ({random_rows_query(TABLE, 'active')}) AS r",
+                (starts,),
+            ):
+                counts[str(row)] = counts.get(str(row), 0) + 1
+            own_gaps = {row: gap for row, gap in gaps.items() if row not in inactive}
+            assert_that(chi_square(counts, own_gaps), less_than(CHI_SQUARE_0001[14]))
+
+        with step("Verify that the gaps of the not matching rows are not taken"):
+            # The row after the run would be picked with the gaps of the run
+            taking_gaps = dict(own_gaps)
+            taking_gaps[ids[10]] += sum(gaps[row] for row in inactive)
+            assert_that(
+                chi_square(counts, taking_gaps), greater_than(CHI_SQUARE_0001[14])
+            )
@@ -2,20 +2,13 @@ import pytest
 from allure import description, step, title, feature, severity
 from hamcrest import assert_that, not_, is_not, empty
 
-from configs import (
-    gmail_password,
-    imap_server,
-    email_address_to_connect,
-    EMAIL_DOMAIN,
-    EMAIL_LOCAL_PART,
-)
+from configs import EMAIL_DOMAIN, EMAIL_LOCAL_PART
 from configs import password, firstName, lastName, email, email_iced_late
 from framework.asserts.common import assert_content_type
 from framework.asserts.registration_asserts import check_mapping_api_to_db
 from framework.endpoints.authenticate_api import AuthenticateAPI
 from framework.endpoints.users_api import UsersAPI
-
-from framework.tools.class_email import Email
+from framework.tools.cleanup_registry import cleanup_registry
 from framework.tools.generators import (
     generate_string,
     append_random_to_local_part_email,
@@ -41,11 +34,11 @@ class TestAuthentication:
         "WHEN registration's confirmation code from email is provided"
         "THEN status HTTP CODE = 200 and get JWT token"
     )
-    def test_registration(self, postgres):
+    def test_registration(self, postgres, mailbox_watcher):
         with step("Generation data for registration"):
             email_random = append_random_to_local_part_email(
                 domain=EMAIL_DOMAIN,
-                email_local_part=EMAIL_LOCAL_PART,
+                email_local_part=cleanup_registry.run_local_part(EMAIL_LOCAL_PART),
                 length_random_part=5,
             )
             data_for_registration = {
@@ -65,15 +58,8 @@ class TestAuthentication:
             )
 
         with step("Extract code from email for confirmation registration"):
-            email_box = "Inbox"
-            key = "from_"
-            value = email_iced_late
-            code_from_email = Email(
-                imap_server=imap_server,
-                email_address=email_address_to_connect,
-                mail_password=gmail_password,
-            ).extract_confirmation_code_from_email(
-                email_box=email_box, key=key, value=value
+            code_from_email = mailbox_watcher.wait_for_code(
+                recipient=email_random, sender=email_iced_late
             )
             assert_that(code_from_email, not_(None), "Token should not be empty")
 
@@ -1,3 +1,4 @@
+import asyncio
 import random
 
 import pytest
@@ -5,48 +6,30 @@ from allure_commons._allure import step
 from hamcrest import assert_that, is_
 
 from data.text_reviews_for_product import reviews
+from framework.endpoints.async_api import AsyncProductAPI
 from framework.endpoints.authenticate_api import AuthenticateAPI
-from framework.endpoints.product_api import ProductAPI
 from framework.endpoints.review_api import ReviewAPI
-from framework.endpoints.users_api import UsersAPI
+from framework.steps.user_steps import generate_and_insert_users_async
+from framework.tools.cleanup_registry import cleanup_registry, delete_user_through_api
 from framework.tools.favorite_methods import extract_random_product_ids
-from framework.tools.generators import generate_user
+from framework.tools.generators import generate_user, to_db_user
 from framework.tools.review_methods import (
     verify_user_review_by_user_name_in_all_product_reviews,
 )
 
 
-def generate_and_insert_user(postgres):
-    """Generating and inserting a user into the database
-
-    Args:
-        postgres: connection to Postgres DataBase
-    """
-
-    user = generate_user()
-
-    key_mapping = {
-        "firstName": "first_name",
-        "lastName": "last_name",
-        "birthDate": "birth_date",
-        "phoneNumber": "phone_number",
-        "stripeCustomerToken": "stripe_customer_token",
-    }
-    user_to_insert = {key_mapping.get(k, k): v for k, v in user.items()}
-
-    postgres.create_user(user_to_insert)
-
-    return user
-
-
-def create_and_authorize_user(postgres):
+def create_and_authorize_user(postgres, user_to_create=None):
     """Creating and authorizing a user within the test.
 
     Args:
-        postgres: connection to Postgres DataBase
+        postgres:       connection to Postgres DataBase;
+        user_to_create: user already inserted into the database, e.g. by generate_and_insert_users_async.
     """
-    with step("Creating user in DB"):
-        user_to_create = generate_and_insert_user(postgres)
+    if user_to_create is None:
+        with step("Creating user in DB"):
+            user_to_create = generate_user()
+            postgres.create_user(to_db_user(user_to_create))
+            cleanup_registry.add_user(user_id=user_to_create["id"])
 
     with step("Authentication of user and getting token"):
         authentication_response = AuthenticateAPI().authentication(
@@ -57,39 +40,36 @@ def create_and_authorize_user(postgres):
     return {"user": user_to_create, "token": token, "refreshToken": refresh_token}
 
 
-def delete_user(token):
-    """Deleting a user from the database.
+@pytest.fixture(scope="function")
+def create_certain_number_of_reviews(postgres, postgres_async, request):
+    num_reviews = request.param
+    selected_reviews = random.sample(reviews, num_reviews)
 
-    Args:
-        token (): Authentication token of the user to delete
-    """
-    with step("Deleting user"):
-        UsersAPI().delete_user(token=token)
+    async def get_products_and_insert_users() -> list:
+        return await asyncio.gather(
+            AsyncProductAPI().get_all(),
+            generate_and_insert_users_async(postgres_async, num_reviews),
+        )
 
+    with step("Getting all products via API and creating users in DB concurrently"):
+        response_get_product, users = asyncio.run(get_products_and_insert_users())
+
+    with step("Verify that user does not have review for product"):
+        get_random_product = extract_random_product_ids(
+            response_get_product, product_quantity=1
+        )
+        (product_id,) = get_random_product
+        response_get_all_review = ReviewAPI().get_all_product_reviews(
+            product_id=product_id
+        )
 
-@pytest.fixture(scope="function")
-def create_certain_number_of_reviews(postgres, request):
     created_users = []
-    num_reviews = request.param
-    selected_reviews = random.sample(reviews, num_reviews)
     try:
-        with step("Getting all products via API"):
-            response_get_product = ProductAPI().get_all()
-
-        with step("Verify that user does not have review for product"):
-            get_random_product = extract_random_product_ids(
-                response_get_product, product_quantity=1
-            )
-            (product_id,) = get_random_product
-            response_get_all_review = ReviewAPI().get_all_product_reviews(
-                product_id=product_id
-            )
-
-        for i, review in enumerate(selected_reviews):
+        for i, (review, user_to_create) in enumerate(zip(selected_reviews, users)):
             with step("Creating and authorizing user"):
-                user_data = create_and_authorize_user(postgres)
+                user_data = create_and_authorize_user(postgres, user_to_create)
                 user, token = user_data["user"], user_data["token"]
-                created_users.append(token)
+                created_users.append(user_data)
 
             with step("Verify that user does not have review for product"):
                 assert_that(
@@ -117,6 +97,7 @@ def create_certain_number_of_reviews(postgres, request):
 
         yield {"user": user, "token": token, "product_id": product_id}
     finally:
-        # Cleanup: delete all users created during the test
-        for token in created_users:
-            delete_user(token)
+        # The reviews are removed with their users, so they do not stay on the shared product
+        for user_data in created_users:
+            with step("Deleting user via API"):
+                delete_user_through_api(user_data["user"], user_data["token"])
@@ -0,0 +1,39 @@
+import pytest
+from allure import description, feature, step, title
+from allure import severity
+from hamcrest import assert_that, contains_inanyorder, equal_to
+
+from framework.tools.generators import generate_users, to_db_user
+
+PAGE_SIZE = 10
+QUANTITY = 25
+
+
+@feature("Bulk insert of users")
+class TestCreateUsers:
+    @pytest.mark.db_isolation
+    @pytest.mark.medium
+    @severity(severity_level="NORMAL")
+    @title("Test ids of users inserted in several statements are returned in order")
+    @description(
+        "GIVEN 25 generated users "
+        "WHEN they are inserted with multi-row INSERT of 10 rows per statement "
+        "THEN ids of all three statements are returned in the order of the users and the users are in DB"
+    )
+    def test_create_users_returns_ids_of_all_pages(self, postgres):
+        with step("Generating users"):
+            users = [to_db_user(user) for user in generate_users(QUANTITY)]
+            expected_ids = [user["id"] for user in users]
+
+        with step("Inserting users with several statements"):
+            ids = postgres.create_users(iter(users), page_size=PAGE_SIZE)
+
+        with step("Verify that ids of every statement are returned in input order"):
+            assert_that(ids, equal_to(expected_ids))
+
+        with step("Verify that all users are inserted"):
+            rows = postgres.db.fetch_all(
+                "SELECT id FROM public.user_details WHERE id = ANY(%s::uuid[])",
+                (expected_ids,),
+            )
+            assert_that([str(row[0]) for row in rows], contains_inanyorder(*ids))
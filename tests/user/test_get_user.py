@@ -69,6 +69,7 @@ class TestGetUser:
             expected_error_message = "Internal server error"
             assert_response_message(getting_user_response, expected_error_message)
 
+    @pytest.mark.db_isolation
     @title("Getting User Info with Expired Token")
     @description(
         "GIVEN the user is registered, "
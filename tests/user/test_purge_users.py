@@ -0,0 +1,93 @@
+import pytest
+from allure import description, step, title, feature
+from allure import severity
+from hamcrest import assert_that, equal_to, has_item, is_, less_than
+
+from configs import BACKEND_MODE
+from framework.endpoints.authenticate_api import AuthenticateAPI
+from framework.endpoints.cart_api import CartAPI
+from framework.endpoints.favorite_api import FavoriteAPI
+
+
+@feature("Purge of users created by the run")
+class TestPurgeUsers:
+    @pytest.mark.high
+    @severity(severity_level="NORMAL")
+    @title("Test tables referencing users are purged in the order of foreign keys")
+    @description(
+        "GIVEN foreign keys of the database schema"
+        "WHEN tables referencing users are listed for the purge"
+        "THEN every table referencing user_details directly or through other tables is listed"
+        " before the tables it references"
+    )
+    def test_user_dependent_tables_in_order_of_foreign_keys(self, postgres):
+        with step("Reading tables referencing users and foreign keys of the schema"):
+            dependent_tables = postgres.user_dependent_tables()
+            foreign_keys = postgres.db.fetch_all(postgres.FOREIGN_KEYS_QUERY)
+            tables = [table for table, _ in dependent_tables]
+
+        with step("Verify that reviews of users are purged"):
+            assert_that(tables, has_item("product_review"))
+
+        with step("Verify that every table referencing purged rows is purged"):
+            purged = set(tables) | {"user_details"}
+            for table, column, parent, _ in foreign_keys:
+                if parent in purged and table != parent:
+                    assert_that(tables, has_item(table), f"{table}.{column}")
+
+        with step("Verify that every table is purged before the tables it references"):
+            order = {table: i for i, table in enumerate(tables + ["user_details"])}
+            for table, keys in dependent_tables:
+                for column, parent, _ in keys:
+                    assert_that(
+                        order[table], less_than(order[parent]), f"{table}.{column}"
+                    )
+
+    @pytest.mark.high
+    @pytest.mark.skipif(
+        BACKEND_MODE == "fake",
+        reason="The fake backend keeps carts and favorites out of DB",
+    )
+    @severity(severity_level="NORMAL")
+    @title("Test purge of user with cart and favorites")
+    @description(
+        "GIVEN user has a product in the cart and a favorite product"
+        "WHEN the user is purged"
+        "THEN the user and all rows referencing the user are deleted from DB"
+    )
+    def test_purge_user_with_cart_and_favorites(self, postgres, create_user, catalog):
+        with step("Authentication of user"):
+            token = (
+                AuthenticateAPI()
+                .authentication(
+                    email=create_user["email"], password=create_user["password"]
+                )
+                .json()["token"]
+            )
+            (product,) = catalog.random_products(1)
+
+        # No review is added: the product is shared and deleting its review by SQL
+        # would leave its rating stale, reviews are deleted through API by the fixtures
+        with step("Add product to cart and favorites"):
+            CartAPI().add_item_to_cart(
+                token=token, items=[{"productId": product["id"], "productQuantity": 1}]
+            )
+            FavoriteAPI().add_favorites(token=token, favorite_product=[product["id"]])
+
+        with step("Purge user"):
+            purged = postgres.purge_users(
+                user_ids=[create_user["id"]], emails=[], email_patterns=[]
+            )
+            assert_that(purged["user_details"], equal_to(1))
+
+        with step("Verify that no rows reference the user"):
+            for table, keys in postgres.user_dependent_tables():
+                for column, parent, parent_column in keys:
+                    if parent == "user_details" and parent_column == "id":
+                        rows = postgres.get_data_by_filter(
+                            table, column, create_user["id"]
+                        )
+                        assert_that(rows, is_([]), f"{table}.{column}")
+            assert_that(
+                postgres.get_user_by_id(create_user["id"]), is_(None), "user_details"
+            )